@@ -0,0 +1,13 @@
+"""pytest (pytest-django) setup: the same isolated cache as `manage.py test`."""
+
+import pytest
+
+from pocket_penguin.test_runner import IsolatedCache
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _isolated_cache(django_test_environment):
+    isolated_cache = IsolatedCache()
+    isolated_cache.enable()
+    yield
+    isolated_cache.disable()
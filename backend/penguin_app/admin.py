@@ -3,6 +3,7 @@ from .models.user_models import User, UserGameProfile
 from .models.journal_entry_model import JournalEntry
 from .models.progress_models import Progress
 from .models.calendar_models import CalendarEvent
+from .models.social_models import Friendship
 
 # User Management
 @admin.register(User)
@@ -40,3 +41,10 @@ class CalendarEventAdmin(admin.ModelAdmin):
     list_filter = ('start_time', 'user')
     search_fields = ('user__username', 'title', 'description')
     readonly_fields = ('user',)
+
+# Friendships (one row per direction)
+@admin.register(Friendship)
+class FriendshipAdmin(admin.ModelAdmin):
+    list_display = ('user', 'friend', 'created_at')
+    search_fields = ('user__username', 'friend__username')
+    raw_id_fields = ('user', 'friend')
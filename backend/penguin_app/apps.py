@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class PenguinAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'penguin_app'
+
+    def ready(self):
+        from .authentication import profile_changed, user_changed
+        from .models.user_models import User, UserGameProfile
+        from .utils import response_cache
+
+        # drop the cached request.user (see authentication.py) when the user or profile changes
+        for signal in (post_save, post_delete):
+            signal.connect(user_changed, sender=User)
+            signal.connect(profile_changed, sender=UserGameProfile)
+
+        # and the user's cached responses (see utils/response_cache.py) when the profile changes
+        for signal in (post_save, post_delete):
+            signal.connect(response_cache.profile_changed, sender=UserGameProfile)
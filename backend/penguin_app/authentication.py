@@ -0,0 +1,109 @@
+"""
+JWT authentication with a per-worker cache of the authenticated user.
+
+simplejwt's JWTAuthentication loads the whole `users` row on every request,
+and views that read request.user.profile then query user_game_profiles as
+well. CachedJWTAuthentication loads the user once per AUTH_CACHE_TIMEOUT
+instead, with only the columns authentication and permissions need plus
+the profile's id, and keeps it in the default cache (shared by the
+processes on a host, see settings.CACHES).
+
+Only the profile's id is cached: its counters (fish coins, streaks) change
+through UPDATE ... F() in utils/habits.py, so views that show them read the
+row fresh. Fields left out of AUTH_USER_FIELDS load on first access; views
+that need the full user should fetch it.
+
+Revoked tokens (logout) are refused here too, using the in-memory filter in
+utils/revocation.py, so that check doesn't query either.
+
+Invalidation: every cache key includes a per-user version token. Saving or
+deleting a User or UserGameProfile replaces it with a new random one (see
+apps.py; not incr(), which a file cache can lose between processes), so
+the next request reloads the user. With a per-process cache, other processes
+pick the change up within AUTH_CACHE_TIMEOUT at most.
+"""
+
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .utils.revocation import is_revoked
+
+# seconds a cached user is trusted without looking at the database
+AUTH_CACHE_TIMEOUT = 60
+# version counters outlive the entries they guard
+VERSION_TIMEOUT = 24 * 60 * 60
+
+AUTH_USER_FIELDS = (
+    "id", "email", "username", "is_active", "is_staff", "is_superuser", "is_verified",
+)
+
+
+def _version_key(user_id):
+    return f"auth:user-version:{user_id}"
+
+
+def _user_key(user_id, version):
+    return f"auth:user:{user_id}:{version}"
+
+
+def load_auth_user(user_id):
+    """The user with only AUTH_USER_FIELDS and the profile id loaded."""
+    return (
+        get_user_model().objects
+        .select_related("profile")
+        .only(*AUTH_USER_FIELDS, "profile__id", "profile__user")
+        .get(**{api_settings.USER_ID_FIELD: user_id})
+    )
+
+
+def invalidate_cached_user(user_id):
+    """Make the next request for `user_id` reload the user from the database."""
+    cache.set(_version_key(user_id), uuid.uuid4().hex, VERSION_TIMEOUT)
+
+
+def user_changed(sender, instance, **kwargs):
+    """post_save/post_delete receiver for the user model."""
+    invalidate_cached_user(instance.pk)
+
+
+def profile_changed(sender, instance, **kwargs):
+    """post_save/post_delete receiver for UserGameProfile."""
+    invalidate_cached_user(instance.user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves request.user from the cache when it can."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token):
+            raise InvalidToken(_("Token has been revoked"))
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = _user_key(user_id, cache.get(_version_key(user_id), 0))
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = load_auth_user(user_id)
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            cache.set(key, user, AUTH_CACHE_TIMEOUT)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # needs the password hash, which isn't cached
+            return super().get_user(validated_token)
+        return user
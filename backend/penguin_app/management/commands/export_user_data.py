@@ -0,0 +1,72 @@
+"""
+Export one user's data as NDJSON or CSV, e.g. for per-user backups.
+
+    python manage.py export_user_data --user someone@example.com
+    python manage.py export_user_data --user someone@example.com --type journal --format csv --output journal.csv
+
+Rows are streamed in chunks, so memory stays flat however much data the
+user has. Writes to stdout unless --output is given.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from penguin_app.models.user_models import User
+from penguin_app.utils.export import CHUNK_SIZE, EXPORTS, FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = "Stream a user's journal, habits, events and progress as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", required=True, help="Email of the user to export.")
+        parser.add_argument(
+            "--type",
+            action="append",
+            choices=list(EXPORTS),
+            help="Kind of data to export; repeatable (default: all).",
+        )
+        parser.add_argument("--format", choices=FORMATS, default="ndjson")
+        parser.add_argument("--output", help="File to write to (default: stdout).")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help=f"Rows fetched from the database at a time (default: {CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] <= 0:
+            raise CommandError("--chunk-size must be a positive integer.")
+        try:
+            user = User.objects.get(email=options["user"].lower())
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}.")
+
+        try:
+            chunks = iter_export(
+                user, options["type"] or list(EXPORTS), options["format"], options["chunk_size"]
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        started = time.monotonic()
+        written = 0
+        output = open(options["output"], "wb") if options["output"] else None
+        try:
+            for chunk in chunks:
+                if output is not None:
+                    output.write(chunk)
+                else:
+                    self.stdout.write(chunk.decode(), ending="")
+                written += len(chunk)
+        finally:
+            if output is not None:
+                output.close()
+
+        if output is not None:
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {written} bytes to {options['output']} in {elapsed:.2f}s."
+            ))
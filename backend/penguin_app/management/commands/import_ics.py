@@ -0,0 +1,52 @@
+"""
+Import an iCalendar (.ics) file into a user's calendar.
+
+    python manage.py import_ics --user someone@example.com calendar.ics
+    python manage.py import_ics --user someone@example.com calendar.ics --batch-size 5000
+
+The file is read line by line and events are inserted in batches, so memory
+use does not depend on the file size. Events whose UID the user already has
+are skipped, so re-running an import is safe.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from penguin_app.models.user_models import User
+from penguin_app.utils.ics import BATCH_SIZE, import_ics
+
+
+class Command(BaseCommand):
+    help = "Import VEVENTs from an .ics file into a user's calendar."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the .ics file.")
+        parser.add_argument("--user", required=True, help="Email of the user to import into.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help=f"Events inserted per transaction (default: {BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be a positive integer.")
+        try:
+            user = User.objects.get(email=options["user"].lower())
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}.")
+
+        started = time.monotonic()
+        try:
+            with open(options["path"], "rb") as ics_file:
+                result = import_ics(user, ics_file, options["batch_size"])
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} events in {elapsed:.2f}s "
+            f"({result.duplicates} duplicates, {result.skipped} skipped)."
+        ))
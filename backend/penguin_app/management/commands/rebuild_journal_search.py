@@ -0,0 +1,32 @@
+"""
+Rebuild the journal full-text search index.
+
+    python manage.py rebuild_journal_search
+
+The index is kept in sync by triggers, so this is only needed after raw
+imports that bypassed them or to compact the index after heavy editing.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from penguin_app.utils.journal import fts_available, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild and optimize the FTS5 index used by journal search."
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError("Journal full-text search requires SQLite FTS5.")
+
+        started = time.monotonic()
+        with transaction.atomic():
+            indexed = rebuild_search_index()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {indexed} journal entries in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,97 @@
+"""
+Rebuild weekly Progress rows from the habit completion log.
+
+    python manage.py rebuild_progress
+    python manage.py rebuild_progress --dry-run           # print the diff, write nothing
+    python manage.py rebuild_progress --workers 8 --chunk-size 1000
+    python manage.py rebuild_progress --user someone@example.com
+
+Repairs habits_completed, fish_coins_earned and completion_rate, creates
+missing weeks and rebuilds the monthly and all-time rollups of every user
+whose rows changed (see utils/progress_rebuild.py). Safe to run at any
+time; only rows whose values changed are written. A habit completed while
+the command runs may be overwritten with the value read just before it;
+running again repairs it.
+"""
+
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from penguin_app.models.user_models import User
+from penguin_app.utils.progress_rebuild import rebuild_all_progress
+
+
+class Command(BaseCommand):
+    help = "Recompute weekly progress from the habit completion log."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of users processed per batch (default: 500).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes reading history (default: one per CPU).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the rows that would change without writing them.",
+        )
+        parser.add_argument(
+            "--user",
+            help="Only rebuild progress for the user with this email.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size <= 0:
+            raise CommandError("--chunk-size must be a positive integer.")
+        if options["workers"] <= 0:
+            raise CommandError("--workers must be a positive integer.")
+
+        user_ids = None
+        if options["user"]:
+            try:
+                user_ids = [User.objects.get(email=options["user"].lower()).pk]
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}.")
+
+        self.dry_run = options["dry_run"]
+        started = time.monotonic()
+        users, updated, created = rebuild_all_progress(
+            chunk_size, options["workers"], self.dry_run, user_ids, report=self._report_chunk,
+        )
+
+        elapsed = time.monotonic() - started
+        verb = "would be" if self.dry_run else "were"
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {users} users in {elapsed:.2f}s: "
+            f"{updated} weeks {verb} updated and {created} {verb} created."
+        ))
+
+    def _report_chunk(self, chunk, users, changes, seconds):
+        if self.dry_run:
+            for change in changes:
+                self.stdout.write(f"  {self._describe(change)}")
+        self.stdout.write(
+            f"  chunk {chunk}: {users} users, {len(changes)} weeks changed in {seconds * 1000:.1f}ms"
+        )
+
+    @staticmethod
+    def _describe(change):
+        done, coins, rate = change.new
+        where = f"profile {change.profile_id} week {change.week_start}"
+        if change.old is None:
+            return f"{where} (new): habits {done}, coins {coins}, rate {rate:.2f}"
+        old_done, old_coins, old_rate = change.old
+        return (
+            f"{where}: habits {old_done} -> {done}, coins {old_coins} -> {coins}, "
+            f"rate {old_rate:.2f} -> {rate:.2f}"
+        )
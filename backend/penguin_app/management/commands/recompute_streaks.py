@@ -0,0 +1,65 @@
+"""
+Recompute habit and profile streaks from the HabitCompletion log.
+
+    python manage.py recompute_streaks
+    python manage.py recompute_streaks --chunk-size 1000
+    python manage.py recompute_streaks --user someone@example.com
+
+Repairs Habit.streak / Habit.best_streak and UserGameProfile.streak_days
+after backfills or edits to past days. Safe to run at any time; only rows
+whose values changed are written.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from penguin_app.models.user_models import User
+from penguin_app.utils.streaks import recompute_all_streaks, recompute_streaks
+
+
+class Command(BaseCommand):
+    help = "Recompute current and best streaks from the habit completion log."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of users processed per batch (default: 500).",
+        )
+        parser.add_argument(
+            "--user",
+            help="Only recompute streaks for the user with this email.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size <= 0:
+            raise CommandError("--chunk-size must be a positive integer.")
+
+        started = time.monotonic()
+
+        if options["user"]:
+            try:
+                user = User.objects.get(email=options["user"].lower())
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}.")
+            habits_updated, profiles_updated = recompute_streaks([user.pk])
+            users = 1
+        else:
+            users, habits_updated, profiles_updated = recompute_all_streaks(
+                chunk_size, report=self._report_chunk
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {users} users in {elapsed:.2f}s: "
+            f"{habits_updated} habits and {profiles_updated} profiles updated."
+        ))
+
+    def _report_chunk(self, chunk, users, habits_updated, profiles_updated, seconds):
+        self.stdout.write(
+            f"  chunk {chunk}: {users} users, {habits_updated} habits, "
+            f"{profiles_updated} profiles in {seconds * 1000:.1f}ms"
+        )
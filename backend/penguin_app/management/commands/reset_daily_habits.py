@@ -0,0 +1,67 @@
+"""
+Reset daily habit progress in bulk.
+
+Replaces calling Habit.reset_daily_progress() once per habit with chunked,
+set-based UPDATE statements over primary-key ranges:
+
+    python manage.py reset_daily_habits
+    python manage.py reset_daily_habits --chunk-size 20000 --date 2025-12-08
+
+A habit is reset when it has a non-zero today_count but no HabitCompletion
+row for the given day, i.e. its count belongs to an earlier day. Running the
+command again on the same day is therefore a no-op, even after users have
+started logging new progress.
+
+The week view (weekCompleted) is derived from the HabitCompletion log per
+week, so nothing has to be rolled over at the week boundary. weekProgress
+holds the client's scheduled days and is left untouched.
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from penguin_app.utils.habits import reset_daily_habits
+
+
+class Command(BaseCommand):
+    help = "Reset today_count for all habits whose progress belongs to a previous day."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Number of habits per UPDATE statement (default: 10000).",
+        )
+        parser.add_argument(
+            "--date",
+            help="Day being started, as YYYY-MM-DD (default: today).",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size <= 0:
+            raise CommandError("--chunk-size must be a positive integer.")
+
+        if options["date"]:
+            try:
+                day = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format.")
+        else:
+            day = timezone.now().date()
+
+        started = time.monotonic()
+        total = reset_daily_habits(day, chunk_size, report=self._report_chunk)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reset {total} habits for {day} in {elapsed:.2f}s."
+        ))
+
+    def _report_chunk(self, chunk, rows, seconds):
+        self.stdout.write(f"  chunk {chunk}: {rows} rows in {seconds * 1000:.1f}ms")
+
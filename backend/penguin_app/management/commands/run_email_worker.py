@@ -0,0 +1,83 @@
+"""
+Send queued emails from the outbox.
+
+    python manage.py run_email_worker             # run forever, polling when idle
+    python manage.py run_email_worker --once      # send everything due, then exit
+    python manage.py run_email_worker --batch-size 100 --interval 10
+
+Emails are claimed in batches and sent over one email connection, which is
+kept open while there is work and closed when the outbox is idle. Failed
+sends are retried with exponential backoff (see utils/email.py). With the
+file backend (EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend)
+every sent email lands in EMAIL_FILE_PATH, which is handy for local testing.
+"""
+
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from penguin_app.utils.email import BATCH_SIZE, send_due_emails
+
+
+class Command(BaseCommand):
+    help = "Send pending emails from the outbox, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help=f"Emails claimed per batch (default: {BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait when nothing is due (default: 5).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once nothing is due instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be a positive integer.")
+        if options["interval"] < 0:
+            raise CommandError("--interval must not be negative.")
+
+        total_sent = total_failed = 0
+        started = time.monotonic()
+        try:
+            while True:
+                sent, failed = self._drain(batch_size)
+                total_sent += sent
+                total_failed += failed
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {total_sent} emails ({total_failed} failed attempts) in {elapsed:.2f}s."
+        ))
+
+    def _drain(self, batch_size):
+        """Send batches until nothing is due, over one connection."""
+        sent = failed = 0
+        connection = get_connection(fail_silently=False)
+        try:
+            while True:
+                batch_sent, batch_failed = send_due_emails(batch_size, connection)
+                if not batch_sent and not batch_failed:
+                    return sent, failed
+                sent += batch_sent
+                failed += batch_failed
+                self.stdout.write(f"  batch: {batch_sent} sent, {batch_failed} failed")
+        finally:
+            connection.close()
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_weeks(apps, schema_editor):
+    """Fold duplicate (profile, week_start) rows into the oldest one."""
+    Progress = apps.get_model('penguin_app', 'Progress')
+    duplicates = (
+        Progress.objects.values('profile_id', 'week_start')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates:
+        rows = list(
+            Progress.objects.filter(profile_id=dup['profile_id'], week_start=dup['week_start'])
+            .order_by('id')
+        )
+        keep, extra = rows[0], rows[1:]
+        for row in extra:
+            keep.habits_completed += row.habits_completed
+            keep.todos_completed += row.todos_completed
+            keep.fish_coins_earned += row.fish_coins_earned
+            keep.completion_rate = max(keep.completion_rate, row.completion_rate)
+        keep.save()
+        Progress.objects.filter(id__in=[row.id for row in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0006_habit'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_weeks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='progress',
+            constraint=models.UniqueConstraint(fields=('profile', 'week_start'), name='progress_profile_week_uniq'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from datetime import timedelta
+
+
+def backfill_completions(apps, schema_editor):
+    """
+    Seed the log from the denormalized fields we kept until now: every habit
+    with a last_completed date gets its current streak run as completed days.
+    Earlier history was never stored and cannot be recovered, so the rows
+    are marked backfilled and weekly Progress up to them is left as recorded.
+    """
+    Habit = apps.get_model('penguin_app', 'Habit')
+    HabitCompletion = apps.get_model('penguin_app', 'HabitCompletion')
+
+    batch = []
+    habits = Habit.objects.filter(last_completed__isnull=False).only(
+        'id', 'user_id', 'last_completed', 'streak', 'daily_goal', 'reward'
+    )
+    for habit in habits.iterator(chunk_size=2000):
+        for offset in range(max(habit.streak, 1)):
+            batch.append(HabitCompletion(
+                habit_id=habit.id,
+                user_id=habit.user_id,
+                day=habit.last_completed - timedelta(days=offset),
+                count=habit.daily_goal,
+                completed=True,
+                coins_earned=habit.reward,
+                backfilled=True,
+            ))
+        if len(batch) >= 2000:
+            HabitCompletion.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    HabitCompletion.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0007_progress_profile_week_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitCompletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('coins_earned', models.PositiveIntegerField(default=0)),
+                ('backfilled', models.BooleanField(default=False)),
+                ('habit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='penguin_app.habit')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='habit_completions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'habit_completions',
+                'indexes': [models.Index(fields=['user', 'day'], name='habit_completion_user_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='habitcompletion',
+            constraint=models.UniqueConstraint(fields=('habit', 'day'), name='habit_completion_day_uniq'),
+        ),
+        migrations.RunPython(backfill_completions, migrations.RunPython.noop),
+    ]
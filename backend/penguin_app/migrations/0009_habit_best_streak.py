@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:08
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def seed_best_streak(apps, schema_editor):
+    """The current streak is the best one we know of until recompute_streaks runs."""
+    Habit = apps.get_model('penguin_app', 'Habit')
+    Habit.objects.update(best_streak=F('streak'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0008_habitcompletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habit',
+            name='best_streak',
+            field=models.PositiveIntegerField(default=0, help_text='Longest consecutive days streak ever reached.'),
+        ),
+        migrations.RunPython(seed_best_streak, migrations.RunPython.noop),
+    ]
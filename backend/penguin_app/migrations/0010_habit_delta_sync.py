@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0009_habit_best_streak'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('habit_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'habit_tombstones',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(fields=['user', 'updated_at'], name='habit_user_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='habittombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='habit_tombstones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='habittombstone',
+            index=models.Index(fields=['user', 'deleted_at'], name='habit_tombstone_user_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Full-text search index for journal entries (SQLite FTS5)
+
+from django.db import migrations
+
+
+FTS_TABLE = 'journal_entries_fts'
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content, user_id, entry_id,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    # user_id and entry_id are indexed (not UNINDEXED) on purpose: scoping a
+    # search to one user and deleting one entry are then index lookups too.
+    f"""
+    CREATE TRIGGER IF NOT EXISTS journal_entries_fts_insert
+    AFTER INSERT ON journal_entries BEGIN
+        INSERT INTO {FTS_TABLE} (title, content, user_id, entry_id)
+        VALUES (new.title, new.content, new.user_id, new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS journal_entries_fts_delete
+    AFTER DELETE ON journal_entries BEGIN
+        DELETE FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'entry_id:"' || old.id || '"';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS journal_entries_fts_update
+    AFTER UPDATE OF title, content ON journal_entries BEGIN
+        DELETE FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'entry_id:"' || old.id || '"';
+        INSERT INTO {FTS_TABLE} (title, content, user_id, entry_id)
+        VALUES (new.title, new.content, new.user_id, new.id);
+    END
+    """,
+    f"""
+    INSERT INTO {FTS_TABLE} (title, content, user_id, entry_id)
+    SELECT title, content, user_id, id FROM journal_entries
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS journal_entries_fts_update",
+    "DROP TRIGGER IF EXISTS journal_entries_fts_delete",
+    "DROP TRIGGER IF EXISTS journal_entries_fts_insert",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def run_on_sqlite(statements):
+    """Other databases fall back to a LIKE search (see utils/journal.py)."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0010_habit_delta_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_tags(apps, schema_editor):
+    """Index the tags of existing entries (same rules as JournalTag.normalize_all)."""
+    JournalEntry = apps.get_model('penguin_app', 'JournalEntry')
+    JournalTag = apps.get_model('penguin_app', 'JournalTag')
+
+    batch = []
+    for entry_id, user_id, tags in JournalEntry.objects.values_list('id', 'user_id', 'tags').iterator():
+        if not isinstance(tags, list):
+            continue
+        names = {str(tag).strip().lower()[:50] for tag in tags if isinstance(tag, (str, int))}
+        names.discard('')
+        batch.extend(JournalTag(entry_id=entry_id, user_id=user_id, name=name) for name in names)
+        if len(batch) >= 5000:
+            JournalTag.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    JournalTag.objects.bulk_create(batch, ignore_conflicts=True)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0011_journal_search_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+            ],
+            options={
+                'db_table': 'journal_entry_tags',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['user', 'mood', '-date', '-created_at'], name='journal_user_mood_idx'),
+        ),
+        migrations.AddField(
+            model_name='journaltag',
+            name='entry',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_index', to='penguin_app.journalentry'),
+        ),
+        migrations.AddField(
+            model_name='journaltag',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='journal_tags', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='journaltag',
+            index=models.Index(fields=['user', 'name', 'entry'], name='journal_tag_user_name_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='journaltag',
+            constraint=models.UniqueConstraint(fields=('entry', 'name'), name='journal_tag_entry_name_uniq'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0012_journal_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalentry',
+            name='client_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='journalentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_id__isnull', False)), fields=('user', 'client_id'), name='journal_user_client_id_uniq'),
+        ),
+    ]
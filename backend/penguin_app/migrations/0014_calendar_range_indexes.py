@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0013_journal_client_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['user', 'start_time'], name='calendar_user_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['user', 'end_time', 'start_time'], name='calendar_user_end_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0014_calendar_range_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarEventException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_start', models.DateTimeField()),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('start_time', models.DateTimeField(blank=True, null=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('description', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='calendarevent',
+            name='recurrence',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='calendarevent',
+            name='recurrence_end',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='calendarevent',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(condition=models.Q(('recurrence', ''), _negated=True), fields=['user', 'start_time'], name='calendar_user_series_idx'),
+        ),
+        migrations.AddField(
+            model_name='calendareventexception',
+            name='event',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exceptions', to='penguin_app.calendarevent'),
+        ),
+        migrations.AddConstraint(
+            model_name='calendareventexception',
+            constraint=models.UniqueConstraint(fields=('event', 'original_start'), name='calendar_exception_uniq'),
+        ),
+    ]
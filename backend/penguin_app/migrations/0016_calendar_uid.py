@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0015_calendar_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendarevent',
+            name='uid',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='calendarevent',
+            constraint=models.UniqueConstraint(condition=models.Q(('uid__isnull', False)), fields=('user', 'uid'), name='calendar_user_uid_uniq'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    """Sum the existing weekly rows into months and all-time totals."""
+    Progress = apps.get_model('penguin_app', 'Progress')
+    MonthlyProgress = apps.get_model('penguin_app', 'MonthlyProgress')
+    UserGameProfile = apps.get_model('penguin_app', 'UserGameProfile')
+    sums = {
+        'habits_completed': Sum('habits_completed'),
+        'todos_completed': Sum('todos_completed'),
+        'fish_coins_earned': Sum('fish_coins_earned'),
+    }
+
+    now = timezone.now()
+    months = (
+        Progress.objects.annotate(month=TruncMonth('week_start'))
+        .values('profile_id', 'month').annotate(**sums).order_by()
+    )
+    MonthlyProgress.objects.bulk_create(
+        [MonthlyProgress(updated_at=now, **row) for row in months.iterator()],
+        batch_size=1000,
+    )
+
+    profiles = []
+    for row in Progress.objects.values('profile_id').annotate(**sums).order_by().iterator():
+        profiles.append(UserGameProfile(
+            pk=row['profile_id'],
+            all_time_habits_completed=row['habits_completed'],
+            all_time_todos_completed=row['todos_completed'],
+            all_time_fish_coins_earned=row['fish_coins_earned'],
+        ))
+    UserGameProfile.objects.bulk_update(
+        profiles,
+        ['all_time_habits_completed', 'all_time_todos_completed', 'all_time_fish_coins_earned'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0018_revoked_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usergameprofile',
+            name='all_time_fish_coins_earned',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usergameprofile',
+            name='all_time_habits_completed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usergameprofile',
+            name='all_time_todos_completed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='MonthlyProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('habits_completed', models.IntegerField(default=0)),
+                ('todos_completed', models.IntegerField(default=0)),
+                ('fish_coins_earned', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_progress', to='penguin_app.usergameprofile')),
+            ],
+            options={
+                'db_table': 'user_progress_monthly',
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyprogress',
+            constraint=models.UniqueConstraint(fields=('profile', 'month'), name='progress_month_profile_uniq'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0019_progress_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Friendship',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'friendships',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='usergameprofile',
+            index=models.Index(fields=['-fish_coins', 'id'], name='profile_fish_coins_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usergameprofile',
+            index=models.Index(fields=['-streak_days', 'id'], name='profile_streak_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usergameprofile',
+            index=models.Index(fields=['-level', 'id'], name='profile_level_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usergameprofile',
+            index=models.Index(fields=['updated_at'], name='profile_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='friendship',
+            name='friend',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='friendship',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friendships', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='friendship',
+            constraint=models.UniqueConstraint(fields=('user', 'friend'), name='friendship_pair_uniq'),
+        ),
+    ]
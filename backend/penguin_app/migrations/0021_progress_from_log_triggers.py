@@ -0,0 +1,91 @@
+# Roll completed HabitCompletion rows into weekly and monthly progress (SQLite triggers)
+
+from django.db import migrations
+
+# Monday of new.day's week, and the month that week starts in
+WEEK_START = "date(new.day, printf('-%d days', (CAST(strftime('%w', new.day) AS INTEGER) + 6) % 7))"
+MONTH_START = f"date({WEEK_START}, 'start of month')"
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def completion_rate(done, week_start):
+    """done / habits in scope for the week, capped at 1.0 (see utils/habits.py)."""
+    return f"""
+        COALESCE(MIN(1.0, ({done}) * 1.0 / NULLIF((
+            SELECT COUNT(*) FROM habits h
+            WHERE h.user_id = new.user_id
+              AND h.start_date <= {week_start}
+              AND (NOT h.is_archived
+                   OR EXISTS (SELECT 1 FROM habit_completions c
+                              WHERE c.habit_id = h.id AND c.day >= {week_start}))
+        ), 0)), 0.0)
+    """
+
+
+ROLL_UP = f"""
+    INSERT INTO user_progress (
+        profile_id, week_start, habits_completed, todos_completed,
+        completion_rate, fish_coins_earned, created_at, updated_at
+    )
+    SELECT p.id, {WEEK_START}, 1, 0, {completion_rate("1", WEEK_START)},
+           new.coins_earned, {NOW}, {NOW}
+    FROM user_game_profiles p
+    WHERE p.user_id = new.user_id
+    ON CONFLICT (profile_id, week_start) DO UPDATE SET
+        habits_completed = habits_completed + 1,
+        fish_coins_earned = fish_coins_earned + excluded.fish_coins_earned,
+        completion_rate = {completion_rate("habits_completed + 1", "excluded.week_start")},
+        updated_at = excluded.updated_at;
+
+    INSERT INTO user_progress_monthly (
+        profile_id, month, habits_completed, todos_completed, fish_coins_earned, updated_at
+    )
+    SELECT p.id, {MONTH_START}, 1, 0, new.coins_earned, {NOW}
+    FROM user_game_profiles p
+    WHERE p.user_id = new.user_id
+    ON CONFLICT (profile_id, month) DO UPDATE SET
+        habits_completed = habits_completed + 1,
+        fish_coins_earned = fish_coins_earned + excluded.fish_coins_earned,
+        updated_at = excluded.updated_at;
+"""
+
+CREATE_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS habit_completions_progress_insert
+    AFTER INSERT ON habit_completions WHEN new.completed BEGIN
+        {ROLL_UP}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS habit_completions_progress_update
+    AFTER UPDATE OF completed ON habit_completions
+    WHEN new.completed AND NOT old.completed BEGIN
+        {ROLL_UP}
+    END
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS habit_completions_progress_update",
+    "DROP TRIGGER IF EXISTS habit_completions_progress_insert",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('penguin_app', '0020_leaderboards'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
@@ -1,14 +1,25 @@
 from .user_models import User, UserGameProfile
-from .progress_models import Progress
-from .journal_entry_model import JournalEntry
-from .calendar_models import CalendarEvent
-from .habit_models import Habit
+from .progress_models import Progress, MonthlyProgress
+from .journal_entry_model import JournalEntry, JournalTag
+from .calendar_models import CalendarEvent, CalendarEventException
+from .habit_models import Habit, HabitCompletion, HabitTombstone
+from .email_models import OutboxEmail
+from .token_models import RevokedToken
+from .social_models import Friendship
 
 __all__ = [
     'User',
     'UserGameProfile',
     'Progress',
+    'MonthlyProgress',
     'JournalEntry',
+    'JournalTag',
     'CalendarEvent',
+    'CalendarEventException',
     'Habit',
+    'HabitCompletion',
+    'HabitTombstone',
+    'OutboxEmail',
+    'RevokedToken',
+    'Friendship',
 ]
\ No newline at end of file
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Min, Q, Subquery
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 # This model is for one calendar event
@@ -14,6 +16,108 @@ class CalendarEvent(models.Model):
     start_time = models.DateTimeField()  # when the event starts
     end_time = models.DateTimeField()    # when the event ends
 
+    # for repeating events: an RRULE like "FREQ=WEEKLY;BYDAY=MO,WE" (see
+    # utils/recurrence.py). start_time/end_time are then the first occurrence
+    recurrence = models.CharField(max_length=500, blank=True, default="")
+    # when the last occurrence ends (empty = repeats forever), kept up to date on save
+    recurrence_end = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # iCalendar UID for events imported from .ics files, so re-importing
+    # the same file doesn't create copies (see utils/ics.py)
+    uid = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "uid"],
+                condition=Q(uid__isnull=False),
+                name="calendar_user_uid_uniq",
+            ),
+        ]
+        # (user, end_time) answers "what is on between start and end?" (see
+        # overlapping() below); (user, start_time) serves the default list order
+        indexes = [
+            models.Index(fields=["user", "start_time"], name="calendar_user_start_idx"),
+            models.Index(fields=["user", "end_time", "start_time"], name="calendar_user_end_idx"),
+            # only repeating events, which are few per user
+            models.Index(
+                fields=["user", "start_time"],
+                condition=~Q(recurrence=""),
+                name="calendar_user_series_idx",
+            ),
+        ]
+
     # this is what we show when we print the event
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+    def save(self, *args, **kwargs):
+        # remember where the series ends so window queries can skip it
+        if self.recurrence:
+            from penguin_app.utils.recurrence import series_end
+            self.recurrence_end = series_end(self)
+        else:
+            self.recurrence_end = None
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def overlapping(cls, user, start, end):
+        """
+        Events of `user` that overlap the window [start, end).
+
+        The overlap test is start_time < end AND end_time > start. On its own,
+        "start_time < end" is an open range reaching back to the user's first
+        event, so we also bound start_time from below by the earliest start
+        among events still running at `start`. That MIN is read from the
+        covering (user, end_time, start_time) index and only touches events
+        ending after `start`. The main scan is then a closed range on
+        (user, start_time). Neither side grows with past history.
+        """
+        events = cls.objects.filter(user=user)
+        earliest_running = (
+            events.filter(end_time__gt=start)
+            .order_by()
+            .values("user")
+            .annotate(earliest=Min("start_time"))
+            .values("earliest")
+        )
+        return events.filter(
+            start_time__gte=Subquery(earliest_running),
+            start_time__lt=end,
+            end_time__gt=start,
+        )
+
+
+# This model changes ONE occurrence of a repeating event: either skips it
+# (is_cancelled) or moves/renames it. original_start says which occurrence.
+class CalendarEventException(models.Model):
+    event = models.ForeignKey(CalendarEvent, on_delete=models.CASCADE, related_name="exceptions")
+    original_start = models.DateTimeField()  # the start the occurrence would have had
+    is_cancelled = models.BooleanField(default=False)
+
+    # anything left empty keeps the value from the series
+    start_time = models.DateTimeField(null=True, blank=True)
+    end_time = models.DateTimeField(null=True, blank=True)
+    title = models.CharField(max_length=255, blank=True)
+    description = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["event", "original_start"], name="calendar_exception_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.event} @ {self.original_start}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.touch_event()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.touch_event()
+        return result
+
+    def touch_event(self):
+        # a new updated_at on the series invalidates its cached occurrences
+        CalendarEvent.objects.filter(pk=self.event_id).update(updated_at=timezone.now())
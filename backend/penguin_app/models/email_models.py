@@ -0,0 +1,51 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+"""
+Email outbox for the Pocket Penguin application.
+
+Emails are written here in the same transaction as the change that needs
+them (e.g. registration) and sent later by `manage.py run_email_worker`, so
+a slow or failing email provider never slows down or fails an API request.
+See utils/email.py.
+"""
+
+
+class OutboxEmail(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # not sent before this time: set on retries (backoff) and while a worker holds the email
+    send_after = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "email_outbox"
+        indexes = [
+            # the worker's "what is due?" scan; sent emails drop out of it
+            models.Index(
+                fields=["send_after", "id"],
+                condition=Q(status="pending"),
+                name="email_outbox_due_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.subject} -> {self.to_email} ({self.status})"
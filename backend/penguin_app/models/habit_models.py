@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import connection, models
 from django.utils import timezone
 import uuid
+from datetime import timedelta
 
 from .user_models import User
 
@@ -103,6 +104,10 @@ class Habit(models.Model):
         default=0,
         help_text="Current consecutive days streak.",
     )
+    best_streak = models.PositiveIntegerField(
+        default=0,
+        help_text="Longest consecutive days streak ever reached.",
+    )
 
     # Weekly progress tracking (Mon-Sun)
     week_progress = models.JSONField(
@@ -136,6 +141,10 @@ class Habit(models.Model):
     class Meta:
         db_table = "habits"
         ordering = ("created_at",)
+        indexes = [
+            # Delta sync: "what changed for this user since <cursor>"
+            models.Index(fields=["user", "updated_at"], name="habit_user_updated_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user.email} – {self.name[:30]}"
@@ -176,37 +185,232 @@ class Habit(models.Model):
         
         return self.streak
 
-    def complete_for_today(self):
+    @classmethod
+    def claim_completion(cls, pk, user_id, day=None):
         """
-        Mark habit as completed for today.
-        Updates today_count, last_completed, and streak.
-        Returns True if this is a new completion (wasn't already complete).
+        Atomically mark a habit complete for `day` in a single UPDATE.
+
+        The row is only touched while the HabitCompletion log has no
+        completed row for (habit, `day`), so a day is claimed at most once
+        whatever today_count says (a count lowered by a PATCH, or left over
+        from a missed daily reset), and when several requests race only one
+        of them wins. The streak is advanced in SQL when the log shows
+        yesterday was completed, so no prior read is needed.
+
+        Returns the updated Habit (via RETURNING) or None if the habit does
+        not exist for this user or `day` is already complete. The caller is
+        responsible for logging the HabitCompletion for `day`.
         """
-        today = timezone.now().date()
-        was_complete = self.today_count >= self.daily_goal
-        
-        # Update progress
-        self.today_count = self.daily_goal
-        
-        # Update completion tracking
-        if self.last_completed != today:
-            self.calculate_streak(today)
-            self.last_completed = today
-        
-        self.save()
-        return not was_complete  # Return True if this is a new completion
+        if day is None:
+            day = timezone.now().date()
+
+        ops = connection.ops
+        columns = ", ".join(ops.quote_name(f.column) for f in cls._meta.concrete_fields)
+
+        def completed_on(param):
+            return f"""
+                SELECT 1 FROM {ops.quote_name(HabitCompletion._meta.db_table)} c
+                WHERE c.habit_id = {ops.quote_name(cls._meta.db_table)}.id
+                  AND c.day = {param} AND c.completed
+            """
+
+        next_streak = f"""
+            CASE
+                WHEN last_completed = %(day)s THEN streak
+                WHEN EXISTS ({completed_on("%(yesterday)s")}) THEN streak + 1
+                ELSE 1
+            END
+        """
+        sql = f"""
+            UPDATE {ops.quote_name(cls._meta.db_table)}
+            SET today_count = daily_goal,
+                streak = {next_streak},
+                best_streak = CASE
+                    WHEN {next_streak} > best_streak THEN {next_streak}
+                    ELSE best_streak
+                END,
+                last_completed = %(day)s,
+                updated_at = %(now)s
+            WHERE id = %(pk)s AND user_id = %(user_id)s
+              AND NOT EXISTS ({completed_on("%(day)s")})
+            RETURNING {columns}
+        """
+        params = {
+            "day": ops.adapt_datefield_value(day),
+            "yesterday": ops.adapt_datefield_value(day - timedelta(days=1)),
+            "now": ops.adapt_datetimefield_value(timezone.now()),
+            "pk": cls._meta.pk.get_db_prep_value(pk, connection),
+            "user_id": cls._meta.get_field("user").target_field.get_db_prep_value(user_id, connection),
+        }
+        claimed = list(cls.objects.raw(sql, params))
+        return claimed[0] if claimed else None
 
     def reset_daily_progress(self):
         """
-        Reset today_count to 0.
-        Should be called daily by a scheduled task.
+        Reset today_count to 0 for this habit only.
+        The daily scheduled reset uses the set-based
+        `manage.py reset_daily_habits` command instead.
         """
         self.today_count = 0
-        self.save()
+        self.save(update_fields=["today_count", "updated_at"])
 
     def completion_rate(self):
         """
         Calculate the completion rate for the habit.
         Returns a value between 0.0 and 1.0, representing the proportion of the goal that has been achieved.
         """
-        return self.progress
\ No newline at end of file
+        return self.progress
+
+
+class HabitCompletion(models.Model):
+    """
+    Per-day history of a habit, one row per (habit, day).
+
+    This log is the source of truth for habit history: streaks, the week
+    view and weekly Progress rows are derived from it with range scans on
+    (user, day) rather than mutated in place.
+
+    - count: units logged that day (mirrors today_count)
+    - completed: the day was claimed as complete via utils.habits.complete_habit
+    - coins_earned: fish coins awarded for that day's completion
+    - backfilled: seeded by migration 0008 from the streak counter, not
+      logged as it happened; days up to the last of these are incomplete
+    """
+
+    habit = models.ForeignKey(
+        Habit,
+        on_delete=models.CASCADE,
+        related_name="completions",
+    )
+    # Denormalized from habit so per-user history is a single index range
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="habit_completions",
+    )
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    coins_earned = models.PositiveIntegerField(default=0)
+    backfilled = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = "habit_completions"
+        constraints = [
+            models.UniqueConstraint(fields=["habit", "day"], name="habit_completion_day_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "day"], name="habit_completion_user_day_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.habit_id} @ {self.day} ({self.count})"
+
+    @classmethod
+    def record(cls, habit, day, completed=None, coins_earned=None):
+        """
+        Upsert the log row for (habit, day) in a single statement.
+
+        count always follows habit.today_count. completed and coins_earned
+        are only overwritten when given, so plain progress updates never
+        undo a completion.
+        """
+        update_fields = ["count"]
+        if completed is not None:
+            update_fields.append("completed")
+        if coins_earned is not None:
+            update_fields.append("coins_earned")
+
+        cls.objects.bulk_create(
+            [
+                cls(
+                    habit_id=habit.pk,
+                    user_id=habit.user_id,
+                    day=day,
+                    count=habit.today_count,
+                    completed=bool(completed),
+                    coins_earned=coins_earned or 0,
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=["habit", "day"],
+            update_fields=update_fields,
+        )
+
+    @classmethod
+    def mark_completed(cls, habit, day, coins_earned):
+        """
+        Log (habit, day) as completed in a single upsert, if it wasn't yet.
+
+        Returns True only for the false -> true transition of `completed`,
+        the event the progress triggers (migration 0021) count; False if
+        the day was already logged as completed.
+        """
+        ops = connection.ops
+        table = ops.quote_name(cls._meta.db_table)
+        columns = ["habit", "user", "day", "count", "completed", "coins_earned", "backfilled"]
+        sql = f"""
+            INSERT INTO {table} ({", ".join(ops.quote_name(cls._meta.get_field(name).column) for name in columns)})
+            VALUES (%(habit_id)s, %(user_id)s, %(day)s, %(count)s, %(completed)s, %(coins)s, %(backfilled)s)
+            ON CONFLICT (habit_id, day) DO UPDATE SET
+                count = excluded.count,
+                completed = excluded.completed,
+                coins_earned = excluded.coins_earned
+            WHERE NOT {table}.completed
+            RETURNING id
+        """
+        params = {
+            "habit_id": Habit._meta.pk.get_db_prep_value(habit.pk, connection),
+            "user_id": cls._meta.get_field("user").target_field.get_db_prep_value(habit.user_id, connection),
+            "day": ops.adapt_datefield_value(day),
+            "count": habit.today_count,
+            "completed": True,
+            "coins": coins_earned,
+            "backfilled": False,
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone() is not None
+
+    @classmethod
+    def week_view(cls, user, habit_ids, week_start):
+        """
+        Return {habit_id: [7 booleans]} of completed days for the given
+        habits in the 7 days from week_start, using one range scan.
+        """
+        week = {habit_id: [False] * 7 for habit_id in habit_ids}
+        rows = cls.objects.filter(
+            user=user,
+            day__gte=week_start,
+            day__lt=week_start + timedelta(days=7),
+            habit_id__in=habit_ids,
+            completed=True,
+        ).values_list("habit_id", "day")
+        for habit_id, day in rows:
+            week[habit_id][(day - week_start).days] = True
+        return week
+
+
+
+class HabitTombstone(models.Model):
+    """
+    Marker left behind when a habit is deleted, so clients syncing with
+    /api/habits/changes/ learn about deletions they would otherwise miss.
+    """
+
+    habit_id = models.UUIDField()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="habit_tombstones",
+    )
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "habit_tombstones"
+        indexes = [
+            models.Index(fields=["user", "deleted_at"], name="habit_tombstone_user_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.habit_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 import uuid
 from django.utils import timezone
@@ -13,16 +13,61 @@ tags, and timestamps for reflection and tracking daily progress.
 Model:
 JournalEntry: Stores individual journal entries for each user with metadata 
               such as mood, tags, creation date, and update timestamps.
+JournalTag: Normalized index of JournalEntry.tags, one row per (entry, tag).
 
 Database Design:
 - Each journal entry is linked to a User via ForeignKey.
-- Tags are stored as a JSON list.
+- Tags are stored as a JSON list, mirrored into JournalTag so tag filters
+  and autocomplete are index lookups instead of JSON scans. save(),
+  QuerySet.update(tags=...), bulk_create() and bulk_update() with "tags"
+  all keep the mirror in sync, in the same transaction as the write.
 - UUID is used as the primary key for uniqueness and security.
 - Automatic timestamps track creation and last update of entries.
 
 Author: Kaitlyn
 """    
 
+class JournalEntryQuerySet(models.QuerySet):
+    """Bulk writes that keep JournalTag in sync, like JournalEntry.save()."""
+
+    def update(self, **kwargs):
+        if "tags" not in kwargs:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.values_list("pk", flat=True))
+            rows = super().update(**kwargs)
+            JournalTag.sync_entries(JournalEntry.objects.filter(pk__in=pks).only("pk", "user", "tags"))
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            inserted = objs
+            if kwargs.get("ignore_conflicts"):
+                stored = set(self.filter(pk__in=[obj.pk for obj in objs]).values_list("pk", flat=True))
+                inserted = [obj for obj in objs if obj.pk in stored]
+                # entries dropped by a conflict were never saved
+                for obj in objs:
+                    obj._state.adding = obj.pk not in stored
+            JournalTag.objects.bulk_create(
+                [
+                    JournalTag(entry=entry, user_id=entry.user_id, name=name)
+                    for entry in inserted
+                    for name in JournalTag.normalize_all(entry.tags)
+                ],
+                ignore_conflicts=True,
+            )
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if "tags" not in fields:
+            return super().bulk_update(objs, fields, *args, **kwargs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            JournalTag.sync_entries(objs)
+        return rows
+
+
 class JournalEntry(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="journal_entries")
@@ -33,13 +78,93 @@ class JournalEntry(models.Model):
     date = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Id generated by an offline client, used to dedupe retried bulk uploads
+    client_id = models.CharField(max_length=64, null=True, blank=True)
+
+    objects = JournalEntryQuerySet.as_manager()
 
     class Meta:
         db_table = "journal_entries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "client_id"],
+                condition=models.Q(client_id__isnull=False),
+                name="journal_user_client_id_uniq",
+            ),
+        ]
         indexes = [
             models.Index(fields=["user", "-date", "-created_at"], name="journal_user_date_idx"),
+            models.Index(fields=["user", "mood", "-date", "-created_at"], name="journal_user_mood_idx"),
         ]
 
     def __str__(self):
         return f"{self.user.email} - {self.title[:20]}"
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            super().save(*args, **kwargs)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None or "tags" in update_fields:
+                self.sync_tags()
+
+    def sync_tags(self):
+        """Bring this entry's JournalTag rows in line with self.tags."""
+        names = JournalTag.normalize_all(self.tags)
+        JournalTag.objects.filter(entry=self).exclude(name__in=names).delete()
+        JournalTag.objects.bulk_create(
+            [JournalTag(entry=self, user_id=self.user_id, name=name) for name in names],
+            ignore_conflicts=True,
+        )
+
+
+class JournalTag(models.Model):
+    """
+    One row per tag on a journal entry. Names are stripped and lowercased,
+    so "Work" and " work" filter and autocomplete as the same tag.
+    """
+    MAX_LENGTH = 50
+
+    entry = models.ForeignKey(JournalEntry, on_delete=models.CASCADE, related_name="tag_index")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="journal_tags")
+    name = models.CharField(max_length=MAX_LENGTH)
+
+    class Meta:
+        db_table = "journal_entry_tags"
+        constraints = [
+            models.UniqueConstraint(fields=["entry", "name"], name="journal_tag_entry_name_uniq"),
+        ]
+        indexes = [
+            # Covers both ?tag= filtering and prefix autocomplete per user
+            models.Index(fields=["user", "name", "entry"], name="journal_tag_user_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.entry_id})"
+
+    @classmethod
+    def sync_entries(cls, entries):
+        """Replace the JournalTag rows of `entries` with their current tags."""
+        entries = list(entries)
+        cls.objects.filter(entry__in=[entry.pk for entry in entries]).delete()
+        cls.objects.bulk_create(
+            [
+                cls(entry_id=entry.pk, user_id=entry.user_id, name=name)
+                for entry in entries
+                for name in cls.normalize_all(entry.tags)
+            ],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def normalize(cls, tag):
+        return str(tag).strip().lower()[:cls.MAX_LENGTH]
+
+    @classmethod
+    def normalize_all(cls, tags):
+        """Normalized, de-duplicated tag names from a JSON tags value."""
+        if not isinstance(tags, list):
+            return []
+        names = {cls.normalize(tag) for tag in tags if isinstance(tag, (str, int))}
+        names.discard("")
+        return sorted(names)
+
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from .user_models import UserGameProfile
 
@@ -17,6 +17,10 @@ class Progress(models.Model):
     class Meta:
         db_table = 'user_progress'
         ordering = ['-week_start']
+        constraints = [
+            # One row per profile per week; habit completions upsert into it
+            models.UniqueConstraint(fields=['profile', 'week_start'], name='progress_profile_week_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.profile.user.email} Progress ({self.week_start})"
@@ -27,6 +31,45 @@ class Progress(models.Model):
             raise ValidationError("Completion rate must be between 0 and 1")
 
     def save(self, *args, **kwargs):
-        """Ensure validation runs before saving."""
+        """Ensure validation runs before saving, and keep the rollups in step."""
+        from penguin_app.utils.progress import apply_progress_change, ROLLUP_FIELDS
+
         self.full_clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        with transaction.atomic():
+            old = None
+            if self.pk is not None:
+                old = Progress.objects.filter(pk=self.pk).values('week_start', *ROLLUP_FIELDS).first()
+            super().save(*args, **kwargs)
+            if old is not None:
+                apply_progress_change(self.profile_id, old['week_start'], *(-old[f] for f in ROLLUP_FIELDS))
+            apply_progress_change(self.profile_id, self.week_start, *(getattr(self, f) for f in ROLLUP_FIELDS))
+
+    def delete(self, *args, **kwargs):
+        from penguin_app.utils.progress import apply_progress_change, ROLLUP_FIELDS
+
+        with transaction.atomic():
+            apply_progress_change(self.profile_id, self.week_start, *(-getattr(self, f) for f in ROLLUP_FIELDS))
+            return super().delete(*args, **kwargs)
+
+
+# Monthly totals of the weekly rows above, by the month their week starts in.
+# Kept up to date with every Progress change (utils/progress.py), so monthly
+# summaries read one row instead of summing weeks.
+class MonthlyProgress(models.Model):
+    profile = models.ForeignKey(UserGameProfile, on_delete=models.CASCADE, related_name='monthly_progress')
+    month = models.DateField()  # first day of the month
+    habits_completed = models.IntegerField(default=0)
+    todos_completed = models.IntegerField(default=0)
+    fish_coins_earned = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_progress_monthly'
+        ordering = ['-month']
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'month'], name='progress_month_profile_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.profile_id} Progress ({self.month:%Y-%m})"
\ No newline at end of file
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import models
+
+"""
+Friendships for the Pocket Penguin application.
+
+A friendship is stored once per direction, so "my friends" is a single
+index range on user. Used by the friends leaderboard (views/leaderboard_views.py).
+"""
+
+
+class Friendship(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="friendships",
+    )
+    friend = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "friendships"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "friend"], name="friendship_pair_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} -> {self.friend_id}"
+
+    @classmethod
+    def connect(cls, user, other):
+        """Make two users friends (both directions); existing rows are kept."""
+        cls.objects.bulk_create(
+            [cls(user=user, friend=other), cls(user=other, friend=user)],
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import models
+
+"""
+Revoked JWT tokens for the Pocket Penguin application.
+
+Logging out (and refresh-token rotation) records the token's JTI here. Every
+worker mirrors the table into an in-memory filter (utils/revocation.py), so
+checking a token on each request does not query this table. Rows are only
+needed until the token would have expired anyway.
+"""
+
+
+class RevokedToken(models.Model):
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="revoked_tokens",
+    )
+    # when the token expires on its own; the row can be deleted after this
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "revoked_tokens"
+        indexes = [
+            # workers poll "revoked since my last refresh"
+            models.Index(fields=["revoked_at"], name="revoked_token_time_idx"),
+            models.Index(fields=["expires_at"], name="revoked_token_expiry_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.jti} (until {self.expires_at:%Y-%m-%d %H:%M})"
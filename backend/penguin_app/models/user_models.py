@@ -102,11 +102,23 @@ class UserGameProfile(models.Model):
     completed_tasks = models.IntegerField(default=0)
     notification_settings = models.JSONField(default=dict)
     
+    # All-time sums of the weekly Progress rows, kept up to date by utils/progress.py
+    all_time_habits_completed = models.IntegerField(default=0)
+    all_time_todos_completed = models.IntegerField(default=0)
+    all_time_fish_coins_earned = models.IntegerField(default=0)
+    
     # TimeStamp
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'user_game_profiles'
+        indexes = [
+            # leaderboards (utils/leaderboard.py): ranked reads and "changed since"
+            models.Index(fields=['-fish_coins', 'id'], name='profile_fish_coins_rank_idx'),
+            models.Index(fields=['-streak_days', 'id'], name='profile_streak_rank_idx'),
+            models.Index(fields=['-level', 'id'], name='profile_level_rank_idx'),
+            models.Index(fields=['updated_at'], name='profile_updated_idx'),
+        ]
     def __str__(self):
         return f"{self.user.email}'s Profile"
@@ -0,0 +1,161 @@
+"""
+Keyset (cursor) pagination for Pocket Penguin list endpoints.
+
+PageNumberPagination runs a COUNT(*) and an OFFSET scan on every page, so
+page N costs O(N * page_size). Keyset pagination instead remembers the
+ordering values of the last row it returned and asks the database for rows
+strictly after it, which an index on the ordering columns answers directly:
+page N costs the same as page 1.
+
+Response format:
+    {
+        "next": "<url with ?cursor=...>" or null,
+        "results": [...]
+    }
+
+The ordering must end in a unique column so that every row has a distinct
+position; "pk" is appended automatically when missing. Views either set
+`ordering` on a subclass or order their queryset, which is then used as is.
+"""
+
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from uuid import UUID
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only keyset pagination with opaque cursors."""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor."
+
+    # e.g. ("-date", "-created_at", "id"); None means use the queryset's ordering
+    ordering = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+
+        # One extra row tells us whether there is a next page, without a COUNT
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        ordering = list(self.ordering or queryset.query.order_by or queryset.model._meta.ordering)
+        for field in ordering:
+            if not isinstance(field, str) or "__" in field:
+                raise ImproperlyConfigured(
+                    "KeysetPagination only supports ordering by plain model fields."
+                )
+        unique = {"pk", "-pk", queryset.model._meta.pk.name, f"-{queryset.model._meta.pk.name}"}
+        if not unique.intersection(ordering):
+            ordering.append("pk")
+        return tuple(ordering)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        values = [getattr(last, field.lstrip("-")) for field in self.ordering]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    def encode_cursor(self, values):
+        payload = json.dumps([self._serialize(value) for value in values])
+        return urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()).decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # cursors come from the client: every value must be a valid, non-null
+        # value of its column, or the lookups below fail with a 500
+        converted = []
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            model_field = self.model._meta.pk if name == "pk" else self.model._meta.get_field(name)
+            try:
+                value = model_field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            converted.append(value)
+        return converted
+
+    def _after(self, values):
+        """
+        Build the "strictly after this row" predicate for a composite key:
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        with > flipped to < for descending columns.
+        """
+        condition = Q()
+        equal_so_far = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal_so_far & Q(**{f"{name}__{lookup}": value})
+            equal_so_far &= Q(**{name: value})
+
+        # Redundant bound on the leading column so the database can seek
+        # straight to the cursor in the index instead of filtering the OR
+        first = self.ordering[0]
+        lookup = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{lookup}": values[0]}) & condition
+
+    @staticmethod
+    def _serialize(value):
+        # Full isoformat keeps microseconds, unlike DjangoJSONEncoder
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, UUID):
+            return str(value)
+        return value
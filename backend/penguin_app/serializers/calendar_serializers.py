@@ -1,8 +1,53 @@
 from rest_framework import serializers
-from penguin_app.models.calendar_models import CalendarEvent
+from penguin_app.models.calendar_models import CalendarEvent, CalendarEventException
+from penguin_app.utils.recurrence import is_occurrence, parse_rrule
 
 class CalendarEventSerializer(serializers.ModelSerializer):
     class Meta:
         model = CalendarEvent
-        fields = ['id', 'title', 'description', 'start_time', 'end_time']
-        read_only_fields = ['id']
\ No newline at end of file
+        fields = ['id', 'title', 'description', 'start_time', 'end_time', 'recurrence', 'recurrence_end']
+        read_only_fields = ['id', 'recurrence_end']
+
+    def validate_recurrence(self, value):
+        # make sure the rule is one we can actually expand
+        if value:
+            try:
+                parse_rrule(value)
+            except ValueError as exc:
+                raise serializers.ValidationError(str(exc))
+        return value.strip()
+
+
+# One change to one occurrence of a repeating event
+class CalendarEventExceptionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CalendarEventException
+        fields = ['id', 'original_start', 'is_cancelled', 'start_time', 'end_time', 'title', 'description']
+        read_only_fields = ['id']
+
+    def validate(self, attrs):
+        # the series comes from the view on create, from the instance on update
+        event = self.instance.event if self.instance else self.context.get('event')
+        original_start = attrs.get('original_start')
+        if event is not None and event.recurrence and original_start is not None:
+            if not is_occurrence(event, original_start):
+                raise serializers.ValidationError(
+                    {'original_start': 'The series has no occurrence starting at this time.'}
+                )
+        # a partial update is checked against the times it leaves in place
+        start = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if start and end and end <= start:
+            raise serializers.ValidationError({'end_time': 'end_time must be after start_time.'})
+        return attrs
+
+
+# What the month view shows: one row per occurrence, repeating or not
+class CalendarOccurrenceSerializer(serializers.Serializer):
+    event_id = serializers.UUIDField()
+    title = serializers.CharField()
+    description = serializers.CharField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    original_start = serializers.DateTimeField(allow_null=True)
+    exception_id = serializers.IntegerField(allow_null=True)
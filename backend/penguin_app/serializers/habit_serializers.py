@@ -1,6 +1,7 @@
 from django.utils import timezone
 from rest_framework import serializers
-from penguin_app.models.habit_models import Habit
+from penguin_app.models.habit_models import Habit, HabitCompletion
+from penguin_app.utils.habits import display_week_start_for
 
 
 class HabitSerializer(serializers.ModelSerializer):
@@ -21,6 +22,9 @@ class HabitSerializer(serializers.ModelSerializer):
     # Computed progress (today_count / daily_goal)
     progress = serializers.SerializerMethodField(read_only=True)
 
+    # Days completed this week (Sun-Sat, like weekProgress), derived from the HabitCompletion log
+    weekCompleted = serializers.SerializerMethodField(read_only=True)
+
     # Week progress (7-day boolean array) - now writable
     weekProgress = serializers.ListField(
         child=serializers.BooleanField(),
@@ -46,7 +50,9 @@ class HabitSerializer(serializers.ModelSerializer):
             "schedule",
             "last_completed",
             "streak",
+            "best_streak",
             "weekProgress",
+            "weekCompleted",
             "is_active",
             "is_archived",
             "created_at",
@@ -63,6 +69,8 @@ class HabitSerializer(serializers.ModelSerializer):
             "start_date",
             "progress",
             "streak",
+            "best_streak",
+            "weekCompleted",
         ]
 
     def get_progress(self, obj):
@@ -71,6 +79,19 @@ class HabitSerializer(serializers.ModelSerializer):
             return 0.0
         return min(1.0, obj.today_count / obj.daily_goal)
 
+    def get_weekCompleted(self, obj):
+        """
+        Return 7 booleans for the current week, Sunday first like
+        weekProgress. List views pass the whole
+        page's log in context; single habits fall back to one range scan.
+        """
+        week_completions = self.context.get("week_completions")
+        if week_completions is not None and obj.pk in week_completions:
+            return week_completions[obj.pk]
+
+        week_start = display_week_start_for(timezone.now().date())
+        return HabitCompletion.week_view(obj.user_id, [obj.pk], week_start)[obj.pk]
+
     def validate_weekProgress(self, value):
         """Validate that weekProgress is exactly 7 booleans if provided."""
         if value is not None and len(value) != 7:
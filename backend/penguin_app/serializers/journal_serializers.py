@@ -7,7 +7,9 @@ Django REST Framework serializer for the Pocket Penguin Journal feature.
 This module handles data validation, serialization, and deserialization for:
 - Creating new journal entries
 - Validating required fields: title, content, mood
-- Optional fields: tags (stored as a list), date (defaults to current time)
+- Optional fields: tags (stored as a list), date (defaults to current time),
+  client_id (offline client's own id, used to dedupe bulk uploads; blank
+  means none, and once set it cannot be changed)
 
 Author: Kaitlyn
 """
@@ -17,5 +19,19 @@ class JournalEntrySerializer(serializers.ModelSerializer):
     
     class Meta:
         model = JournalEntry
-        fields = ['id', 'title', 'content', 'mood', 'tags', 'date', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
\ No newline at end of file
+        fields = ['id', 'client_id', 'title', 'content', 'mood', 'tags', 'date', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate_client_id(self, value):
+        value = value or None
+        if self.instance is not None and self.instance.client_id is not None:
+            if value != self.instance.client_id:
+                raise serializers.ValidationError("client_id cannot be changed once set.")
+            return value
+
+        # Without a request (bulk uploads) duplicates are reported per item instead
+        request = self.context.get("request")
+        if value is not None and request is not None:
+            if JournalEntry.objects.filter(user=request.user, client_id=value).exists():
+                raise serializers.ValidationError("An entry with this client_id already exists.")
+        return value
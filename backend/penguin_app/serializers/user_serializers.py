@@ -1,8 +1,20 @@
+from datetime import timedelta
+
 from rest_framework import serializers
-from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.models import update_last_login
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.contrib.auth.signals import user_login_failed
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from ..models.user_models import UserGameProfile
+from ..utils.revocation import claim_token, is_revoked
 
 """
 Django REST Framework serializers for user authentication and management in the Pocket Penguin API.
@@ -22,6 +34,13 @@ Author: Astra
 """
 
 User = get_user_model()
+
+# Login lockout: this many wrong passwords in a row lock the account for LOCKOUT_DURATION
+MAX_FAILED_LOGINS = 5
+LOCKOUT_DURATION = timedelta(minutes=15)
+# the backend CustomTokenObtainPairSerializer checks passwords for itself
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration data validation."""
     
@@ -42,25 +61,28 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'email', 'username', 'password' , 'password_confirm']
         read_only_fields = ['id'] # id is auto-generated, ensure user can't modify it 
+        # Uniqueness is left to the database's unique constraints (see create),
+        # so no UniqueValidator pre-check queries
         extra_kwargs = {
-            'email': {'required': True, 'allow_blank': False},
-            'username': {'required': True, 'allow_blank': False, 'min_length': 5}
+            'email': {'required': True, 'allow_blank': False, 'validators': []},
+            'username': {'required': True, 'allow_blank': False, 'min_length': 5, 'validators': []}
         }
+    
+    # field -> error when the value is already taken
+    DUPLICATE_ERRORS = {
+        'email': "A user with this email already exists.",
+        'username': "A user with this username already exists.",
+    }
         
     def validate_email(self,value):
         """Validate user email."""
-        value = value.lower()
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
+        return value.lower()
     
     def validate_username(self,value):
         """Check username format."""
         value = value.lower()
         if not value.replace('_', '').replace('-', '').isalnum():
             raise serializers.ValidationError("Username can only contain letters, numbers, underscores, and hyphens.")
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("A user with this username already exists.")
         return value
     
     def validate(self,data):
@@ -74,18 +96,37 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return data 
     
     def create(self,validated_data):
-        """Create user register in the database."""
+        """
+        Create the user and their game profile: one INSERT each.
+        
+        The password is hashed before anything is written, so no database
+        lock is held during the slow hash. A taken email or username is
+        caught from the unique constraints instead of checked up front; only
+        then do we look up which one it was, for the error message.
+        """
         # Remove password_confirm from validated_data as it's not a model field
         validated_data.pop('password_confirm', None)
         
         # Extract password before creating user for security reason 
         password = validated_data.pop('password')
         
-        user = User.objects.create_user(**validated_data) # create user info from user model + validated data from this file
-        
+        user = User(**validated_data)
+        user.username = User.normalize_username(user.username)
         # Set the password using Django's built-in hashing for security 
         user.set_password(password)
-        user.save()
+        
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+        except IntegrityError:
+            errors = {
+                field: [message]
+                for field, message in self.DUPLICATE_ERRORS.items()
+                if User.objects.filter(**{field: getattr(user, field)}).exists()
+            }
+            if not errors:
+                raise
+            raise serializers.ValidationError(errors)
         
         # Create associated UserGameProfile
         UserGameProfile.objects.create(user=user) #linking the game profile to this specific user
@@ -189,33 +230,110 @@ class UserGameProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']  # Timestamps are auto-generated
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
-    """Custom serializer that uses email instead of username for login."""
+    """
+    Custom serializer that uses email instead of username for login.
+
+    Login is a single pass: one query for the user, one password hash, and
+    one UPDATE only when the failed-login counters change. After
+    MAX_FAILED_LOGINS wrong passwords in a row the account is locked for
+    LOCKOUT_DURATION, and locked accounts are refused before hashing; the
+    count starts again once a lock has expired.
+
+    With the default ModelBackend the password is checked on the user
+    fetched here; any other AUTHENTICATION_BACKENDS go through
+    authenticate(). Either way user_login_failed is sent for every failure.
+    """
     
     username_field = 'email'  # Use email instead of username
     
     def validate(self, attrs):
         # Convert email to lowercase for case-insensitive login
-        if 'email' in attrs:
-            attrs['email'] = attrs['email'].lower().strip()
+        email = attrs['email'].lower().strip()
         
         # Check if user exists first to provide better error messages
         try:
-            user = User.objects.get(email=attrs['email'])
-            if not user.is_active:
-                raise serializers.ValidationError({
-                    'detail': 'This account has been deactivated. Please contact support.'
-                })
+            user = User.objects.get(email=email)
         except User.DoesNotExist:
-            raise serializers.ValidationError({
-                'detail': 'No account found with this email address. Please check your email or sign up for a new account.'
-            })
+            self._login_failed(email)
+            raise AuthenticationFailed(
+                'No account found with this email address. Please check your email or sign up for a new account.'
+            )
+        if not user.is_active:
+            self._login_failed(email)
+            raise AuthenticationFailed('This account has been deactivated. Please contact support.')
         
-        # Try to authenticate with password
-        try:
-            data = super().validate(attrs)
-            return data
-        except Exception:
-            # If validation fails, it's likely a wrong password
-            raise serializers.ValidationError({
-                'detail': 'Incorrect password. Please try again or use "Forgot Password" to reset it.'
-            })
\ No newline at end of file
+        now = timezone.now()
+        if user.locked_until and user.locked_until > now:
+            self._login_failed(email)
+            raise AuthenticationFailed(
+                'Too many failed login attempts. Please try again later or use "Forgot Password" to reset it.'
+            )
+        
+        if not self._check_password(user, email, attrs['password']):
+            # one atomic UPDATE, so parallel attempts can't lose a count;
+            # a lock that has expired starts the count again
+            expired = Q(locked_until__lte=now)
+            User.objects.filter(pk=user.pk).update(
+                failed_login_attempts=Case(
+                    When(expired, then=Value(1)),
+                    default=F('failed_login_attempts') + 1,
+                ),
+                locked_until=Case(
+                    When(
+                        ~expired & Q(failed_login_attempts__gte=MAX_FAILED_LOGINS - 1),
+                        then=Value(now + LOCKOUT_DURATION),
+                    ),
+                    default=Value(None),
+                ),
+            )
+            raise AuthenticationFailed('Incorrect password. Please try again or use "Forgot Password" to reset it.')
+        
+        if user.failed_login_attempts or user.locked_until:
+            User.objects.filter(pk=user.pk).update(failed_login_attempts=0, locked_until=None)
+            user.failed_login_attempts, user.locked_until = 0, None
+        
+        self.user = user
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+        refresh = self.get_token(user)
+        return {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            'user': {
+                'id': str(user.id),
+                'email': user.email,
+                'username': user.username,
+                'is_verified': user.is_verified,
+            },
+        }
+    
+    def _check_password(self, user, email, password):
+        if list(settings.AUTHENTICATION_BACKENDS) != [MODEL_BACKEND]:
+            # authenticate() sends user_login_failed itself
+            return authenticate(self.context.get('request'), email=email, password=password) is not None
+        if user.check_password(password):
+            return True
+        self._login_failed(email)
+        return False
+    
+    def _login_failed(self, email):
+        user_login_failed.send(
+            sender=__name__, credentials={'email': email}, request=self.context.get('request'),
+        )
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that refuses revoked refresh tokens and, when refresh
+    tokens rotate, revokes the one being used so it can't be replayed.
+    The revocation itself is the check: of two concurrent refreshes with
+    the same token only the one that records its JTI gets new tokens.
+    """
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh):
+            raise InvalidToken('Token has been revoked')
+        if api_settings.ROTATE_REFRESH_TOKENS and not claim_token(refresh):
+            raise InvalidToken('Token has been revoked')
+        return super().validate(attrs)
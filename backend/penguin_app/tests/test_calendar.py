@@ -0,0 +1,552 @@
+import io
+import os
+import tempfile
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models.calendar_models import CalendarEvent, CalendarEventException
+from ..utils.freebusy import event_conflicts, find_conflicts, freebusy
+from ..utils.ics import import_ics, iter_ics
+from ..utils.recurrence import expand_window, is_occurrence, iter_local_starts, occurrences, parse_rrule
+
+User = get_user_model()
+
+
+def at(day, hour=0):
+    return timezone.make_aware(datetime(2026, 3, day, hour))
+
+
+class CalendarRangeTests(TestCase):
+    """?start=&end= returns exactly the events overlapping the window."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='cal@example.com', username='cal', password='TestPass123!'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('penguin_app:calendar-list-create')
+
+        # Window under test: [March 10, March 20)
+        self.make('before', at(1), at(2))
+        self.make('ends at window start', at(9), at(10))
+        self.make('crosses start', at(9), at(11))
+        self.make('inside', at(12), at(13))
+        self.make('spans window', at(1), at(30))
+        self.make('crosses end', at(19), at(21))
+        self.make('starts at window end', at(20), at(21))
+        self.make('after', at(25), at(26))
+
+        other = User.objects.create_user(
+            email='other@example.com', username='other', password='TestPass123!'
+        )
+        CalendarEvent.objects.create(user=other, title='not mine', start_time=at(12), end_time=at(13))
+
+    def make(self, title, start, end):
+        return CalendarEvent.objects.create(user=self.user, title=title, start_time=start, end_time=end)
+
+    def titles(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [event['title'] for event in response.data['results']]
+
+    def test_overlap_semantics(self):
+        self.assertEqual(
+            self.titles(start=at(10).isoformat(), end=at(20).isoformat()),
+            ['spans window', 'crosses start', 'inside', 'crosses end'],
+        )
+
+    def test_dates_are_accepted(self):
+        self.assertEqual(
+            self.titles(start='2026-03-12', end='2026-03-13'),
+            ['spans window', 'inside'],
+        )
+
+    def test_window_with_nothing_running(self):
+        self.assertEqual(self.titles(start='2027-01-01', end='2027-02-01'), [])
+
+    def test_without_window_lists_everything(self):
+        self.assertEqual(len(self.titles()), 8)
+
+    def test_invalid_windows(self):
+        for params in (
+            {'start': '2026-03-10'},
+            {'start': 'yesterday', 'end': '2026-03-20'},
+            {'start': '2026-03-20', 'end': '2026-03-10'},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_query_uses_range_scans_on_both_indexes(self):
+        queryset = CalendarEvent.overlapping(self.user, at(10), at(20))
+        with connection.cursor() as cursor:
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+
+        self.assertIn('calendar_user_start_idx (user_id=? AND start_time>? AND start_time<?)', plan)
+        self.assertIn('COVERING INDEX calendar_user_end_idx (user_id=? AND end_time>?)', plan)
+
+
+class RecurrenceRuleTests(TestCase):
+    """RRULE parsing and occurrence generation in utils/recurrence.py."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='rec@example.com', username='rec', password='TestPass123!'
+        )
+
+    def series(self, rule, start=None, hours=1):
+        start = start or at(2, 9)  # Monday March 2, 2026, 09:00
+        return CalendarEvent.objects.create(
+            user=self.user, title='class', start_time=start,
+            end_time=start + timedelta(hours=hours), recurrence=rule,
+        )
+
+    def starts(self, event, window_start, window_end):
+        return [occurrence.start_time for occurrence in occurrences(event, window_start, window_end)]
+
+    def test_invalid_rules(self):
+        for rule in ('', 'FREQ=HOURLY', 'FREQ=DAILY;INTERVAL=0', 'FREQ=DAILY;BYDAY=MO',
+                     'FREQ=WEEKLY;BYDAY=XX', 'FREQ=DAILY;COUNT=2;UNTIL=20260101',
+                     'FREQ=DAILY;BYSETPOS=1', 'FREQ=DAILY;UNTIL=soon',
+                     'RRULE:FREQ=YEARLY;COUNT=9000', 'FREQ=DAILY;COUNT=5000000',
+                     'FREQ=DAILY;INTERVAL=1001'):
+            with self.assertRaises(ValueError, msg=rule):
+                parse_rrule(rule)
+
+    def test_weekly_by_day(self):
+        event = self.series('FREQ=WEEKLY;BYDAY=MO,WE')
+        self.assertEqual(
+            self.starts(event, at(1), at(12)),
+            [at(2, 9), at(4, 9), at(9, 9), at(11, 9)],
+        )
+
+    def test_count_and_until_end_the_series(self):
+        counted = self.series('FREQ=DAILY;COUNT=3')
+        self.assertEqual(self.starts(counted, at(1), at(30)), [at(2, 9), at(3, 9), at(4, 9)])
+        self.assertEqual(counted.recurrence_end, at(4, 10))
+
+        until = self.series('RRULE:FREQ=WEEKLY;BYDAY=MO,FR;UNTIL=20260309')
+        self.assertEqual(self.starts(until, at(1), at(30)), [at(2, 9), at(6, 9), at(9, 9)])
+
+    def test_count_is_respected_after_skipping_ahead(self):
+        event = self.series('FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=10', start=at(4, 9))
+        # W, F in week 1, then M W F for the next weeks -> the 10th is Wednesday March 25
+        self.assertEqual(self.starts(event, at(23), at(31)), [at(23, 9), at(25, 9)])
+
+    def test_is_occurrence(self):
+        event = self.series('FREQ=WEEKLY;BYDAY=MO,FR;COUNT=4')  # Mar 2, 6, 9, 13
+        self.assertTrue(is_occurrence(event, at(2, 9)))
+        self.assertTrue(is_occurrence(event, at(13, 9)))
+        self.assertFalse(is_occurrence(event, at(16, 9)))  # past COUNT
+        self.assertFalse(is_occurrence(event, at(3, 9)))  # a Tuesday
+        self.assertFalse(is_occurrence(event, at(6, 10)))  # wrong time of day
+        self.assertFalse(is_occurrence(event, at(1, 9)))  # before the series
+
+    def test_monthly_skips_short_months(self):
+        start = timezone.make_aware(datetime(2026, 1, 31, 9))
+        event = self.series('FREQ=MONTHLY', start=start)
+        self.assertEqual(
+            [day.month for day in self.starts(event, start, start + timedelta(days=121))],
+            [1, 3, 5],
+        )
+
+    def test_series_stop_at_the_end_of_the_datetime_range(self):
+        for rule in ('FREQ=YEARLY;INTERVAL=1000;COUNT=20', 'FREQ=WEEKLY;INTERVAL=1000;COUNT=1000',
+                     'FREQ=WEEKLY;INTERVAL=1000;BYDAY=MO,FR;COUNT=1000'):
+            event = self.series(rule)
+            self.assertIsNone(event.recurrence_end, rule)
+            starts = [start for _, start in iter_local_starts(parse_rrule(rule), datetime(2026, 3, 2, 9))]
+            self.assertLess(len(starts), 1000, rule)
+            self.assertEqual(len(self.starts(event, at(1), timezone.make_aware(datetime(9999, 1, 1)))), len(starts))
+
+        # the 31st skips short months: the 1000th is 1713 months in
+        event = self.series('FREQ=MONTHLY;COUNT=1000', start=timezone.make_aware(datetime(2026, 1, 31, 9)))
+        self.assertEqual(event.recurrence_end, timezone.make_aware(datetime(2168, 10, 31, 10)))
+
+    def test_old_daily_series_skips_straight_to_window(self):
+        rule = parse_rrule('FREQ=DAILY')
+        dtstart = datetime(2016, 1, 1, 9)
+        index, first = next(iter_local_starts(rule, dtstart, after=datetime(2026, 3, 1)))
+        self.assertEqual(first, datetime(2026, 3, 1, 9) - timedelta(days=1))
+        self.assertEqual(index, (first - dtstart).days)
+
+    def test_local_time_is_kept_across_dst(self):
+        with timezone.override('America/New_York'):
+            start = timezone.make_aware(datetime(2026, 3, 2, 9))
+            event = self.series('FREQ=WEEKLY', start=start)
+            hours = [
+                timezone.localtime(occurrence).hour
+                for occurrence in self.starts(event, start, start + timedelta(days=14))
+            ]
+        self.assertEqual(hours, [9, 9])
+
+    def test_exceptions_cancel_and_move_occurrences(self):
+        event = self.series('FREQ=DAILY')
+        CalendarEventException.objects.create(event=event, original_start=at(3, 9), is_cancelled=True)
+        CalendarEventException.objects.create(
+            event=event, original_start=at(4, 9), start_time=at(10, 9), end_time=at(10, 10), title='moved',
+        )
+
+        found = occurrences(event, at(2), at(5), event.exceptions.all())
+        self.assertEqual([o.start_time for o in found], [at(2, 9)])
+
+        found = occurrences(event, at(10), at(11), event.exceptions.all())
+        self.assertEqual([(o.start_time, o.title) for o in found], [(at(10, 9), "class"), (at(10, 9), "moved")])
+
+
+class CalendarOccurrenceViewTests(TestCase):
+    """GET /calendar/occurrences/ expands series and caches the result."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='month@example.com', username='month', password='TestPass123!'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('penguin_app:calendar-occurrences')
+
+        self.weekly = CalendarEvent.objects.create(
+            user=self.user, title='yoga', start_time=at(2, 18), end_time=at(2, 19),
+            recurrence='FREQ=WEEKLY',
+        )
+        CalendarEvent.objects.create(user=self.user, title='dentist', start_time=at(5, 8), end_time=at(5, 9))
+
+    def get(self, start='2026-03-01', end='2026-04-01'):
+        response = self.client.get(self.url, {'start': start, 'end': end})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row['title'], row['start_time']) for row in response.data['results']]
+
+    def test_month_view_mixes_single_and_recurring(self):
+        titles = [title for title, _ in self.get()]
+        self.assertEqual(titles, ['yoga', 'dentist', 'yoga', 'yoga', 'yoga', 'yoga'])
+
+    def test_second_request_is_served_from_cache(self):
+        expand_window(self.user, at(1), at(31))
+        with self.assertNumQueries(2):  # singles + series rows, no exceptions or expansion
+            expand_window(self.user, at(1), at(31))
+
+    def test_exception_endpoint_invalidates_cache(self):
+        self.assertEqual(len(self.get()), 6)
+
+        response = self.client.post(
+            reverse('penguin_app:calendar-exceptions', args=[self.weekly.pk]),
+            {'original_start': at(9, 18).isoformat(), 'is_cancelled': True},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(self.get()), 5)
+
+    def test_exception_can_be_changed_and_undone(self):
+        exception = CalendarEventException.objects.create(
+            event=self.weekly, original_start=at(9, 18), is_cancelled=True,
+        )
+        url = reverse('penguin_app:calendar-exception-detail', args=[self.weekly.pk, exception.pk])
+        self.assertEqual(len(self.get()), 5)
+
+        response = self.client.patch(url, {'is_cancelled': False, 'start_time': at(10, 7).isoformat()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(('yoga', at(10, 7).isoformat().replace('+00:00', 'Z')), self.get())
+
+        response = self.client.patch(url, {'end_time': at(10, 6).isoformat()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(self.get()), 6)
+
+        other = User.objects.create_user(email='other@example.com', username='other', password='TestPass123!')
+        self.client.force_authenticate(user=other)
+        exception = CalendarEventException.objects.create(event=self.weekly, original_start=at(16, 18))
+        url = reverse('penguin_app:calendar-exception-detail', args=[self.weekly.pk, exception.pk])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_exception_must_name_a_real_occurrence(self):
+        url = reverse('penguin_app:calendar-exceptions', args=[self.weekly.pk])
+        response = self.client.post(url, {'original_start': at(9, 17).isoformat(), 'is_cancelled': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('original_start', response.data)
+
+        response = self.client.post(url, {'original_start': at(9, 18).isoformat(), 'is_cancelled': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        detail = reverse('penguin_app:calendar-exception-detail', args=[self.weekly.pk, response.data['id']])
+        response = self.client.patch(detail, {'original_start': at(10, 18).isoformat()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(detail, {'original_start': at(16, 18).isoformat()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_exceptions_only_for_series(self):
+        single = CalendarEvent.objects.get(title='dentist')
+        response = self.client.post(
+            reverse('penguin_app:calendar-exceptions', args=[single.pk]),
+            {'original_start': at(5, 8).isoformat(), 'is_cancelled': True},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_rule_is_rejected(self):
+        response = self.client.post(reverse('penguin_app:calendar-list-create'), {
+            'title': 'bad', 'start_time': at(2, 9).isoformat(), 'end_time': at(2, 10).isoformat(),
+            'recurrence': 'FREQ=SOMETIMES',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('recurrence', response.data)
+
+
+class FreeBusyTests(TestCase):
+    """Sweep-based busy merging, free gaps and conflict checks."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='busy@example.com', username='busy', password='TestPass123!'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.list_url = reverse('penguin_app:calendar-list-create')
+
+        self.make('a', at(2, 9), at(2, 11))
+        self.make('b', at(2, 10), at(2, 12))   # overlaps a
+        self.make('c', at(2, 12), at(2, 13))   # touches b
+        self.make('d', at(2, 15), at(2, 16))
+
+    def make(self, title, start, end, **extra):
+        return CalendarEvent.objects.create(user=self.user, title=title, start_time=start, end_time=end, **extra)
+
+    def test_merge_and_gaps(self):
+        busy, free = freebusy(self.user, at(2, 8), at(2, 18))
+        self.assertEqual(busy, [(at(2, 9), at(2, 13)), (at(2, 15), at(2, 16))])
+        self.assertEqual(free, [(at(2, 8), at(2, 9)), (at(2, 13), at(2, 15)), (at(2, 16), at(2, 18))])
+
+    def test_busy_blocks_are_clipped_to_window(self):
+        busy, free = freebusy(self.user, at(2, 10), at(2, 15))
+        self.assertEqual(busy, [(at(2, 10), at(2, 13))])
+        self.assertEqual(free, [(at(2, 13), at(2, 15))])
+
+    def test_freebusy_endpoint_includes_recurring(self):
+        self.make('standup', at(1, 14), at(1, 14) + timedelta(minutes=30), recurrence='FREQ=DAILY')
+
+        response = self.client.get(reverse('penguin_app:calendar-freebusy'), {
+            'start': at(2, 8).isoformat(), 'end': at(2, 18).isoformat(),
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['busy']), 3)
+        self.assertEqual(response.data['busy'][1]['start'], at(2, 14))
+
+    def test_find_conflicts_matches_pairwise_check(self):
+        Item = namedtuple('Item', 'start_time end_time')
+        base = at(1)
+        existing = [Item(base + timedelta(minutes=7 * i), base + timedelta(minutes=7 * i + 20)) for i in range(200)]
+        planned = [Item(base + timedelta(minutes=13 * i), base + timedelta(minutes=13 * i + 5)) for i in range(100)]
+
+        expected = {
+            (p, e) for p in planned for e in existing
+            if p.start_time < e.end_time and e.start_time < p.end_time
+        }
+        self.assertEqual(set(find_conflicts(planned, existing)), expected)
+
+    def test_create_rejects_or_flags_conflicts(self):
+        event = {
+            'title': 'new',
+            'start_time': at(2, 10).isoformat(),
+            'end_time': (at(2, 10) + timedelta(minutes=30)).isoformat(),
+        }
+
+        rejected = self.client.post(self.list_url + '?on_conflict=reject', event, format='json')
+        self.assertEqual(rejected.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual({row['title'] for row in rejected.data['conflicts']}, {'a', 'b'})
+        self.assertFalse(CalendarEvent.objects.filter(title='new').exists())
+
+        flagged = self.client.post(self.list_url + '?on_conflict=flag', event, format='json')
+        self.assertEqual(flagged.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(flagged.data['conflicts']), 2)
+
+        free = {'title': 'free', 'start_time': at(2, 13).isoformat(), 'end_time': at(2, 14).isoformat()}
+        response = self.client.post(self.list_url + '?on_conflict=reject', free, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['conflicts'], [])
+
+    def test_update_ignores_the_event_itself(self):
+        event = CalendarEvent.objects.get(title='d')
+        url = reverse('penguin_app:calendar-detail', args=[event.pk]) + '?on_conflict=reject'
+
+        moved = self.client.patch(url, {'end_time': at(2, 17).isoformat()}, format='json')
+        self.assertEqual(moved.status_code, status.HTTP_200_OK)
+
+        clash = self.client.patch(url, {'start_time': at(2, 12).isoformat()}, format='json')
+        self.assertEqual(clash.status_code, status.HTTP_409_CONFLICT)
+
+    def test_recurring_event_conflicts_within_horizon(self):
+        self.make('later', at(9, 9), at(9, 10))
+        conflicts = event_conflicts(self.user, {
+            'title': 'weekly', 'start_time': at(2, 7), 'end_time': at(2, 8), 'recurrence': 'FREQ=WEEKLY;BYDAY=MO',
+        })
+        self.assertEqual(conflicts, [])
+
+        conflicts = event_conflicts(self.user, {
+            'title': 'weekly', 'start_time': at(2, 9), 'end_time': at(2, 10), 'recurrence': 'FREQ=WEEKLY;BYDAY=MO',
+        })
+        self.assertEqual([c.title for c in conflicts], ['a', 'later'])  # b starts as it ends
+
+
+SAMPLE_ICS = "\r\n".join([
+    "BEGIN:VCALENDAR",
+    "VERSION:2.0",
+    "BEGIN:VEVENT",
+    "UID:zoned@example.com",
+    "DTSTART;TZID=America/New_York:20260310T090000",
+    "DURATION:PT1H30M",
+    "SUMMARY:Standup\\, daily",
+    "DESCRIPTION:line one\\nline two",
+    "BEGIN:VALARM",
+    "TRIGGER:-PT15M",
+    "DESCRIPTION:not the event description",
+    "END:VALARM",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "UID:all-day@example.com",
+    "DTSTART;VALUE=DATE:20260312",
+    "SUMMARY:Holiday with a very long title that has to be folded across more than one",
+    "  content line",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "UID:weekly@example.com",
+    "DTSTART:20260302T100000Z",
+    "DTEND:20260302T110000Z",
+    "RRULE:FREQ=WEEKLY;COUNT=4",
+    "EXDATE:20260309T100000Z,20260316T100000Z",
+    "SUMMARY:Swim",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "UID:weekly@example.com",
+    "RECURRENCE-ID:20260323T100000Z",
+    "DTSTART:20260323T120000Z",
+    "DTEND:20260323T130000Z",
+    "SUMMARY:Swim (moved)",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "UID:no-start@example.com",
+    "SUMMARY:Broken",
+    "END:VEVENT",
+    "END:VCALENDAR",
+    "",
+])
+
+
+class IcsTests(TestCase):
+    """.ics import/export: parsing, dedup on UID and a lossless round trip."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='ics@example.com', username='ics', password='TestPass123!'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def import_sample(self, user=None, **kwargs):
+        lines = io.BytesIO(SAMPLE_ICS.encode()).readlines()
+        return import_ics(user or self.user, lines, **kwargs)
+
+    def test_import_parses_events(self):
+        result = self.import_sample()
+        self.assertEqual((result.created, result.duplicates, result.skipped), (4, 0, 1))
+
+        zoned = CalendarEvent.objects.get(uid='zoned@example.com')
+        self.assertEqual(zoned.start_time, timezone.make_aware(datetime(2026, 3, 10, 13)))
+        self.assertEqual(zoned.end_time - zoned.start_time, timedelta(minutes=90))
+        self.assertEqual(zoned.title, 'Standup, daily')
+        self.assertEqual(zoned.description, 'line one\nline two')
+
+        all_day = CalendarEvent.objects.get(uid='all-day@example.com')
+        self.assertEqual((all_day.start_time, all_day.end_time), (at(12), at(13)))
+        self.assertTrue(all_day.title.endswith('more than one content line'))
+
+        weekly = CalendarEvent.objects.get(uid='weekly@example.com')
+        self.assertEqual(weekly.recurrence_end, at(23, 11))
+        self.assertEqual(
+            sorted(weekly.exceptions.values_list('original_start', 'is_cancelled')),
+            [(at(9, 10), True), (at(16, 10), True), (at(23, 10), False)],
+        )
+        swims = [o.start_time for o in expand_window(self.user, at(1), at(31)) if o.title == 'Swim']
+        self.assertEqual(swims, [at(2, 10)])
+        moved = [o.start_time for o in expand_window(self.user, at(1), at(31)) if o.title == 'Swim (moved)']
+        self.assertEqual(moved, [at(23, 12)])
+
+    def test_reimport_only_finds_duplicates(self):
+        self.import_sample(batch_size=2)
+        result = self.import_sample(batch_size=2)
+        self.assertEqual((result.created, result.duplicates, result.skipped), (0, 4, 1))
+        self.assertEqual(CalendarEvent.objects.filter(user=self.user).count(), 3)
+
+        # the same UIDs are still new for someone else
+        other = User.objects.create_user(email='o@example.com', username='o', password='TestPass123!')
+        self.assertEqual(self.import_sample(user=other).created, 4)
+
+    def test_export_round_trip(self):
+        series = CalendarEvent.objects.create(
+            user=self.user, title='Gym; legs, arms', description='bring\nwater',
+            start_time=at(2, 8), end_time=at(2, 9), recurrence='FREQ=DAILY;COUNT=5',
+        )
+        CalendarEventException.objects.create(event=series, original_start=at(3, 8), is_cancelled=True)
+        CalendarEventException.objects.create(
+            event=series, original_start=at(4, 8), start_time=at(4, 18), end_time=at(4, 19),
+        )
+        CalendarEvent.objects.create(user=self.user, title='é' * 60, start_time=at(5), end_time=at(6))
+
+        body = b''.join(iter_ics(self.user))
+        self.assertTrue(body.startswith(b'BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(all(len(line) <= 75 for line in body.split(b'\r\n')))
+        self.assertIn(b'EXDATE:20260303T080000Z', body)
+        self.assertIn(b'RECURRENCE-ID:20260304T080000Z', body)
+
+        other = User.objects.create_user(email='o@example.com', username='o', password='TestPass123!')
+        result = import_ics(other, io.BytesIO(body).readlines())
+        self.assertEqual((result.created, result.skipped), (3, 0))
+        copy = CalendarEvent.objects.get(user=other, recurrence='FREQ=DAILY;COUNT=5')
+        self.assertEqual((copy.title, copy.description), ('Gym; legs, arms', 'bring\nwater'))
+        self.assertEqual(copy.uid, f'{series.pk}@pocketpenguin')
+        self.assertTrue(CalendarEvent.objects.filter(user=other, title='é' * 60).exists())
+        self.assertEqual(
+            [o.start_time for o in expand_window(other, at(1), at(31))],
+            [at(2, 8), at(4, 18), at(5), at(5, 8), at(6, 8)],
+        )
+
+    def test_endpoints(self):
+        upload = SimpleUploadedFile('cal.ics', SAMPLE_ICS.encode(), content_type='text/calendar')
+        response = self.client.post(reverse('penguin_app:calendar-import-ics'), {'file': upload})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 4, 'duplicates': 0, 'skipped': 1})
+
+        response = self.client.post(reverse('penguin_app:calendar-import-ics'), {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('penguin_app:calendar-export-ics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(body.count(b'BEGIN:VEVENT'), 4)
+        self.assertIn(b'UID:zoned@example.com', body)
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile('wb', suffix='.ics', delete=False) as ics_file:
+            ics_file.write(SAMPLE_ICS.encode())
+        self.addCleanup(os.remove, ics_file.name)
+        out = io.StringIO()
+        call_command('import_ics', ics_file.name, user='ics@example.com', stdout=out)
+        self.assertIn('Imported 4 events', out.getvalue())
+        self.assertEqual(CalendarEvent.objects.filter(user=self.user).count(), 3)
@@ -0,0 +1,123 @@
+import io
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models.email_models import OutboxEmail
+from ..utils import email as email_utils
+from ..utils.email import MAX_ATTEMPTS, RETRY_BASE, queue_email, send_due_emails
+
+User = get_user_model()
+
+REGISTRATION = {
+    'email': 'Newbie@Example.com',
+    'username': 'newbie',
+    'password': 'StrongPass123!',
+    'password_confirm': 'StrongPass123!',
+}
+
+
+class RegistrationOutboxTests(TestCase):
+    """Registration queues the verification email instead of sending it."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_register_queues_email_without_sending(self):
+        response = self.client.post('/api/users/', REGISTRATION, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboxEmail.objects.get()
+        self.assertEqual(queued.to_email, 'newbie@example.com')
+        self.assertEqual(queued.status, OutboxEmail.STATUS_PENDING)
+        self.assertIn('/verify-email/?uid=', queued.body)
+
+    def test_failed_queue_rolls_back_registration(self):
+        with mock.patch('penguin_app.views.user_views.queue_verification_email',
+                        side_effect=RuntimeError('outbox down')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/users/', REGISTRATION, format='json')
+
+        self.assertFalse(User.objects.filter(email='newbie@example.com').exists())
+
+
+class EmailWorkerTests(TestCase):
+    """send_due_emails / run_email_worker: batching, retries and backoff."""
+
+    def run_worker(self, **options):
+        out = io.StringIO()
+        call_command('run_email_worker', once=True, stdout=out, **options)
+        return out.getvalue()
+
+    def test_worker_sends_due_emails(self):
+        queue_email('a@example.com', 'Hello', 'plain', '<p>html</p>')
+        queue_email('b@example.com', 'Later', 'plain')
+        OutboxEmail.objects.filter(to_email='b@example.com').update(
+            send_after=timezone.now() + timedelta(hours=1)
+        )
+
+        self.assertIn('Sent 1 emails', self.run_worker())
+        self.assertEqual([message.to for message in mail.outbox], [['a@example.com']])
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>html</p>', 'text/html')])
+        sent = OutboxEmail.objects.get(to_email='a@example.com')
+        self.assertEqual((sent.status, sent.attempts), (OutboxEmail.STATUS_SENT, 1))
+        self.assertIsNotNone(sent.sent_at)
+
+    def test_batches_share_one_connection(self):
+        for index in range(12):
+            queue_email(f'user{index}@example.com', 'Hi', 'plain')
+
+        with mock.patch('penguin_app.management.commands.run_email_worker.get_connection',
+                        wraps=email_utils.get_connection) as get_connection:
+            output = self.run_worker(batch_size=5)
+
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(output.count('batch:'), 3)
+        self.assertEqual(len(mail.outbox), 12)
+
+    def test_failure_is_retried_with_backoff(self):
+        queue_email('flaky@example.com', 'Hi', 'plain')
+        queue_email('fine@example.com', 'Hi', 'plain')
+
+        original_send = email_utils.EmailMultiAlternatives.send
+
+        def flaky_send(message, *args, **kwargs):
+            if message.to == ['flaky@example.com']:
+                raise SMTPException('421 try again later')
+            return original_send(message, *args, **kwargs)
+
+        with mock.patch.object(email_utils.EmailMultiAlternatives, 'send', flaky_send):
+            before = timezone.now()
+            self.assertEqual(send_due_emails(), (1, 1))
+
+        flaky = OutboxEmail.objects.get(to_email='flaky@example.com')
+        self.assertEqual((flaky.status, flaky.attempts), (OutboxEmail.STATUS_PENDING, 1))
+        self.assertIn('421', flaky.last_error)
+        self.assertGreaterEqual(flaky.send_after, before + RETRY_BASE)
+
+        # not due yet, then due and delivered
+        self.assertEqual(send_due_emails(), (0, 0))
+        OutboxEmail.objects.filter(pk=flaky.pk).update(send_after=timezone.now())
+        self.assertEqual(send_due_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_gives_up_after_max_attempts(self):
+        queued = queue_email('bounce@example.com', 'Hi', 'plain')
+        OutboxEmail.objects.filter(pk=queued.pk).update(attempts=MAX_ATTEMPTS - 1)
+
+        with mock.patch.object(email_utils.EmailMultiAlternatives, 'send',
+                               side_effect=SMTPException('550 no such user')):
+            send_due_emails()
+
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (OutboxEmail.STATUS_FAILED, MAX_ATTEMPTS))
+        self.assertEqual(send_due_emails(), (0, 0))
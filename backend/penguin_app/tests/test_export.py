@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models.calendar_models import CalendarEvent
+from ..models.habit_models import Habit
+from ..models.journal_entry_model import JournalEntry
+from ..utils import export
+from ..utils.export import iter_export
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="exporter@example.com", username="exporter", password="pass12345"
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com", username="other", password="pass12345"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        for i in range(3):
+            JournalEntry.objects.create(
+                user=self.user, title=f"Entry {i}", content="text, with a comma",
+                mood="calm", tags=["a", "b"],
+            )
+        JournalEntry.objects.create(user=self.other, title="Not mine", content="x", mood="sad")
+        Habit.objects.create(user=self.user, name="Read")
+        now = timezone.now()
+        CalendarEvent.objects.create(
+            user=self.user, title="Swim", start_time=now, end_time=now + timedelta(hours=1)
+        )
+
+    def read_ndjson(self, response):
+        body = b"".join(response.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_ndjson_exports_all_kinds_for_user_only(self):
+        response = self.client.get(reverse("penguin_app:export"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = self.read_ndjson(response)
+        self.assertEqual([row["type"] for row in rows].count("journal"), 3)
+        self.assertEqual([row["type"] for row in rows].count("habits"), 1)
+        self.assertEqual([row["type"] for row in rows].count("events"), 1)
+        self.assertNotIn("Not mine", [row.get("title") for row in rows])
+
+    def test_csv_export_of_one_kind(self):
+        response = self.client.get(reverse("penguin_app:export"), {"type": "journal", "as": "csv"})
+
+        self.assertEqual(response.status_code, 200)
+        body = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["content"], "text, with a comma")
+        self.assertEqual(json.loads(rows[0]["tags"]), ["a", "b"])
+
+    def test_invalid_requests(self):
+        url = reverse("penguin_app:export")
+        self.assertEqual(self.client.get(url, {"type": "secrets"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"as": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"as": "csv"}).status_code, 400)
+
+    def test_first_row_is_yielded_before_the_rest(self):
+        with mock.patch.object(export, "BUFFER_SIZE", 10 ** 9):
+            chunks = list(iter_export(self.user, ["journal"], chunk_size=2))
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[0].count(b"\n"), 1)
+        self.assertEqual(chunks[1].count(b"\n"), 2)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command("export_user_data", "--user", "exporter@example.com", "--type", "habits", stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["name"], "Read")
@@ -1,10 +1,14 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta
+from django.urls import reverse
+from django.utils import timezone
+from ..models.calendar_models import CalendarEvent
 from ..models.habit_models import Habit
+from ..utils.scheduler import habit_days, plan_week
 
 User = get_user_model()
 
@@ -207,3 +211,386 @@ class HabitAPITests(TestCase):
         
         profile.refresh_from_db()
         self.assertEqual(profile.fish_coins, initial_coins + 5)
+
+
+class HabitCompletionPipelineTests(TestCase):
+    """Tests for the single-transaction completion pipeline."""
+
+    def setUp(self):
+        from penguin_app.models.user_models import UserGameProfile
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='pipeline@example.com',
+            username='pipeline',
+            password='TestPass123!'
+        )
+        self.profile = UserGameProfile.objects.create(user=self.user)
+        self.habit = Habit.objects.create(user=self.user, name='Read', daily_goal=2, reward=7)
+
+    def _writes(self, queries):
+        """Ignore savepoint bookkeeping added by the test transaction."""
+        return [q for q in queries if 'SAVEPOINT' not in q['sql']]
+
+    def test_new_completion_query_budget(self):
+        """A new completion runs in at most 3 statements, log and rollups included."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from penguin_app.utils.habits import complete_habit
+
+        with CaptureQueriesContext(connection) as ctx:
+            habit, is_new = complete_habit(self.user, self.habit.id)
+
+        self.assertTrue(is_new)
+        self.assertLessEqual(len(self._writes(ctx.captured_queries)), 3)
+        self.assertEqual(habit.today_count, 2)
+        self.assertEqual(habit.streak, 1)
+        self.assertEqual(habit.last_completed, date.today())
+
+    def test_streak_and_progress_from_pipeline(self):
+        """Streak continues from yesterday's log and Progress is derived."""
+        from penguin_app.models.habit_models import HabitCompletion
+        from penguin_app.models.progress_models import Progress
+        from penguin_app.utils.habits import complete_habit
+
+        yesterday = date.today() - timedelta(days=1)
+        Habit.objects.filter(pk=self.habit.pk).update(last_completed=yesterday, streak=4)
+        HabitCompletion.objects.create(
+            habit=self.habit, user=self.user, day=yesterday, count=2, completed=True
+        )
+        habit, _ = complete_habit(self.user, self.habit.id)
+        self.assertEqual(habit.streak, 5)
+
+        other = Habit.objects.create(user=self.user, name='Walk', daily_goal=1, reward=3)
+        complete_habit(self.user, other.id)
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.fish_coins, 10)
+        progress = Progress.objects.get(profile=self.profile)
+        week_start = date.today() - timedelta(days=date.today().weekday())
+        expected = 3 if yesterday >= week_start else 2
+        self.assertEqual(progress.habits_completed, expected)
+        self.assertEqual(progress.fish_coins_earned, 10)
+        self.assertTrue(0.0 <= progress.completion_rate <= 1.0)
+
+    def test_lost_claim_runs_the_full_award_or_nothing(self):
+        """A count left over from a missed reset is re-claimed and awarded once."""
+        from penguin_app.models.habit_models import HabitCompletion
+        from penguin_app.utils.habits import complete_habit
+
+        yesterday = date.today() - timedelta(days=1)
+        Habit.objects.filter(pk=self.habit.pk).update(today_count=2, last_completed=yesterday)
+
+        habit, is_new = complete_habit(self.user, self.habit.id)
+        self.assertTrue(is_new)
+        self.assertEqual(habit.last_completed, date.today())
+        habit, is_new = complete_habit(self.user, self.habit.id)
+        self.assertFalse(is_new)
+
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.fish_coins, self.profile.all_time_habits_completed), (7, 1))
+        entry = HabitCompletion.objects.get(habit=self.habit, day=date.today())
+        self.assertEqual((entry.completed, entry.coins_earned), (True, 7))
+
+    def test_lowering_the_count_does_not_pay_the_day_twice(self):
+        """complete -> PATCH currentValue=0 -> complete awards and rolls up once."""
+        from penguin_app.models.progress_models import MonthlyProgress, Progress
+
+        self.client.force_authenticate(user=self.user)
+        url = f'/api/habits/{self.habit.id}/'
+        self.assertTrue(self.client.post(url + 'complete/').data['new_completion'])
+        response = self.client.patch(url, {'currentValue': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(url + 'complete/')
+        self.assertFalse(response.data['new_completion'])
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.fish_coins, 7)
+        self.assertEqual((self.profile.all_time_habits_completed, self.profile.all_time_fish_coins_earned), (1, 7))
+        week = Progress.objects.get(profile=self.profile)
+        month = MonthlyProgress.objects.get(profile=self.profile)
+        self.assertEqual((week.habits_completed, week.fish_coins_earned), (1, 7))
+        self.assertEqual((month.habits_completed, month.fish_coins_earned), (1, 7))
+
+    def test_award_is_rolled_back_if_the_day_was_logged_meanwhile(self):
+        """A claim that races a completed log row awards nothing."""
+        from unittest import mock
+        from penguin_app.models.habit_models import HabitCompletion
+        from penguin_app.utils.habits import complete_habit
+
+        # another request logs the day between our claim and our log write
+        HabitCompletion.objects.create(
+            habit=self.habit, user=self.user, day=date.today(), count=2, completed=True, coins_earned=7,
+        )
+        claimed = Habit.objects.get(pk=self.habit.pk)
+        with mock.patch.object(Habit, 'claim_completion', return_value=claimed):
+            habit, is_new = complete_habit(self.user, self.habit.id)
+
+        self.assertFalse(is_new)
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.fish_coins, self.profile.all_time_habits_completed), (0, 0))
+
+    def test_claim_is_keyed_on_the_logged_day(self):
+        """A day with a completed log row can't be claimed again, whatever the count."""
+        from penguin_app.models.habit_models import HabitCompletion
+
+        today = date.today()
+        claimed = Habit.claim_completion(self.habit.pk, self.user.pk, today)
+        HabitCompletion.record(claimed, today, completed=True, coins_earned=claimed.reward)
+        Habit.objects.filter(pk=self.habit.pk).update(today_count=0)
+
+        self.assertIsNone(Habit.claim_completion(self.habit.pk, self.user.pk, today))
+        self.assertIsNotNone(Habit.claim_completion(self.habit.pk, self.user.pk, today + timedelta(days=1)))
+
+    def test_completion_adds_to_a_week_recorded_before_the_log(self):
+        """A week the log doesn't cover is added to, never re-derived."""
+        from penguin_app.models.progress_models import Progress
+        from penguin_app.utils.habits import complete_habit, week_start_for
+
+        week_start = week_start_for(date.today())
+        Progress.objects.create(profile=self.profile, week_start=week_start,
+                                habits_completed=5, fish_coins_earned=40)
+        complete_habit(self.user, self.habit.id)
+
+        progress = Progress.objects.get(profile=self.profile, week_start=week_start)
+        self.assertEqual((progress.habits_completed, progress.fish_coins_earned), (6, 47))
+
+    def test_completion_and_progress_updates_are_logged(self):
+        """Completions and currentValue updates both land in the log."""
+        from penguin_app.models.habit_models import HabitCompletion
+
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        url = f'/api/habits/{self.habit.id}/'
+
+        self.client.patch(url, {'currentValue': 1}, format='json')
+        entry = HabitCompletion.objects.get(habit=self.habit, day=date.today())
+        self.assertEqual(entry.count, 1)
+        self.assertFalse(entry.completed)
+
+        self.client.post(url + 'complete/')
+        entry.refresh_from_db()
+        self.assertEqual(entry.count, 2)
+        self.assertTrue(entry.completed)
+        self.assertEqual(entry.coins_earned, 7)
+
+        response = self.client.get('/api/habits/')
+        week_completed = response.data['results'][0]['weekCompleted']
+        self.assertEqual(len(week_completed), 7)
+        # Sunday first, like weekProgress
+        self.assertTrue(week_completed[(date.today().weekday() + 1) % 7])
+        self.assertEqual(sum(week_completed), 1)
+
+    def test_unknown_habit_returns_404(self):
+        """Completing someone else's habit is a 404."""
+        other_user = User.objects.create_user(
+            email='other@example.com', username='other', password='TestPass123!'
+        )
+        habit = Habit.objects.create(user=other_user, name='Theirs', daily_goal=1)
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        response = self.client.post(f'/api/habits/{habit.id}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class HabitCompletionConcurrencyTests(TransactionTestCase):
+    """Parallel completions must not lose or duplicate coins."""
+
+    def test_parallel_completions_award_exact_coins(self):
+        import threading
+        from django.db import connection
+        from penguin_app.models.user_models import UserGameProfile
+        from penguin_app.utils.habits import complete_habit
+
+        user = User.objects.create_user(
+            email='race@example.com', username='racer', password='TestPass123!'
+        )
+        UserGameProfile.objects.create(user=user)
+        habits = [
+            Habit.objects.create(user=user, name=f'Habit {i}', daily_goal=1, reward=5)
+            for i in range(8)
+        ]
+        # Every habit is completed twice in parallel; only one may win each
+        targets = [habit.id for habit in habits] * 2
+        barrier = threading.Barrier(len(targets))
+        results, errors = [], []
+
+        def worker(habit_id):
+            try:
+                barrier.wait()
+                results.append(complete_habit(user, habit_id)[1])
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(pk,)) for pk in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results.count(True), len(habits))
+        profile = UserGameProfile.objects.get(user=user)
+        self.assertEqual(profile.fish_coins, len(habits) * 5)
+
+
+class ResetDailyHabitsCommandTests(TestCase):
+    """Tests for the reset_daily_habits management command."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='reset@example.com',
+            username='resetter',
+            password='TestPass123!'
+        )
+
+    def test_resets_stale_counts_in_chunks_and_is_idempotent(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from penguin_app.models.habit_models import HabitCompletion
+
+        stale = [
+            Habit.objects.create(user=self.user, name=f'Stale {i}', daily_goal=3, today_count=2)
+            for i in range(5)
+        ]
+        fresh = Habit.objects.create(user=self.user, name='Fresh', daily_goal=3, today_count=1)
+        HabitCompletion.record(fresh, date.today())
+
+        out = StringIO()
+        call_command('reset_daily_habits', '--chunk-size', '2', stdout=out)
+        self.assertIn('Reset 5 habits', out.getvalue())
+        self.assertIn('chunk 3', out.getvalue())
+
+        for habit in stale:
+            habit.refresh_from_db()
+            self.assertEqual(habit.today_count, 0)
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.today_count, 1)
+
+        # Second run the same day changes nothing
+        out = StringIO()
+        call_command('reset_daily_habits', stdout=out)
+        self.assertIn('Reset 0 habits', out.getvalue())
+
+
+class HabitDeltaSyncTests(TestCase):
+    """Tests for GET /api/habits/changes/."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='sync@example.com',
+            username='syncer',
+            password='TestPass123!'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = '/api/habits/changes/'
+
+    def test_initial_sync_then_delta_with_tombstones(self):
+        from django.utils import timezone
+        from penguin_app.views.habits_views import HabitChangesView
+
+        kept = Habit.objects.create(user=self.user, name='Kept', daily_goal=1)
+        doomed = Habit.objects.create(user=self.user, name='Doomed', daily_goal=1)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['changed']), 2)
+        self.assertEqual(response.data['deleted'], [])
+
+        # Pretend both habits were last touched well before the cursor
+        Habit.objects.update(updated_at=timezone.now() - timedelta(minutes=5))
+        cursor = HabitChangesView._encode_cursor(timezone.now() - timedelta(minutes=1))
+
+        self.client.patch(f'/api/habits/{kept.id}/', {'currentValue': 1}, format='json')
+        self.client.delete(f'/api/habits/{doomed.id}/')
+
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual([h['id'] for h in response.data['changed']], [str(kept.id)])
+        self.assertEqual(response.data['deleted'], [str(doomed.id)])
+        self.assertTrue(response.data['cursor'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HabitPlanTests(TestCase):
+    """Auto-scheduling habits into free calendar time (utils/scheduler.py)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='planner@example.com', username='planner', password='TestPass123!'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        # habits start today (auto_now_add), so plan next week
+        today = timezone.localdate()
+        self.monday = today + timedelta(days=7 - today.weekday())
+
+    def at(self, day_offset, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.monday + timedelta(days=day_offset), time(hour, minute)))
+
+    def habit(self, name, **fields):
+        return Habit.objects.create(user=self.user, name=name, **fields)
+
+    def test_due_days(self):
+        self.assertEqual(habit_days(Habit(schedule='WEEKDAYS')), frozenset(range(5)))
+        self.assertEqual(habit_days(Habit(schedule='weekends')), frozenset({5, 6}))
+        # app stores Sunday first: Sun, Tue
+        flags = [True, False, True, False, False, False, False]
+        self.assertEqual(habit_days(Habit(schedule='DAILY', week_progress=flags)), frozenset({6, 1}))
+
+    def test_blocks_avoid_busy_time_and_each_other(self):
+        # the only free time on Monday is 07:00-07:30 and 12:00-13:30
+        CalendarEvent.objects.create(user=self.user, title='am', start_time=self.at(0, 7, 30), end_time=self.at(0, 12))
+        CalendarEvent.objects.create(user=self.user, title='pm', start_time=self.at(0, 13, 30), end_time=self.at(0, 22))
+        self.habit('Run', unit='minutes', daily_goal=60)
+        self.habit('Stretch', unit='minutes', daily_goal=30)
+        self.habit('Read', unit='minutes', daily_goal=45)
+
+        blocks, unscheduled = plan_week(self.user, self.monday, days=1)
+
+        placed = {block.habit.name: (block.start_time, block.end_time) for block in blocks}
+        # longest first, each in the smallest gap that fits
+        self.assertEqual(placed['Run'], (self.at(0, 12), self.at(0, 13)))
+        self.assertEqual(placed['Stretch'], (self.at(0, 7), self.at(0, 7, 30)))
+        self.assertEqual([habit.name for habit, _ in unscheduled], ['Read'])
+
+    def test_plan_endpoint(self):
+        self.habit('Meditate', schedule='WEEKDAYS', unit='minutes', daily_goal=10)
+        self.habit('Archived', is_archived=True)
+
+        response = self.client.get(reverse('penguin_app:habit-plan'), {'start': self.monday.isoformat()})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['blocks']), 5)
+        self.assertEqual(response.data['blocks'][0]['start_time'], self.at(0, 7))
+        self.assertEqual(response.data['blocks'][0]['end_time'], self.at(0, 7, 10))
+
+    def test_plan_endpoint_rejects_bad_params(self):
+        url = reverse('penguin_app:habit-plan')
+        for params in ({'start': 'soon'}, {'start': '2026-02-30'}, {'days': 40},
+                       {'day_start': '22:00', 'day_end': '07:00'}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_dozens_of_habits_and_hundreds_of_events_in_few_queries(self):
+        for day in range(7):
+            for hour in range(8, 20):
+                CalendarEvent.objects.create(
+                    user=self.user, title='slot',
+                    start_time=self.at(day, hour, 15), end_time=self.at(day, hour, 45),
+                )
+        for i in range(40):
+            self.habit(f'Habit {i}', unit='minutes', daily_goal=10 + i % 3 * 5)
+
+        with self.assertNumQueries(3):  # habits, one-off events, repeating events
+            blocks, unscheduled = plan_week(self.user, self.monday)
+
+        self.assertEqual(len(blocks) + len(unscheduled), 40 * 7)
+        for first, second in zip(blocks, blocks[1:]):
+            self.assertLessEqual(first.end_time, second.start_time)
@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models.habit_models import Habit
+from ..models.social_models import Friendship
+from ..models.user_models import UserGameProfile
+from ..utils import leaderboard
+from ..utils.habits import complete_habit
+from ..utils.leaderboard import Ranking, leaderboards
+
+User = get_user_model()
+
+"""
+Unit tests for the leaderboards (utils/leaderboard.py, views/leaderboard_views.py).
+"""
+
+
+class RankingTests(TestCase):
+    """Tests for the sorted ranking structure."""
+
+    def test_ranks_share_ties(self):
+        ranking = Ranking({1: 50, 2: 80, 3: 50, 4: 10}.items())
+        self.assertEqual(ranking.top(4), [(2, 80, 1), (1, 50, 2), (3, 50, 2), (4, 10, 4)])
+        self.assertEqual([ranking.rank(pk) for pk in (1, 2, 3, 4)], [2, 1, 2, 4])
+        self.assertEqual(ranking.rank_of_score(60), 2)
+        self.assertIsNone(ranking.rank(99))
+
+    def test_update_moves_a_profile(self):
+        ranking = Ranking({1: 50, 2: 80}.items())
+        ranking.update(1, 90)
+        ranking.update(3, 5)
+        self.assertEqual(ranking.top(10), [(1, 90, 1), (2, 80, 2), (3, 5, 3)])
+        self.assertEqual(len(ranking), 3)
+
+
+class LeaderboardViewTests(TestCase):
+    """Tests for the global and friends leaderboard endpoints."""
+
+    def setUp(self):
+        leaderboards.reset()
+        self.addCleanup(leaderboards.reset)
+        self.client = APIClient()
+        self.users = []
+        for name, coins, streak in [('pip', 30, 2), ('gus', 90, 1), ('ada', 60, 7), ('zed', 60, 0)]:
+            user = User.objects.create_user(email=f'{name}@example.com', username=name, password='TestPass123!')
+            UserGameProfile.objects.create(user=user, fish_coins=coins, streak_days=streak)
+            self.users.append(user)
+        self.me = self.users[0]
+        self.client.force_authenticate(user=self.me)
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(f'penguin_app:{name}'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_global_top_and_my_rank(self):
+        data = self.get('leaderboard', limit=3)
+        self.assertEqual(
+            [(entry['rank'], entry['username'], entry['value']) for entry in data['top']],
+            [(1, 'gus', 90), (2, 'ada', 60), (2, 'zed', 60)],
+        )
+        self.assertEqual(data['me'], {'rank': 4, 'value': 30})
+        self.assertEqual(data['total'], 4)
+
+        data = self.get('leaderboard', metric='streak_days', limit=1)
+        self.assertEqual(data['top'][0]['username'], 'ada')
+        self.assertEqual(data['me']['rank'], 2)
+
+    def test_coin_changes_are_picked_up_incrementally(self):
+        self.get('leaderboard')
+        habit = Habit.objects.create(user=self.me, name='Swim', reward=70)
+        complete_habit(self.me, habit.pk)
+
+        with mock.patch.object(leaderboard, 'REFRESH_INTERVAL', 0):
+            leaderboards._next_refresh = 0
+            with self.assertNumQueries(3):  # changed profiles, my profile id, usernames
+                data = self.get('leaderboard', limit=1)
+        self.assertEqual(data['me'], {'rank': 1, 'value': 100})
+        self.assertEqual(data['top'][0]['username'], 'pip')
+
+    def test_friends_leaderboard(self):
+        Friendship.connect(self.me, self.users[2])
+        Friendship.connect(self.users[1], self.users[3])
+
+        data = self.get('leaderboard-friends')
+        self.assertEqual(
+            [(entry['rank'], entry['username'], entry['is_me']) for entry in data['entries']],
+            [(1, 'ada', False), (2, 'pip', True)],
+        )
+
+    def test_bad_params_are_rejected(self):
+        for params in [{'metric': 'password'}, {'limit': 0}, {'limit': 'ten'}, {'limit': 101}]:
+            response = self.client.get(reverse('penguin_app:leaderboard'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
@@ -0,0 +1,154 @@
+"""
+Tests for the shared keyset paginator (penguin_app/pagination.py).
+
+The benchmark at the bottom is skipped by default; run it with
+    RUN_BENCHMARKS=1 python manage.py test penguin_app.tests.test_pagination
+Its timings are logged at INFO (and shown if the assertion fails).
+"""
+
+import json
+import logging
+import os
+import time
+import unittest
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models.calendar_models import CalendarEvent
+from ..models.habit_models import Habit
+from ..models.journal_entry_model import JournalEntry
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def walk(client, url):
+    """Follow `next` links and return every id in order."""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK, response.data
+        ids.extend(item['id'] for item in response.data['results'])
+        url = response.data['next']
+    return ids
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='pager@example.com',
+            username='pager',
+            password='TestPass123!'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_journal_pages_follow_index_order_without_gaps(self):
+        now = timezone.now()
+        # Several entries share a date so the tie-breakers matter
+        for i in range(25):
+            JournalEntry.objects.create(
+                user=self.user, title=f'Entry {i}', content='...', mood='calm',
+                date=now - timedelta(days=i // 4),
+            )
+        expected = [
+            str(pk) for pk in JournalEntry.objects.filter(user=self.user)
+            .order_by('-date', '-created_at', 'id').values_list('id', flat=True)
+        ]
+
+        first = self.client.get('/api/journal/', {'page_size': 10})
+        self.assertNotIn('count', first.data)
+        self.assertEqual(len(first.data['results']), 10)
+
+        self.assertEqual(walk(self.client, '/api/journal/?page_size=10'), expected)
+
+    def test_habits_and_calendar_paginate(self):
+        for i in range(5):
+            Habit.objects.create(user=self.user, name=f'Habit {i}')
+            start = timezone.now() + timedelta(hours=i)
+            CalendarEvent.objects.create(
+                user=self.user, title=f'Event {i}', start_time=start,
+                end_time=start + timedelta(minutes=30),
+            )
+
+        habit_ids = walk(self.client, '/api/habits/?page_size=2')
+        self.assertEqual(len(habit_ids), 5)
+        self.assertEqual(len(set(habit_ids)), 5)
+
+        event_titles = []
+        url = '/api/calendar/events/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            event_titles.extend(e['title'] for e in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(event_titles, [f'Event {i}' for i in range(5)])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/journal/', {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_well_formed_cursor_with_bad_values(self):
+        for values in (['x', 'y', 'z'], [1, 2, 3], [None, None, None], [{}, [], 1.5]):
+            cursor = urlsafe_b64encode(json.dumps(values).encode()).decode()
+            response = self.client.get('/api/journal/', {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, values)
+
+
+@unittest.skipUnless(os.environ.get('RUN_BENCHMARKS'), 'set RUN_BENCHMARKS=1 to run')
+class KeysetPaginationBenchmark(TestCase):
+    """Page 1 vs a deep page with 100k journal entries for one user."""
+
+    entries = 100_000
+
+    def test_deep_page_costs_the_same_as_first_page(self):
+        from rest_framework.pagination import PageNumberPagination
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from ..views.journal_views import JournalEntryPagination
+
+        user = User.objects.create_user(
+            email='bench@example.com', username='bencher', password='TestPass123!'
+        )
+        now = timezone.now()
+        JournalEntry.objects.bulk_create(
+            [
+                JournalEntry(user=user, title='t', content='c', mood='m',
+                             date=now - timedelta(minutes=i))
+                for i in range(self.entries)
+            ],
+            batch_size=5000,
+        )
+        queryset = JournalEntry.objects.filter(user=user).order_by('-date', '-created_at', 'id')
+        factory = APIRequestFactory()
+
+        def timed(paginator, params):
+            request = Request(factory.get('/api/journal/', params))
+            started = time.perf_counter()
+            paginator.paginate_queryset(queryset, request)
+            return paginator, time.perf_counter() - started
+
+        # Keyset: page 1, then jump to the cursor of row 99,980
+        first, keyset_first = timed(JournalEntryPagination(), {})
+        deep_row = queryset[self.entries - 21]
+        cursor = first.encode_cursor([deep_row.date, deep_row.created_at, deep_row.id])
+        _, keyset_deep = timed(JournalEntryPagination(), {'cursor': cursor})
+
+        # Offset: same depth with PageNumberPagination (COUNT + OFFSET)
+        offset = PageNumberPagination()
+        offset.page_size = 20
+        _, offset_deep = timed(offset, {'page': self.entries // 20})
+
+        timings = (
+            f"keyset page 1: {keyset_first * 1000:.1f}ms, "
+            f"keyset deep: {keyset_deep * 1000:.1f}ms, "
+            f"offset deep: {offset_deep * 1000:.1f}ms"
+        )
+        logger.info(timings)
+        self.assertLess(keyset_deep, max(keyset_first * 5, 0.05), timings)
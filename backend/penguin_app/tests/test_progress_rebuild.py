@@ -0,0 +1,104 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models.habit_models import Habit, HabitCompletion
+from ..models.progress_models import MonthlyProgress, Progress
+from ..models.user_models import UserGameProfile
+from ..utils.progress_rebuild import diff_progress, rebuild_all_progress
+
+User = get_user_model()
+
+"""
+Unit tests for rebuilding weekly Progress from the log (utils/progress_rebuild.py).
+"""
+
+
+class RebuildProgressTests(TestCase):
+    """Tests for diff_progress and the rebuild_progress command."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='rebuild@example.com',
+            username='rebuilder',
+            password='TestPass123!'
+        )
+        self.profile = UserGameProfile.objects.create(user=self.user)
+        self.water = Habit.objects.create(user=self.user, name='Water')
+        self.run = Habit.objects.create(user=self.user, name='Run')
+        Habit.objects.update(start_date=date(2025, 1, 1))
+
+    def log(self, habit, *days, coins=5):
+        for day in days:
+            HabitCompletion.objects.create(
+                habit=habit, user=self.user, day=day, count=1, completed=True, coins_earned=coins,
+            )
+
+    def week(self, week_start):
+        return Progress.objects.get(profile=self.profile, week_start=week_start)
+
+    def test_drifted_and_missing_weeks_are_rebuilt(self):
+        self.log(self.water, date(2025, 3, 3), date(2025, 3, 4))
+        self.log(self.run, date(2025, 3, 4), date(2025, 3, 12))
+        # the log triggers kept the weeks in step; drift them behind their back
+        Progress.objects.filter(week_start=date(2025, 3, 3)).update(
+            habits_completed=9, todos_completed=2, fish_coins_earned=1)
+        Progress.objects.filter(week_start=date(2025, 3, 10)).delete()
+        # a week before the log started is left alone
+        Progress.objects.create(profile=self.profile, week_start=date(2025, 2, 3),
+                                habits_completed=4, fish_coins_earned=20)
+
+        self.assertEqual(rebuild_all_progress(workers=1), (1, 1, 1))
+
+        march = self.week(date(2025, 3, 3))
+        self.assertEqual((march.habits_completed, march.fish_coins_earned, march.todos_completed), (3, 15, 2))
+        self.assertEqual(march.completion_rate, 1.0)
+        second = self.week(date(2025, 3, 10))
+        self.assertEqual((second.habits_completed, second.completion_rate), (1, 0.5))
+        self.assertEqual(self.week(date(2025, 2, 3)).habits_completed, 4)
+
+        # rollups follow the rebuilt rows
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.all_time_habits_completed, 8)
+        self.assertEqual(
+            MonthlyProgress.objects.get(profile=self.profile, month=date(2025, 3, 1)).habits_completed, 4
+        )
+        self.assertEqual(diff_progress([self.user.pk]), [])
+
+    def test_weeks_up_to_the_backfill_are_left_as_recorded(self):
+        # migration 0008 seeded Wednesday and Thursday from the streak counter
+        for day in (date(2025, 3, 5), date(2025, 3, 6)):
+            HabitCompletion.objects.create(habit=self.water, user=self.user, day=day, count=1,
+                                           completed=True, coins_earned=5, backfilled=True)
+        Progress.objects.filter(week_start=date(2025, 3, 3)).update(habits_completed=6, fish_coins_earned=40)
+        self.log(self.run, date(2025, 3, 11))
+        Progress.objects.filter(week_start=date(2025, 3, 10)).update(habits_completed=3)
+
+        self.assertEqual([change.week_start for change in diff_progress([self.user.pk])], [date(2025, 3, 10)])
+        rebuild_all_progress(workers=1)
+        self.assertEqual(self.week(date(2025, 3, 3)).habits_completed, 6)
+        self.assertEqual(self.week(date(2025, 3, 10)).habits_completed, 1)
+
+    def test_archiving_does_not_change_past_rates(self):
+        self.log(self.water, date(2025, 3, 3))
+        self.log(self.run, date(2025, 3, 10))
+        rebuild_all_progress(workers=1)
+        self.assertEqual(self.week(date(2025, 3, 3)).completion_rate, 0.5)
+
+        # Run was still used after the first week, so it stays in scope there
+        Habit.objects.filter(pk=self.run.pk).update(is_archived=True)
+        self.assertEqual(diff_progress([self.user.pk]), [])
+
+    def test_dry_run_prints_diff_without_writing(self):
+        self.log(self.water, date(2025, 3, 3))
+        Progress.objects.filter(week_start=date(2025, 3, 3)).update(habits_completed=2, fish_coins_earned=10)
+
+        out = StringIO()
+        call_command('rebuild_progress', '--dry-run', '--workers', '1', stdout=out)
+
+        self.assertIn('week 2025-03-03: habits 2 -> 1, coins 10 -> 5', out.getvalue())
+        self.assertIn('1 weeks would be updated', out.getvalue())
+        self.assertEqual(self.week(date(2025, 3, 3)).habits_completed, 2)
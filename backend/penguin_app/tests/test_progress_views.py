@@ -1,15 +1,20 @@
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.utils import timezone
+from datetime import date, timedelta
 
+from penguin_app.models.habit_models import Habit
 from penguin_app.models.user_models import User, UserGameProfile
-from penguin_app.models.progress_models import Progress
+from penguin_app.models.progress_models import Progress, MonthlyProgress
+from penguin_app.utils.habits import complete_habit, week_start_for
 
 
 class ProgressViewTests(APITestCase):
 
     def setUp(self):
+        cache.clear()
         # Create user
         self.user = User.objects.create_user(
             email="test@example.com",
@@ -40,21 +45,22 @@ class ProgressViewTests(APITestCase):
 
     # Weekly Progress Tests
     def test_weekly_progress_view(self):
-        url = reverse("weekly-progress")
+        url = reverse("penguin_app:weekly-progress")
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        results = response.data["results"]
+        self.assertEqual(len(results), 2)
 
         # Ensure ordering: most recent first
         self.assertGreaterEqual(
-            response.data[0]["week_start"],
-            response.data[1]["week_start"]
+            results[0]["week_start"],
+            results[1]["week_start"]
         )
 
     # Monthly Progress Tests
     def test_monthly_progress_view(self):
-        url = reverse("monthly-progress")
+        url = reverse("penguin_app:monthly-progress")
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -66,7 +72,7 @@ class ProgressViewTests(APITestCase):
 
     # All-Time Progress Tests
     def test_all_time_progress_view(self):
-        url = reverse("all-time-progress")
+        url = reverse("penguin_app:all-time-progress")
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -74,3 +80,152 @@ class ProgressViewTests(APITestCase):
         self.assertEqual(response.data["total_habits"], 8)
         self.assertEqual(response.data["total_todos"], 6)
         self.assertEqual(response.data["total_fish_coins"], 17)
+
+
+class ProgressRollupTests(APITestCase):
+    """Monthly and all-time totals are maintained as weekly rows change."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="rollup@example.com",
+            username="rollup",
+            password="password123"
+        )
+        self.profile = UserGameProfile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def totals(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["total_habits"], response.data["total_todos"], response.data["total_fish_coins"]
+
+    def test_past_month_is_a_single_row_read(self):
+        Progress.objects.create(profile=self.profile, week_start=date(2024, 3, 4),
+                                habits_completed=4, todos_completed=1, fish_coins_earned=20)
+        Progress.objects.create(profile=self.profile, week_start=date(2024, 3, 25),
+                                habits_completed=2, todos_completed=0, fish_coins_earned=10)
+        Progress.objects.create(profile=self.profile, week_start=date(2024, 4, 1),
+                                habits_completed=1, todos_completed=1, fish_coins_earned=5)
+
+        url = reverse("penguin_app:monthly-progress")
+        self.client.get(url)  # load request.user.profile
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"month": "2024-03"})
+        self.assertEqual(response.data["month_start"], date(2024, 3, 1))
+        self.assertEqual(response.data["month_end"], date(2024, 3, 31))
+        self.assertEqual(self.totals(url + "?month=2024-03"), (6, 1, 30))
+        self.assertEqual(self.totals(url + "?month=2024-04"), (1, 1, 5))
+        self.assertEqual(self.totals(url + "?month=2023-01"), (0, 0, 0))
+        self.assertEqual(self.totals(reverse("penguin_app:all-time-progress")), (7, 2, 35))
+
+    def test_bad_month_is_rejected(self):
+        response = self.client.get(reverse("penguin_app:monthly-progress"), {"month": "March"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_updates_moves_and_deletes_are_rolled_up(self):
+        progress = Progress.objects.create(profile=self.profile, week_start=date(2024, 3, 25),
+                                           habits_completed=3, fish_coins_earned=15)
+        progress.habits_completed = 5
+        progress.week_start = date(2024, 4, 1)
+        progress.save()
+
+        months = dict(MonthlyProgress.objects.values_list("month", "habits_completed"))
+        self.assertEqual(months, {date(2024, 3, 1): 0, date(2024, 4, 1): 5})
+
+        progress.delete()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.all_time_habits_completed, 0)
+        self.assertEqual(self.profile.all_time_fish_coins_earned, 0)
+
+    def test_habit_completion_updates_rollups(self):
+        habit = Habit.objects.create(user=self.user, name="Stretch", reward=5)
+        complete_habit(self.user, habit.pk)
+
+        today = timezone.now().date()
+        month = MonthlyProgress.objects.get(profile=self.profile)
+        self.assertEqual(month.month, week_start_for(today).replace(day=1))
+        self.assertEqual((month.habits_completed, month.fish_coins_earned), (1, 5))
+        self.assertEqual(self.totals(reverse("penguin_app:all-time-progress")), (1, 0, 5))
+
+        # completing again the same day changes nothing
+        complete_habit(self.user, habit.pk)
+        self.assertEqual(self.totals(reverse("penguin_app:all-time-progress")), (1, 0, 5))
+
+
+class ProgressSeriesTests(APITestCase):
+    """GET /api/progress/series/ buckets in the database and zero-fills."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="series@example.com",
+            username="series",
+            password="password123"
+        )
+        self.profile = UserGameProfile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("penguin_app:progress-series")
+
+        for week_start, habits, todos in [(date(2024, 3, 4), 4, 1), (date(2024, 3, 25), 2, 0),
+                                          (date(2024, 4, 1), 1, 3)]:
+            Progress.objects.create(profile=self.profile, week_start=week_start,
+                                    habits_completed=habits, todos_completed=todos,
+                                    fish_coins_earned=habits * 5)
+
+    def series(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(point["start"], point["value"]) for point in response.data["points"]]
+
+    def test_weekly_buckets_are_zero_filled(self):
+        points = self.series(**{"from": "2024-03-06", "to": "2024-04-07", "granularity": "week"})
+        self.assertEqual(points, [
+            (date(2024, 3, 4), 4), (date(2024, 3, 11), 0), (date(2024, 3, 18), 0),
+            (date(2024, 3, 25), 2), (date(2024, 4, 1), 1),
+        ])
+
+    def test_monthly_buckets_group_weeks_by_start(self):
+        points = self.series(**{"from": "2024-02-01", "to": "2024-04-30",
+                                "granularity": "month", "metric": "todos_completed"})
+        self.assertEqual(points, [(date(2024, 2, 1), 0), (date(2024, 3, 1), 1), (date(2024, 4, 1), 3)])
+
+    def test_daily_buckets_come_from_the_completion_log(self):
+        habit = Habit.objects.create(user=self.user, name="Read", reward=5)
+        today = timezone.now().date()
+        complete_habit(self.user, habit.pk)
+
+        points = self.series(**{"from": str(today - timedelta(days=2)), "to": str(today),
+                                "granularity": "day", "metric": "fish_coins_earned"})
+        self.assertEqual([value for _, value in points], [0, 0, 5])
+
+    def test_completion_invalidates_the_cached_series(self):
+        today = timezone.now().date()
+        params = {"from": str(today), "to": str(today), "granularity": "day"}
+        self.assertEqual(self.series(**params), [(today, 0)])
+        with self.assertNumQueries(0):
+            self.client.get(self.url, params)
+
+        habit = Habit.objects.create(user=self.user, name="Run", reward=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            complete_habit(self.user, habit.pk)
+        self.assertEqual(self.series(**params), [(today, 1)])
+
+    def test_bad_params_are_rejected(self):
+        for params in [{"granularity": "hour"}, {"metric": "streak"}, {"from": "2024-13-01"},
+                       {"granularity": "day", "metric": "todos_completed"},
+                       {"from": "2024-05-01", "to": "2024-04-01"},
+                       {"from": "2000-01-01", "to": "2024-01-01", "granularity": "day"}]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_ranges_at_the_ends_of_the_calendar(self):
+        for params, buckets in [
+            ({"from": "9999-12-01", "to": "9999-12-31", "granularity": "day"}, 31),
+            ({"granularity": "month", "to": "9999-12-31"}, 12),
+            ({"to": "0001-01-01"}, 1),
+            ({"from": "0001-01-01", "to": "0001-01-02", "granularity": "week"}, 1),
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, params)
+            self.assertEqual(len(response.data["points"]), buckets, params)
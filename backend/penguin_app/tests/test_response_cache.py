@@ -0,0 +1,91 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models.progress_models import Progress
+from ..models.user_models import UserGameProfile
+from ..utils.response_cache import bump_data_version, cache_stats, data_version, reset_cache_stats
+
+User = get_user_model()
+
+"""
+Unit tests for the per-user response cache (utils/response_cache.py).
+"""
+
+
+class ResponseCacheTests(TestCase):
+    """Cached progress and profile responses, invalidation and hit stats."""
+
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='polling@example.com',
+            username='poller',
+            password='TestPass123!'
+        )
+        self.profile = UserGameProfile.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def all_time_habits(self):
+        return self.client.get('/api/progress/all-time/').data['total_habits']
+
+    def test_progress_change_invalidates_after_commit(self):
+        self.assertEqual(self.all_time_habits(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Progress.objects.create(profile=self.profile, week_start=date(2025, 3, 3), habits_completed=4)
+        self.assertEqual(self.all_time_habits(), 4)
+        self.assertEqual(cache_stats()['all-time-progress'], {'hits': 0, 'misses': 2, 'hit_rate': 0.0})
+
+    def test_hits_are_cached_per_user_and_query(self):
+        self.client.get('/api/progress/weekly/')
+        self.client.get('/api/progress/weekly/')
+        self.client.get('/api/progress/monthly/', {'month': '2025-03'})
+        Progress.objects.create(profile=self.profile, week_start=date(2025, 3, 3), habits_completed=4)
+
+        # on_commit never ran: the cached (stale) response is still served
+        response = self.client.get('/api/progress/monthly/', {'month': '2025-03'})
+        self.assertEqual(response.data['total_habits'], 0)
+        self.assertEqual(cache_stats()['weekly-progress']['hits'], 1)
+
+        bump_data_version(self.profile.pk)
+        response = self.client.get('/api/progress/monthly/', {'month': '2025-03'})
+        self.assertEqual(response.data['total_habits'], 4)
+
+    def test_bumps_never_reuse_a_version(self):
+        seen = {data_version(self.profile.pk)}
+        for _ in range(3):
+            bump_data_version(self.profile.pk)
+            seen.add(data_version(self.profile.pk))
+        cache.clear()  # a lost version comes back as a new one too
+        seen.add(data_version(self.profile.pk))
+        self.assertEqual(len(seen), 5)
+
+    def test_profile_writes_invalidate(self):
+        self.assertEqual(self.all_time_habits(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.all_time_habits_completed = 3
+            self.profile.save()
+        self.assertEqual(self.all_time_habits(), 3)
+
+    def test_errors_are_not_cached(self):
+        response = self.client.get('/api/progress/monthly/', {'month': 'soon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/progress/monthly/', {'month': 'soon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stats_are_staff_only(self):
+        self.client.get('/api/progress/all-time/')
+        self.client.get('/api/progress/all-time/')
+        self.assertEqual(self.client.get('/api/monitoring/cache/').status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/monitoring/cache/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['all-time-progress'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models.habit_models import Habit, HabitCompletion
+from ..models.user_models import UserGameProfile
+from ..utils.habits import complete_habit
+from ..utils.streaks import recompute_streaks, streak_lengths
+
+User = get_user_model()
+
+"""
+Unit tests for the batch streak engine in utils/streaks.py.
+"""
+
+
+class StreakLengthTests(TestCase):
+    """Tests for the run-length helper."""
+
+    def setUp(self):
+        self.today = date(2025, 12, 10)
+
+    def days(self, *offsets):
+        return [self.today - timedelta(days=offset) for offset in sorted(offsets, reverse=True)]
+
+    def test_empty_history(self):
+        self.assertEqual(streak_lengths([], self.today), (0, 0))
+
+    def test_current_run_ending_today(self):
+        self.assertEqual(streak_lengths(self.days(0, 1, 2, 5, 6), self.today), (3, 3))
+
+    def test_run_ending_yesterday_is_still_current(self):
+        self.assertEqual(streak_lengths(self.days(1, 2), self.today), (2, 2))
+
+    def test_broken_streak_keeps_best(self):
+        self.assertEqual(streak_lengths(self.days(3, 4, 5, 6, 9), self.today), (0, 4))
+
+
+class RecomputeStreaksTests(TestCase):
+    """Tests for recompute_streaks and the recompute_streaks command."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='streaks@example.com',
+            username='streaker',
+            password='TestPass123!'
+        )
+        self.profile = UserGameProfile.objects.create(user=self.user)
+        self.today = date.today()
+        self.water = Habit.objects.create(user=self.user, name='Water', streak=9)
+        self.run = Habit.objects.create(user=self.user, name='Run', streak=1)
+
+    def log(self, habit, *offsets):
+        for offset in offsets:
+            HabitCompletion.objects.create(
+                habit=habit, user=self.user, day=self.today - timedelta(days=offset),
+                count=1, completed=True,
+            )
+
+    def test_backfilled_day_repairs_streaks(self):
+        self.log(self.water, 0, 1, 3, 4, 5, 6)
+        self.log(self.run, 2)
+
+        recompute_streaks([self.user.pk])
+
+        self.water.refresh_from_db()
+        self.run.refresh_from_db()
+        self.profile.refresh_from_db()
+        self.assertEqual((self.water.streak, self.water.best_streak), (2, 4))
+        self.assertEqual(self.run.streak, 0)
+        # Run fills day 2, so the user completed something on days 0..6
+        self.assertEqual(self.profile.streak_days, 7)
+
+    def test_command_reports_chunks(self):
+        self.log(self.water, 0, 1)
+        out = StringIO()
+        call_command('recompute_streaks', '--chunk-size', '1', stdout=out)
+        self.assertIn('chunk 1', out.getvalue())
+        self.assertIn('Processed 1 users', out.getvalue())
+
+    def test_completion_pipeline_maintains_profile_streak(self):
+        self.log(self.run, 1)
+        self.profile.streak_days = 1
+        self.profile.save()
+
+        complete_habit(self.user, self.water.pk)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.streak_days, 2)
+
+        # A second habit on the same day doesn't count twice
+        Habit.objects.filter(pk=self.run.pk).update(today_count=0)
+        complete_habit(self.user, self.run.pk)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.streak_days, 2)
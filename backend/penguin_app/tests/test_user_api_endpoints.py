@@ -13,12 +13,25 @@ Tests all authentication endpoints:
 Author: Astra
 """
 
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
-from django.contrib.auth import get_user_model
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.signals import user_login_failed
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from ..models.habit_models import Habit
 from ..models.user_models import UserGameProfile
+from ..models.token_models import RevokedToken
+from ..serializers.user_serializers import LOCKOUT_DURATION, MAX_FAILED_LOGINS
+from ..utils import revocation
+from ..utils.habits import complete_habit
+from ..utils.revocation import revoked_tokens
 
 User = get_user_model()
 
@@ -105,6 +118,31 @@ class UserRegistrationAPITests(TestCase):
         user = User.objects.get(email='testuser@example.com')
         self.assertEqual(user.email, 'testuser@example.com')
 
+    
+    def test_register_writes_without_prechecks(self):
+        """Test registration is one INSERT per row and no lookups."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.valid_data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertNotIn('SELECT', statements)
+        self.assertNotIn('UPDATE', statements)
+        self.assertEqual(statements.count('INSERT'), 3)  # user, profile, outbox email
+        user = User.objects.get(email='newuser@example.com')
+        self.assertIsNotNone(user.verification_token_expires)
+    
+    def test_register_duplicate_username_any_case(self):
+        """Test a taken username is reported cleanly, whatever its case."""
+        User.objects.create_user(email='first@example.com', username='takenname', password='Pass123!')
+        data = self.valid_data.copy()
+        data['username'] = 'TakenName'
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'username': ['A user with this username already exists.']})
+        self.assertEqual(User.objects.count(), 1)
+        self.assertFalse(UserGameProfile.objects.exists())
 
 class UserLoginAPITests(TestCase):
     """Tests for POST /api/auth/token/ (user login endpoint)."""
@@ -185,6 +223,86 @@ class UserLoginAPITests(TestCase):
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    
+    def test_login_hashes_password_once(self):
+        """Test a login fetches the user once and checks the password once."""
+        data = {'email': 'testuser@example.com', 'password': 'TestPass123!'}
+        with mock.patch.object(User, 'check_password', autospec=True,
+                               side_effect=User.check_password) as check_password:
+            with self.assertNumQueries(1):
+                response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(check_password.call_count, 1)
+    
+    def test_login_locks_after_repeated_failures(self):
+        """Test the account locks after too many wrong passwords, without hashing."""
+        wrong = {'email': 'testuser@example.com', 'password': 'WrongPass123!'}
+        for _ in range(MAX_FAILED_LOGINS):
+            self.client.post(self.url, wrong, format='json')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, MAX_FAILED_LOGINS)
+        self.assertGreater(self.user.locked_until, timezone.now())
+        
+        right = {'email': 'testuser@example.com', 'password': 'TestPass123!'}
+        with mock.patch.object(User, 'check_password') as check_password:
+            response = self.client.post(self.url, right, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('Too many failed login attempts', response.data['detail'])
+        check_password.assert_not_called()
+    
+    def test_successful_login_resets_failures(self):
+        """Test a correct password after an expired lock clears the counters."""
+        User.objects.filter(pk=self.user.pk).update(
+            failed_login_attempts=MAX_FAILED_LOGINS,
+            locked_until=timezone.now() - LOCKOUT_DURATION,
+        )
+        data = {'email': 'testuser@example.com', 'password': 'TestPass123!'}
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 0)
+        self.assertIsNone(self.user.locked_until)
+    
+    def test_wrong_password_after_expired_lock_starts_the_count_again(self):
+        """Test one wrong password after an expired lock doesn't lock the account again."""
+        User.objects.filter(pk=self.user.pk).update(
+            failed_login_attempts=MAX_FAILED_LOGINS,
+            locked_until=timezone.now() - LOCKOUT_DURATION,
+        )
+        wrong = {'email': 'testuser@example.com', 'password': 'WrongPass123!'}
+        response = self.client.post(self.url, wrong, format='json')
+        
+        self.assertIn('Incorrect password', response.data['detail'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 1)
+        self.assertIsNone(self.user.locked_until)
+    
+    def test_failed_login_sends_signal(self):
+        """Test wrong passwords and unknown emails send user_login_failed."""
+        received = []
+        def receiver(sender, credentials, **kwargs):
+            received.append(credentials)
+        user_login_failed.connect(receiver)
+        self.addCleanup(user_login_failed.disconnect, receiver)
+        
+        self.client.post(self.url, {'email': 'testuser@example.com', 'password': 'WrongPass123!'}, format='json')
+        self.client.post(self.url, {'email': 'nobody@example.com', 'password': 'WrongPass123!'}, format='json')
+        
+        self.assertEqual(received, [{'email': 'testuser@example.com'}, {'email': 'nobody@example.com'}])
+    
+    def test_login_uses_configured_backends(self):
+        """Test a non-default AUTHENTICATION_BACKENDS checks the password through authenticate()."""
+        backends = ['django.contrib.auth.backends.ModelBackend', 'django.contrib.auth.backends.RemoteUserBackend']
+        data = {'email': 'testuser@example.com', 'password': 'TestPass123!'}
+        with self.settings(AUTHENTICATION_BACKENDS=backends), \
+                mock.patch('penguin_app.serializers.user_serializers.authenticate',
+                           side_effect=authenticate) as authenticate_mock:
+            response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        authenticate_mock.assert_called_once()
 
 class CurrentUserAPITests(TestCase):
     """Tests for GET /api/users/me/ (get current user endpoint)."""
@@ -379,6 +497,86 @@ class LogoutAPITests(TestCase):
         # But let's check what happens
         self.assertIn(response.status_code, [status.HTTP_200_OK, status.HTTP_401_UNAUTHORIZED])
 
+    
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        """Test neither token works after logout."""
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.assertEqual(self.client.get('/api/users/me/').status_code, status.HTTP_200_OK)
+        
+        response = self.client.post(self.url, {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(RevokedToken.objects.filter(user=self.user).count(), 2)
+        
+        self.assertEqual(self.client.get('/api/users/me/').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_logout_ignores_other_users_refresh_token(self):
+        """Test a user can't revoke someone else's refresh token."""
+        other = User.objects.create_user(email='other@example.com', username='otheruser', password='TestPass123!')
+        self.client.force_authenticate(user=self.user)
+        
+        self.client.post(self.url, {'refresh': str(RefreshToken.for_user(other))}, format='json')
+        self.assertFalse(RevokedToken.objects.exists())
+
+
+class RevocationListTests(TestCase):
+    """Tests for the in-memory revocation filter (utils/revocation.py)."""
+    
+    def setUp(self):
+        """Start every test with an empty, unloaded filter."""
+        self.user = User.objects.create_user(
+            email='revoke@example.com',
+            username='revokeuser',
+            password='TestPass123!'
+        )
+        revoked_tokens.reset()
+        self.addCleanup(revoked_tokens.reset)
+    
+    def revoke_elsewhere(self, jti):
+        """A revocation made by another worker: only the table knows."""
+        RevokedToken.objects.create(
+            jti=jti, user=self.user, expires_at=timezone.now() + timezone.timedelta(hours=1)
+        )
+    
+    def test_clean_tokens_cost_no_query(self):
+        """Test a loaded filter answers for unrevoked tokens without queries."""
+        self.revoke_elsewhere('revoked-jti')
+        revoked_tokens.is_revoked('warm-up')
+        with self.assertNumQueries(0):
+            for index in range(1000):
+                self.assertFalse(revoked_tokens.is_revoked(f'clean-{index}'))
+        
+        # loaded tokens are only in the Bloom filter: confirmed once, then remembered
+        with self.assertNumQueries(1):
+            self.assertTrue(revoked_tokens.is_revoked('revoked-jti'))
+            self.assertTrue(revoked_tokens.is_revoked('revoked-jti'))
+    
+    def test_revocations_from_other_workers_are_picked_up(self):
+        """Test the incremental refresh reads rows added after loading."""
+        with mock.patch.object(revocation, 'REFRESH_INTERVAL', 0):
+            self.assertFalse(revoked_tokens.is_revoked('late-jti'))
+            self.revoke_elsewhere('late-jti')
+            self.assertTrue(revoked_tokens.is_revoked('late-jti'))
+    
+    def test_bloom_false_positive_is_confirmed_once(self):
+        """Test a Bloom hit that isn't revoked is checked once, then remembered."""
+        revoked_tokens.is_revoked('warm-up')
+        with mock.patch.object(revocation.BloomFilter, '__contains__', return_value=True):
+            with self.assertNumQueries(1):
+                self.assertFalse(revoked_tokens.is_revoked('unlucky-jti'))
+                self.assertFalse(revoked_tokens.is_revoked('unlucky-jti'))
+    
+    def test_expired_rows_are_pruned(self):
+        """Test revoking prunes rows whose tokens have expired anyway."""
+        RevokedToken.objects.create(
+            jti='old-jti', user=self.user, expires_at=timezone.now() - timezone.timedelta(hours=1)
+        )
+        revocation.revoke_tokens([RefreshToken.for_user(self.user)])
+        self.assertFalse(RevokedToken.objects.filter(jti='old-jti').exists())
+        self.assertEqual(RevokedToken.objects.count(), 1)
 
 class TokenRefreshAPITests(TestCase):
     """Tests for POST /api/auth/token/refresh/ (token refresh endpoint)."""
@@ -405,6 +603,22 @@ class TokenRefreshAPITests(TestCase):
         self.assertIn('access', response.data)
         # Should get new access token
         self.assertIsNotNone(response.data['access'])
+        
+        # rotated: the old refresh token can't be used again
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_concurrent_refreshes_use_the_token_once(self):
+        """Test a refresh racing past the revocation check still can't reuse the token."""
+        data = {'refresh': str(RefreshToken.for_user(self.user))}
+        # both requests pass the in-memory check before either revokes the token
+        with mock.patch('penguin_app.serializers.user_serializers.is_revoked', return_value=False):
+            first = self.client.post(self.url, data, format='json')
+            second = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(RevokedToken.objects.count(), 1)
     
     def test_refresh_token_invalid(self):
         """Test refresh fails with invalid token."""
@@ -414,6 +628,70 @@ class TokenRefreshAPITests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class CachedAuthenticationTests(TestCase):
+    """Tests for CachedJWTAuthentication (penguin_app/authentication.py)."""
+    
+    def setUp(self):
+        """Set up a user with a game profile and a bearer token."""
+        cache.clear()
+        # load the revocation filter now and keep it, so it doesn't add to query counts
+        patcher = mock.patch.object(revocation, 'REFRESH_INTERVAL', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        revoked_tokens.reset()
+        revoked_tokens.is_revoked('warm-up')
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='cached@example.com',
+            username='cacheduser',
+            password='TestPass123!'
+        )
+        self.profile = UserGameProfile.objects.create(user=self.user)
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    
+    def test_repeat_requests_skip_user_and_profile_queries(self):
+        """Test a repeat request runs no queries once user and response are cached."""
+        with self.assertNumQueries(2):  # user + profile id in one query, then the view
+            self.client.get('/api/progress/all-time/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/progress/all-time/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_saving_user_invalidates_cache(self):
+        """Test a deactivated user is refused on the next request."""
+        self.client.get('/api/progress/all-time/')
+        self.user.is_active = False
+        self.user.save()
+        
+        response = self.client.get('/api/progress/all-time/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_game_profile_is_read_fresh(self):
+        """Test coins updated outside the ORM save() still show up."""
+        self.client.get('/api/users/me/game-profile/')
+        UserGameProfile.objects.filter(pk=self.profile.pk).update(fish_coins=42)
+        
+        response = self.client.get('/api/users/me/game-profile/')
+        self.assertEqual(response.data['fish_coins'], 42)
+    
+    def test_game_profile_shows_completion_coins(self):
+        """Test coins awarded by a completion (an UPDATE, not save()) show up."""
+        self.client.get('/api/users/me/game-profile/')
+        habit = Habit.objects.create(user=self.user, name='Stretch', reward=42)
+        with self.captureOnCommitCallbacks(execute=True):
+            complete_habit(self.user, habit.pk)
+        
+        response = self.client.get('/api/users/me/game-profile/')
+        self.assertEqual(response.data['fish_coins'], 42)
+    
+    def test_current_user_returns_full_profile(self):
+        """Test /users/me/ isn't limited to the cached auth columns."""
+        User.objects.filter(pk=self.user.pk).update(bio='hello')
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['bio'], 'hello')
+
 class IntegrationTests(TestCase):
     """Integration tests for complete authentication flow."""
     
@@ -1,10 +1,14 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from ..models.journal_entry_model import JournalEntry
+from ..models.journal_entry_model import JournalEntry, JournalTag
 from ..serializers.journal_serializers import JournalEntrySerializer
 from django.utils import timezone
 import time
 from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from ..utils.journal import search_entries
 
 """
 unit tests for journal feature of pocket penguin app
@@ -127,3 +131,239 @@ class JournalEntrySerializerTest(TestCase):
 
         journal_entry.refresh_from_db()
         self.assertGreater(journal_entry.updated_at, original_updated)
+
+
+class JournalSearchTest(TestCase):
+    """Tests for FTS5-backed journal search (utils/journal.py and /journal/search/)."""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create_user(
+            email='searcher@example.com', username='searcher', password='securepassword123'
+        )
+        self.other = User.objects.create_user(
+            email='other@example.com', username='other', password='securepassword123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('penguin_app:journal-search')
+
+    def make_entry(self, user, title, content):
+        return JournalEntry.objects.create(user=user, title=title, content=content, mood='calm')
+
+    def test_title_match_ranks_above_content_match(self):
+        in_content = self.make_entry(self.user, 'Monday', 'Went swimming at the lake')
+        in_title = self.make_entry(self.user, 'Swimming lesson', 'Cold water today')
+
+        hits = search_entries(self.user, 'swimming')
+
+        self.assertEqual([entry.pk for entry, _ in hits], [in_title.pk, in_content.pk])
+
+    def test_stemming_prefix_and_snippet(self):
+        self.make_entry(self.user, 'Walk', 'The penguins were running along the shore')
+
+        hits = search_entries(self.user, 'run peng')
+
+        self.assertEqual(len(hits), 1)
+        self.assertIn('[penguins]', hits[0][1])
+
+    def test_search_is_scoped_to_user(self):
+        self.make_entry(self.other, 'Secret', 'hidden treasure')
+
+        self.assertEqual(search_entries(self.user, 'treasure'), [])
+
+    def test_operators_in_query_are_plain_text(self):
+        self.make_entry(self.user, 'Notes', 'title NOT content OR "quoted"')
+
+        hits = search_entries(self.user, 'NOT content" OR (title')
+
+        self.assertEqual(len(hits), 1)
+
+    def test_index_follows_update_and_delete(self):
+        entry = self.make_entry(self.user, 'Draft', 'pancakes for breakfast')
+        entry.content = 'waffles for breakfast'
+        entry.save()
+
+        self.assertEqual(search_entries(self.user, 'pancakes'), [])
+        self.assertEqual(len(search_entries(self.user, 'waffles')), 1)
+
+        entry.delete()
+        self.assertEqual(search_entries(self.user, 'waffles'), [])
+
+    def test_search_endpoint(self):
+        self.make_entry(self.user, 'Garden', 'Planted tulips')
+
+        response = self.client.get(self.url, {'q': 'tulips'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['title'], 'Garden')
+        self.assertIn('snippet', response.data['results'][0])
+
+    def test_search_endpoint_requires_query(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_command(self):
+        self.make_entry(self.user, 'Garden', 'Planted tulips')
+        out = StringIO()
+
+        call_command('rebuild_journal_search', stdout=out)
+
+        self.assertIn('Indexed 1 journal entries', out.getvalue())
+        self.assertEqual(len(search_entries(self.user, 'tulips')), 1)
+
+
+class JournalTagIndexTest(TestCase):
+    """Tests for the normalized tag index, ?tag=/?mood= filters and tag autocomplete."""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create_user(
+            email='tagger@example.com', username='tagger', password='securepassword123'
+        )
+        self.other = User.objects.create_user(
+            email='other@example.com', username='other', password='securepassword123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def make_entry(self, user, tags, mood='calm'):
+        return JournalEntry.objects.create(user=user, title='t', content='c', mood=mood, tags=tags)
+
+    def test_tags_are_normalized_and_synced(self):
+        entry = self.make_entry(self.user, ['Work', ' work ', 'Gym'])
+        self.assertEqual(
+            sorted(JournalTag.objects.filter(entry=entry).values_list('name', flat=True)),
+            ['gym', 'work'],
+        )
+
+        entry.tags = ['gym', 'reading']
+        entry.save()
+        self.assertEqual(
+            sorted(JournalTag.objects.filter(entry=entry).values_list('name', flat=True)),
+            ['gym', 'reading'],
+        )
+
+        entry.delete()
+        self.assertFalse(JournalTag.objects.exists())
+
+    def test_bulk_writes_keep_tags_synced(self):
+        def names(entry):
+            return sorted(JournalTag.objects.filter(entry=entry).values_list('name', flat=True))
+
+        first, second = JournalEntry.objects.bulk_create([
+            JournalEntry(user=self.user, title='t', content='c', mood='calm', tags=['Work']),
+            JournalEntry(user=self.user, title='t', content='c', mood='calm', tags=['gym']),
+        ])
+        self.assertEqual((names(first), names(second)), (['work'], ['gym']))
+
+        JournalEntry.objects.filter(pk=first.pk).update(tags=['Reading'])
+        self.assertEqual(names(first), ['reading'])
+
+        second.tags = ['gym', 'Swim']
+        JournalEntry.objects.bulk_update([second], ['tags'])
+        self.assertEqual(names(second), ['gym', 'swim'])
+
+    def test_filter_by_tag_and_mood(self):
+        work = self.make_entry(self.user, ['work'], mood='tired')
+        both = self.make_entry(self.user, ['work', 'gym'], mood='happy')
+        self.make_entry(self.other, ['work'])
+        url = reverse('penguin_app:journal-list-create')
+
+        response = self.client.get(url, {'tag': 'Work'})
+        self.assertEqual({row['id'] for row in response.data['results']}, {str(work.id), str(both.id)})
+
+        response = self.client.get(url + '?tag=work&tag=gym')
+        self.assertEqual([row['id'] for row in response.data['results']], [str(both.id)])
+
+        response = self.client.get(url, {'mood': 'tired'})
+        self.assertEqual([row['id'] for row in response.data['results']], [str(work.id)])
+
+    def test_tag_autocomplete_counts(self):
+        self.make_entry(self.user, ['work', 'walking'])
+        self.make_entry(self.user, ['work'])
+        self.make_entry(self.user, ['reading'])
+        self.make_entry(self.other, ['walking', 'wine'])
+
+        response = self.client.get(reverse('penguin_app:journal-tags'), {'q': 'W'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {'name': 'work', 'count': 2},
+            {'name': 'walking', 'count': 1},
+        ])
+
+
+class JournalBulkCreateTest(TestCase):
+    """Tests for POST /api/journal/bulk/ offline-sync uploads."""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create_user(
+            email='offline@example.com', username='offline', password='securepassword123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('penguin_app:journal-bulk-create')
+
+    def entry(self, client_id, **extra):
+        return {'client_id': client_id, 'title': f'Entry {client_id}', 'content': 'c',
+                'mood': 'calm', **extra}
+
+    def test_bulk_create_in_few_queries(self):
+        items = [self.entry(f'c{i}', tags=['Trip']) for i in range(50)]
+
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 50)
+        self.assertEqual(JournalEntry.objects.filter(user=self.user).count(), 50)
+        self.assertEqual(JournalTag.objects.filter(user=self.user, name='trip').count(), 50)
+
+    def test_retry_is_deduplicated(self):
+        first = self.client.post(self.url, [self.entry('a'), self.entry('b')], format='json')
+        retry = self.client.post(self.url, [self.entry('b'), self.entry('c'), self.entry('c')], format='json')
+
+        self.assertEqual(
+            [row['status'] for row in retry.data['results']], ['duplicate', 'created', 'duplicate']
+        )
+        self.assertEqual(retry.data['results'][0]['id'], first.data['results'][1]['id'])
+        self.assertEqual(retry.data['results'][1]['id'], retry.data['results'][2]['id'])
+        self.assertEqual(JournalEntry.objects.filter(user=self.user).count(), 3)
+
+    def test_blank_client_ids_are_not_deduplicated(self):
+        response = self.client.post(self.url, [self.entry(''), self.entry(''), self.entry(None)], format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 3)
+        self.assertFalse(JournalEntry.objects.filter(user=self.user, client_id='').exists())
+
+    def test_single_entry_client_id_is_unique_and_write_once(self):
+        self.client.post(self.url, [self.entry('a')], format='json')
+        list_url = reverse('penguin_app:journal-list-create')
+
+        response = self.client.post(list_url, self.entry('a'), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('client_id', response.data)
+
+        entry = self.client.post(list_url, self.entry('b'), format='json').data
+        detail_url = reverse('penguin_app:journal-detail', args=[entry['id']])
+        for client_id in ('a', 'c'):
+            response = self.client.patch(detail_url, {'client_id': client_id}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('client_id', response.data)
+        self.assertEqual(JournalEntry.objects.get(pk=entry['id']).client_id, 'b')
+
+    def test_invalid_items_are_reported_individually(self):
+        response = self.client.post(self.url, [self.entry('ok'), {'client_id': 'bad'}], format='json')
+
+        self.assertEqual(response.data['results'][0]['status'], 'created')
+        self.assertEqual(response.data['results'][1]['status'], 'invalid')
+        self.assertIn('title', response.data['results'][1]['errors'])
+        self.assertEqual(JournalEntry.objects.filter(user=self.user).count(), 1)
+
+    def test_rejects_non_list_body(self):
+        response = self.client.post(self.url, self.entry('x'), format='json')
+        self.assertEqual(response.status_code, 400)
@@ -10,10 +10,17 @@ Author: Astra
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views.user_views import RegisterView, LoginView, CurrentUserView, CurrentUserGameProfile, LogOutView
-from .views.journal_views import JournalEntryListCreateView, JournalEntryDetailView
-from penguin_app.views.progress_views import WeeklyProgressView, MonthlyProgressView, AllTimeProgressView
-from .views.calendar_views import CalendarEventListCreate, CalendarEventRetrieveUpdateDestroy
-from .views.habits_views import HabitListCreateView, HabitDetailView, HabitCompleteView
+from .views.journal_views import JournalEntryListCreateView, JournalEntryDetailView, JournalSearchView, JournalTagListView, JournalEntryBulkCreateView
+from penguin_app.views.progress_views import WeeklyProgressView, MonthlyProgressView, AllTimeProgressView, ProgressSeriesView
+from .views.calendar_views import (
+    CalendarEventListCreate, CalendarEventRetrieveUpdateDestroy, CalendarOccurrenceList,
+    CalendarEventExceptionListCreate, CalendarEventExceptionRetrieveUpdateDestroy,
+    CalendarFreeBusy, CalendarExportIcs, CalendarImportIcs,
+)
+from .views.habits_views import HabitListCreateView, HabitDetailView, HabitCompleteView, HabitChangesView, HabitPlanView
+from .views.export_views import ExportView
+from .views.leaderboard_views import LeaderboardView, FriendsLeaderboardView
+from .views.monitoring_views import CacheStatsView
 
 app_name = 'penguin_app'
 
@@ -30,20 +37,42 @@ urlpatterns = [
     
     # Journal feature
     path('journal/', JournalEntryListCreateView.as_view(), name='journal-list-create'),
+    path('journal/bulk/', JournalEntryBulkCreateView.as_view(), name='journal-bulk-create'),
+    path('journal/tags/', JournalTagListView.as_view(), name='journal-tags'),
+    path('journal/search/', JournalSearchView.as_view(), name='journal-search'),
     path('journal/<uuid:pk>/', JournalEntryDetailView.as_view(), name='journal-detail'),
     
     # Progress and stats
     path("progress/weekly/", WeeklyProgressView.as_view(), name="weekly-progress"),
     path("progress/monthly/", MonthlyProgressView.as_view(), name="monthly-progress"),
     path("progress/all-time/", AllTimeProgressView.as_view(), name="all-time-progress"),
+    path("progress/series/", ProgressSeriesView.as_view(), name="progress-series"),
    
     # Calendar Events
     path('calendar/events/', CalendarEventListCreate.as_view(), name='calendar-list-create'),
     path('calendar/events/<uuid:pk>/', CalendarEventRetrieveUpdateDestroy.as_view(), name='calendar-detail'),
+    path('calendar/events/<uuid:pk>/exceptions/', CalendarEventExceptionListCreate.as_view(), name='calendar-exceptions'),
+    path('calendar/events/<uuid:pk>/exceptions/<int:exception_pk>/', CalendarEventExceptionRetrieveUpdateDestroy.as_view(), name='calendar-exception-detail'),
+    path('calendar/occurrences/', CalendarOccurrenceList.as_view(), name='calendar-occurrences'),
+    path('calendar/freebusy/', CalendarFreeBusy.as_view(), name='calendar-freebusy'),
+    path('calendar/export.ics', CalendarExportIcs.as_view(), name='calendar-export-ics'),
+    path('calendar/import/', CalendarImportIcs.as_view(), name='calendar-import-ics'),
     
     # Habit Tracker
     path('habits/', HabitListCreateView.as_view(), name='habit-list-create'),
+    path('habits/changes/', HabitChangesView.as_view(), name='habit-changes'),
+    path('habits/plan/', HabitPlanView.as_view(), name='habit-plan'),
     path('habits/<uuid:pk>/', HabitDetailView.as_view(), name='habit-detail'),
     path('habits/<uuid:pk>/complete/', HabitCompleteView.as_view(), name='habit-complete'),
 
+    # Data export
+    path('export/', ExportView.as_view(), name='export'),
+
+    # Leaderboards
+    path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/friends/', FriendsLeaderboardView.as_view(), name='leaderboard-friends'),
+
+    # Monitoring
+    path('monitoring/cache/', CacheStatsView.as_view(), name='monitoring-cache'),
+
 ]
\ No newline at end of file
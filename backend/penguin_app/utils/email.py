@@ -2,36 +2,60 @@
 Email utility functions for Pocket Penguin.
 
 Handles sending verification emails and other email communications.
-Uses SendGrid for production, console backend for development.
+Emails are not sent during the request: queue_email() writes them to the
+outbox table (models/email_models.py), in the caller's transaction, and
+`manage.py run_email_worker` sends them with send_due_emails(). Failed
+sends are retried with exponential backoff (RETRY_BASE * 2^attempts, at
+most RETRY_MAX) and given up after MAX_ATTEMPTS.
 
 Author: Astra
 """
 
-from django.core.mail import send_mail
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
 import logging
 
+from ..models.email_models import OutboxEmail
+
 logger = logging.getLogger(__name__)
 
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 8
+RETRY_BASE = timedelta(minutes=1)
+RETRY_MAX = timedelta(hours=6)
+# how long a worker holds claimed emails; a crashed worker's batch is retried after this
+LEASE = timedelta(minutes=10)
+
 
-def send_verification_email(user):
+def queue_email(to_email, subject, body, html_body=""):
+    """Add an email to the outbox. Call it inside the transaction that needs it."""
+    return OutboxEmail.objects.create(
+        to_email=to_email, subject=subject, body=body, html_body=html_body,
+    )
+
+
+def queue_verification_email(user):
     """
-    Send email verification link to user after registration.
+    Queue the email verification link for a user who just registered.
     
     This function:
     - Generates a secure, one-time-use token (valid for 24 hours)
     - Encodes the user ID safely for URL inclusion
     - Constructs verification link with frontend URL
-    - Sends HTML-friendly email with clear call-to-action
+    - Queues HTML-friendly email with clear call-to-action
     
     Args:
         user: The User instance that just registered
         
-    Raises:
-        Exception: If email sending fails (caught by caller)
+    Returns:
+        The OutboxEmail row; the worker sends it.
         
     """
     
@@ -102,20 +126,88 @@ Pocket Penguin Team
     </html>
     """
     
+    return queue_email(user.email, subject, plain_message, html_message)
+
+
+def retry_delay(attempts):
+    """Wait before the next try after `attempts` failed sends."""
+    return min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+
+
+def claim_due_emails(batch_size=BATCH_SIZE):
+    """
+    Take up to `batch_size` due emails for this worker by pushing their
+    send_after forward by LEASE. On PostgreSQL, concurrent workers skip each
+    other's rows; on SQLite run a single worker.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxEmail.objects
+            .filter(status=OutboxEmail.STATUS_PENDING, send_after__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by("send_after", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if ids:
+            OutboxEmail.objects.filter(pk__in=ids).update(send_after=now + LEASE)
+    return list(OutboxEmail.objects.filter(pk__in=ids).order_by("send_after", "id"))
+
+
+def send_due_emails(batch_size=BATCH_SIZE, connection=None):
+    """
+    Send one batch of due outbox emails. Returns (sent, failed); (0, 0)
+    means nothing was due.
+
+    Pass an email backend `connection` to reuse it across batches (the
+    caller closes it); otherwise one is opened and closed for this batch.
+    """
+    emails = claim_due_emails(batch_size)
+    if not emails:
+        return 0, 0
+
+    own_connection = connection is None
+    if own_connection:
+        connection = get_connection(fail_silently=False)
+    sent = failed = 0
     try:
-        # Send email with both plain text and HTML versions
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            html_message=html_message,
-            fail_silently=False,
+        for email in emails:
+            message = EmailMultiAlternatives(
+                email.subject, email.body, settings.DEFAULT_FROM_EMAIL, [email.to_email],
+                connection=connection,
+            )
+            if email.html_body:
+                message.attach_alternative(email.html_body, "text/html")
+            try:
+                # opens the connection if it isn't open yet
+                message.send()
+            except Exception as e:
+                logger.error(f"Failed to send email {email.pk} to {email.to_email}: {e}")
+                _record_failure(email, e)
+                failed += 1
+                # the connection may be broken; the next send reconnects
+                connection.close()
+            else:
+                email.status = OutboxEmail.STATUS_SENT
+                email.sent_at = timezone.now()
+                email.attempts += 1
+                email.last_error = ""
+                sent += 1
+    finally:
+        if own_connection:
+            connection.close()
+        # unsent emails of an interrupted batch keep their lease and are retried after it
+        OutboxEmail.objects.bulk_update(
+            emails, ["status", "attempts", "last_error", "send_after", "sent_at"]
         )
-        logger.info(f"Verification email sent to {user.email}")
-        
-    except Exception as e:
-        # Log the error for debugging/monitoring
-        logger.error(f"Failed to send verification email to {user.email}: {str(e)}")
-        # Re-raise so caller knows to handle it
-        raise
+    logger.info(f"Email batch: {sent} sent, {failed} failed")
+    return sent, failed
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)[:1000]
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutboxEmail.STATUS_FAILED
+    else:
+        email.send_after = timezone.now() + retry_delay(email.attempts)
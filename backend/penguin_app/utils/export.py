@@ -0,0 +1,134 @@
+"""
+Streaming data export for Pocket Penguin.
+
+Used by GET /api/export/ and `manage.py export_user_data`. Rows are read with
+values().iterator(chunk_size=...), so at most one chunk of plain dicts is in
+memory at a time, and are yielded as encoded bytes in buffers of roughly
+BUFFER_SIZE. The first row is yielded on its own so the client sees bytes
+straight away.
+
+Formats:
+    ndjson: one JSON object per line, tagged with "type"; any mix of kinds
+    csv:    one kind per file, with a header row
+"""
+
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from ..models.calendar_models import CalendarEvent
+from ..models.habit_models import Habit
+from ..models.journal_entry_model import JournalEntry
+from ..models.progress_models import Progress
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+# kind -> (model, user lookup, exported fields, ordering)
+EXPORTS = {
+    "journal": (
+        JournalEntry, "user",
+        ["id", "title", "content", "mood", "tags", "date", "created_at", "updated_at"],
+        ["date", "id"],
+    ),
+    "habits": (
+        Habit, "user",
+        ["id", "name", "description", "category", "emoji", "color", "icon",
+         "daily_goal", "unit", "today_count", "schedule", "last_completed",
+         "reward", "streak", "best_streak", "week_progress", "is_active",
+         "is_archived", "start_date", "created_at", "updated_at"],
+        ["created_at", "id"],
+    ),
+    "events": (
+        CalendarEvent, "user",
+        ["id", "title", "description", "start_time", "end_time", "recurrence"],
+        ["start_time", "id"],
+    ),
+    "progress": (
+        Progress, "profile__user",
+        ["week_start", "habits_completed", "todos_completed", "completion_rate",
+         "fish_coins_earned", "created_at", "updated_at"],
+        ["week_start"],
+    ),
+}
+
+FORMATS = ("ndjson", "csv")
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_rows(user, kind, chunk_size=CHUNK_SIZE):
+    """Yield the user's rows of one kind as dicts, in a stable order."""
+    model, user_lookup, fields, ordering = EXPORTS[kind]
+    return (
+        model.objects.filter(**{user_lookup: user})
+        .order_by(*ordering)
+        .values(*fields)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def iter_ndjson(user, kinds, chunk_size=CHUNK_SIZE):
+    """Yield NDJSON lines (str) for every row of each kind in `kinds`."""
+    for kind in kinds:
+        for row in export_rows(user, kind, chunk_size):
+            yield json.dumps({"type": kind, **row}, cls=DjangoJSONEncoder) + "\n"
+
+
+def iter_csv(user, kind, chunk_size=CHUNK_SIZE):
+    """Yield CSV lines (str) for one kind, header first."""
+    fields = EXPORTS[kind][2]
+    line = io.StringIO()
+    writer = csv.DictWriter(line, fieldnames=fields)
+
+    def take():
+        value = line.getvalue()
+        line.seek(0)
+        line.truncate()
+        return value
+
+    writer.writeheader()
+    yield take()
+    for row in export_rows(user, kind, chunk_size):
+        writer.writerow({
+            field: json.dumps(value) if isinstance(value, (list, dict)) else value
+            for field, value in row.items()
+        })
+        yield take()
+
+
+def iter_export(user, kinds, fmt="ndjson", chunk_size=CHUNK_SIZE):
+    """
+    Yield the export as UTF-8 byte buffers.
+
+    `kinds` must be a single kind for csv. Raises ValueError for unknown
+    kinds or formats before any row is read.
+    """
+    unknown = [kind for kind in kinds if kind not in EXPORTS]
+    if unknown:
+        raise ValueError(f"Unknown export type: {', '.join(unknown)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "csv" and len(kinds) != 1:
+        raise ValueError("CSV exports take exactly one type.")
+
+    lines = iter_ndjson(user, kinds, chunk_size) if fmt == "ndjson" else iter_csv(user, kinds[0], chunk_size)
+    return buffered(lines)
+
+
+def buffered(lines):
+    """Join str lines into UTF-8 buffers of ~BUFFER_SIZE; the first line goes alone."""
+    buffer = []
+    size = 0
+    first = True
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if first or size >= BUFFER_SIZE:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+            first = False
+    if buffer:
+        yield "".join(buffer).encode()
@@ -0,0 +1,125 @@
+"""
+Free/busy and conflict detection for Pocket Penguin calendars.
+
+Works on occurrences from utils.recurrence.expand_window(), which already
+narrows the events to a window with indexed range queries. Everything here
+is a sort plus one sweep over those occurrences, O(n log n + k) for k
+reported conflicts, instead of comparing every pair of events.
+"""
+
+import heapq
+from datetime import timedelta
+
+from ..models.calendar_models import CalendarEvent
+from .recurrence import expand_window, occurrences, series_end
+
+# how far ahead a new repeating event is checked for conflicts
+CONFLICT_HORIZON = timedelta(days=90)
+
+
+def merge_busy(intervals, window_start=None, window_end=None):
+    """
+    Merge (start, end) intervals into sorted, non-overlapping busy blocks,
+    optionally clipped to a window. Touching intervals are merged too.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if window_start is not None:
+            start = max(start, window_start)
+        if window_end is not None:
+            end = min(end, window_end)
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [tuple(block) for block in merged]
+
+
+def free_gaps(busy, window_start, window_end):
+    """The gaps between merged busy blocks inside [window_start, window_end)."""
+    gaps = []
+    cursor = window_start
+    for start, end in busy:
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        gaps.append((cursor, window_end))
+    return gaps
+
+
+def freebusy(user, window_start, window_end):
+    """Busy blocks and free gaps of the user's calendar in a window."""
+    busy = merge_busy(
+        ((occurrence.start_time, occurrence.end_time)
+         for occurrence in expand_window(user, window_start, window_end)),
+        window_start,
+        window_end,
+    )
+    return busy, free_gaps(busy, window_start, window_end)
+
+
+def find_conflicts(candidates, existing):
+    """
+    Sweep both lists of occurrences in start order and return every
+    (candidate, existing) pair that overlaps. Intervals are half-open, so
+    back-to-back events do not conflict.
+    """
+    events = sorted(
+        [(item.start_time, 0, index, item) for index, item in enumerate(candidates)]
+        + [(item.start_time, 1, index, item) for index, item in enumerate(existing)],
+        key=lambda event: event[:3],
+    )
+    # per side: heap of (end_time, index, item) for intervals still running
+    active = ([], [])
+    pairs = []
+    for start, side, index, item in events:
+        other = active[1 - side]
+        while other and other[0][0] <= start:
+            heapq.heappop(other)
+        for end, _, running in other:
+            if end > start:  # entries below the heap top may have ended already
+                pairs.append((item, running) if side == 0 else (running, item))
+        heapq.heappush(active[side], (item.end_time, index, item))
+    return pairs
+
+
+def event_conflicts(user, data, instance=None):
+    """
+    Existing occurrences that would overlap an event created (or, with
+    `instance`, updated) from serializer `data`. Repeating events are
+    checked over their first CONFLICT_HORIZON.
+    """
+    fields = {"title": "", "description": "", "recurrence": ""}
+    if instance is not None:
+        fields.update({
+            name: getattr(instance, name)
+            for name in ("title", "description", "start_time", "end_time", "recurrence")
+        })
+    fields.update(data)
+    candidate = CalendarEvent(user=user, **fields)
+    if instance is not None:
+        candidate.pk = instance.pk
+
+    window_start = candidate.start_time
+    window_end = candidate.end_time
+    if candidate.recurrence:
+        window_end = window_start + CONFLICT_HORIZON
+        last = series_end(candidate)
+        if last is not None:
+            window_end = min(window_end, last)
+
+    existing = [
+        occurrence for occurrence in expand_window(user, window_start, window_end)
+        if occurrence.event_id != candidate.pk
+    ]
+    if not existing:
+        return []
+    planned = occurrences(candidate, window_start, window_end)
+    conflicts = {}
+    for _, running in find_conflicts(planned, existing):
+        conflicts.setdefault((running.event_id, running.start_time), running)
+    return sorted(conflicts.values(), key=lambda occurrence: occurrence.start_time)
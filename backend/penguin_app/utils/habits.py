@@ -0,0 +1,185 @@
+"""
+Habit completion pipeline for Pocket Penguin.
+
+Completing a habit touches five tables: the habit itself, the user's game
+profile (fish coins, streak, all-time totals), the HabitCompletion log and
+the weekly Progress and MonthlyProgress rows. All writes happen in one
+transaction using conditional UPDATEs and an upsert, so parallel
+completions can neither double-award nor lose coins.
+
+Query budget for a new completion (3 statements):
+    1. UPDATE habits ... RETURNING          -> claim today, unless the log has it
+    2. UPDATE user_game_profiles ...        -> coins, streak and all-time += reward
+    3. INSERT INTO habit_completions ...    -> log the day (upsert)
+
+The weekly and monthly rows follow from statement 3: triggers on
+habit_completions (migration 0021, SQLite) add every newly completed day
+to its week and month, with the week's completion_rate. They only ever
+add, so weeks recorded before the log existed are never lowered.
+
+Statement 3 only writes when it flips the day's `completed` from false to
+true, the same event the triggers count. If it doesn't (another
+transaction logged the day after our claim), the claim and the award are
+rolled back, so coins, all-time totals and the rollups always move
+together, once per (habit, day).
+
+Also home to the set-based daily reset used by `manage.py reset_daily_habits`.
+"""
+
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from ..models.habit_models import Habit, HabitCompletion
+from ..models.user_models import UserGameProfile
+from .response_cache import bump_data_version_on_commit
+
+
+def week_start_for(day):
+    """Return the Monday of the week containing `day`."""
+    return day - timedelta(days=day.weekday())
+
+
+def display_week_start_for(day):
+    """
+    Return the Sunday of the week containing `day`, as shown by the app:
+    weekProgress and weekCompleted are both Sunday first.
+    """
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+
+class _AlreadyCompleted(Exception):
+    pass
+
+
+def complete_habit(user, habit_id):
+    """
+    Complete a habit for today and award its fish coins.
+
+    Args:
+        user: The authenticated User completing the habit
+        habit_id: Primary key of the habit
+
+    Returns:
+        (habit, is_new_completion) tuple. Coins and Progress are only
+        updated when is_new_completion is True.
+
+    Raises:
+        Habit.DoesNotExist: If the habit doesn't belong to the user
+    """
+    today = timezone.now().date()
+
+    try:
+        with transaction.atomic():
+            habit = Habit.claim_completion(habit_id, user.pk, today)
+            if habit is None:
+                # Lost the claim: missing, or today is already complete
+                return Habit.objects.get(pk=habit_id, user=user), False
+
+            award_completion(user, habit, today)
+            if not HabitCompletion.mark_completed(habit, today, coins_earned=habit.reward):
+                raise _AlreadyCompleted
+    except _AlreadyCompleted:
+        return Habit.objects.get(pk=habit_id, user=user), False
+
+    return habit, True
+
+
+def award_completion(user, habit, day):
+    """
+    Credit the habit's reward to the user's profile, advance the profile's
+    day streak and count the completion in the all-time totals, in one
+    UPDATE. Must run inside a transaction, before the log row for `day` is
+    written (which rolls the completion into Progress), and be rolled back
+    with it if that write isn't a new completion.
+    """
+    ops = connection.ops
+    log_table = ops.quote_name(HabitCompletion._meta.db_table)
+
+    def completed_on(param):
+        return f"""
+            SELECT 1 FROM {log_table} c
+            WHERE c.user_id = %(user_id)s AND c.completed AND c.day = {param}
+        """
+
+    # Another habit already completed today means the streak was counted
+    sql = f"""
+        UPDATE {ops.quote_name(UserGameProfile._meta.db_table)}
+        SET fish_coins = fish_coins + %(reward)s,
+            streak_days = CASE
+                WHEN EXISTS ({completed_on("%(day)s")} AND c.habit_id <> %(habit_id)s)
+                    THEN CASE WHEN streak_days > 1 THEN streak_days ELSE 1 END
+                WHEN EXISTS ({completed_on("%(yesterday)s")})
+                    THEN streak_days + 1
+                ELSE 1
+            END,
+            all_time_habits_completed = all_time_habits_completed + 1,
+            all_time_fish_coins_earned = all_time_fish_coins_earned + %(reward)s,
+            updated_at = %(now)s
+        WHERE user_id = %(user_id)s
+        RETURNING id
+    """
+    params = {
+        "reward": habit.reward,
+        "user_id": UserGameProfile._meta.get_field("user").target_field.get_db_prep_value(
+            user.pk, connection
+        ),
+        "habit_id": Habit._meta.pk.get_db_prep_value(habit.pk, connection),
+        "day": ops.adapt_datefield_value(day),
+        "yesterday": ops.adapt_datefield_value(day - timedelta(days=1)),
+        "now": ops.adapt_datetimefield_value(timezone.now()),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    if row is None:
+        # Profiles are created at registration; this covers older accounts
+        UserGameProfile.objects.create(
+            user=user, fish_coins=habit.reward, streak_days=1,
+            all_time_habits_completed=1, all_time_fish_coins_earned=habit.reward,
+        )
+        return
+    # the Progress rows the log triggers update belong to the same profile
+    bump_data_version_on_commit(row[0])
+
+
+def reset_daily_habits(day, chunk_size=10000, report=None):
+    """
+    Reset stale today_count values in primary-key ranges of `chunk_size`.
+
+    Each chunk is one UPDATE in its own short transaction, so writers are
+    never blocked for long. `report(chunk, rows, seconds)` is called after
+    every chunk. Returns the total number of habits reset.
+    """
+    logged_today = HabitCompletion.objects.filter(habit=OuterRef("pk"), day=day)
+    total = 0
+    chunk = 0
+    lower = None
+
+    while True:
+        keys = Habit.objects.order_by("pk").values_list("pk", flat=True)
+        if lower is not None:
+            keys = keys.filter(pk__gt=lower)
+        upper = next(iter(keys[chunk_size - 1:chunk_size]), None)
+
+        batch = Habit.objects.filter(today_count__gt=0).filter(~Exists(logged_today))
+        if lower is not None:
+            batch = batch.filter(pk__gt=lower)
+        if upper is not None:
+            batch = batch.filter(pk__lte=upper)
+
+        chunk_started = time.monotonic()
+        with transaction.atomic():
+            rows = batch.update(today_count=0, updated_at=timezone.now())
+        chunk += 1
+        total += rows
+        if report is not None:
+            report(chunk, rows, time.monotonic() - chunk_started)
+
+        if upper is None:
+            return total
+        lower = upper
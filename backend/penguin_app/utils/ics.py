@@ -0,0 +1,471 @@
+"""
+iCalendar (.ics, RFC 5545) import and export for Pocket Penguin calendars.
+
+Export streams one VEVENT per CalendarEvent from QuerySet.iterator(), so
+memory stays flat for any calendar size. Repeating events carry their RRULE,
+cancelled occurrences become EXDATEs and moved occurrences become extra
+VEVENTs with a RECURRENCE-ID.
+
+Import reads the file line by line (unfolding continuation lines as it goes)
+and inserts events in batches of `batch_size`, one executemany() each. Events are
+deduplicated on UID per user, both within the file and against earlier
+imports, so importing the same file twice is harmless. Supported per event:
+UID, SUMMARY, DESCRIPTION, DTSTART/DTEND (UTC, floating, TZID or all-day
+dates), DURATION, RRULE (the subset in utils/recurrence.py) and EXDATE.
+
+A VEVENT with a RECURRENCE-ID overrides one occurrence of the series with
+the same UID and becomes a CalendarEventException (cancelled if its STATUS
+is CANCELLED). Overrides are held until the end of the file, since their
+series may come later, and then inserted in batches too. Events without
+DTSTART, and overrides whose UID names no recurring event, are skipped and
+counted. The counts are per VEVENT, overrides included.
+"""
+
+import re
+import uuid
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models.calendar_models import CalendarEvent, CalendarEventException
+from .export import buffered
+from .recurrence import parse_rrule, series_end
+
+BATCH_SIZE = 1000
+CHUNK_SIZE = 1000
+
+# CalendarEvent columns written by import, in parameter order
+_INSERT_FIELDS = (
+    "id", "user", "uid", "title", "description", "start_time", "end_time",
+    "recurrence", "recurrence_end", "updated_at",
+)
+# and CalendarEventException columns, for overridden occurrences
+_OVERRIDE_FIELDS = (
+    "event", "original_start", "is_cancelled", "start_time", "end_time", "title", "description",
+)
+
+PRODID = "-//Pocket Penguin//Calendar//EN"
+
+UTC = ZoneInfo("UTC")
+
+ImportResult = namedtuple("ImportResult", "created duplicates skipped")
+# one parsed VEVENT, ready to insert
+_Row = namedtuple("_Row", "uid title description start_time end_time recurrence recurrence_end exdates")
+# one parsed VEVENT with a RECURRENCE-ID
+_Override = namedtuple("_Override", "uid original_start is_cancelled start_time end_time title description")
+
+_DURATION_RE = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+
+# ---------------------------------------------------------------- export --
+
+def iter_ics(user, chunk_size=CHUNK_SIZE):
+    """Yield the user's calendar as an iCalendar document, in UTF-8 chunks."""
+    return buffered(_ics_lines(user, chunk_size))
+
+
+def _ics_lines(user, chunk_size):
+    yield "BEGIN:VCALENDAR\r\n"
+    yield "VERSION:2.0\r\n"
+    yield f"PRODID:{PRODID}\r\n"
+    stamp = _format_datetime(timezone.now())
+
+    # exceptions are few, so read them all up front instead of per event
+    exceptions = {}
+    for exception in CalendarEventException.objects.filter(event__user=user).order_by("original_start"):
+        exceptions.setdefault(exception.event_id, []).append(exception)
+
+    events = (
+        CalendarEvent.objects.filter(user=user)
+        .order_by("start_time", "id")
+        .values_list("id", "uid", "title", "description", "start_time", "end_time", "recurrence")
+        .iterator(chunk_size=chunk_size)
+    )
+    for pk, uid, title, description, start_time, end_time, recurrence in events:
+        uid = uid or f"{pk}@pocketpenguin"
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{_escape(uid)}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_format_datetime(start_time)}",
+            f"DTEND:{_format_datetime(end_time)}",
+            f"SUMMARY:{_escape(title)}",
+        ]
+        if description:
+            lines.append(f"DESCRIPTION:{_escape(description)}")
+        moved = []
+        if recurrence:
+            lines.append(f"RRULE:{recurrence}")
+            for exception in exceptions.get(pk, ()):
+                if exception.is_cancelled:
+                    lines.append(f"EXDATE:{_format_datetime(exception.original_start)}")
+                else:
+                    moved.append(exception)
+        lines.append("END:VEVENT")
+
+        duration = end_time - start_time
+        for exception in moved:
+            start = exception.start_time or exception.original_start
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{_escape(uid)}",
+                f"DTSTAMP:{stamp}",
+                f"RECURRENCE-ID:{_format_datetime(exception.original_start)}",
+                f"DTSTART:{_format_datetime(start)}",
+                f"DTEND:{_format_datetime(exception.end_time or start + duration)}",
+                f"SUMMARY:{_escape(exception.title or title)}",
+                "END:VEVENT",
+            ]
+        yield "".join(_fold(line) for line in lines)
+
+    yield "END:VCALENDAR\r\n"
+
+
+def _format_datetime(value):
+    return value.astimezone(UTC).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _escape(text):
+    return (
+        text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """Fold a content line at 75 octets, as RFC 5545 requires."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while data:
+        cut = min(limit, len(data))
+        # don't split a UTF-8 sequence
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode())
+        data = data[cut:]
+        limit = 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+# ---------------------------------------------------------------- import --
+
+def import_ics(user, lines, batch_size=BATCH_SIZE):
+    """
+    Import VEVENTs from an iterable of lines (bytes or str) into the user's
+    calendar. Each batch is inserted in its own transaction.
+    """
+    created = duplicates = skipped = 0
+    batch = []
+    overrides = []
+    for component in iter_vevents(lines):
+        row = _build_row(component)
+        if row is None:
+            skipped += 1
+            continue
+        if isinstance(row, _Override):
+            overrides.append(row)
+            continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            new, dupes = _insert_batch(user, batch)
+            created, duplicates = created + new, duplicates + dupes
+            batch = []
+    if batch:
+        new, dupes = _insert_batch(user, batch)
+        created, duplicates = created + new, duplicates + dupes
+    for start in range(0, len(overrides), batch_size):
+        new, dupes, missing = _insert_overrides(user, overrides[start:start + batch_size])
+        created, duplicates, skipped = created + new, duplicates + dupes, skipped + missing
+    return ImportResult(created, duplicates, skipped)
+
+
+def iter_vevents(lines):
+    """
+    Yield each VEVENT as a list of (name, params, value) tuples, reading
+    `lines` lazily. Nested components (VALARM) are ignored.
+    """
+    properties = None
+    depth = 0
+    for line in _unfold(lines):
+        name, params, value = _parse_line(line)
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and properties is None:
+                properties = []
+            elif properties is not None:
+                depth += 1
+        elif name == "END":
+            if properties is not None and depth:
+                depth -= 1
+            elif value.upper() == "VEVENT" and properties is not None:
+                yield properties
+                properties = None
+        elif properties is not None and not depth:
+            properties.append((name, params, value))
+
+
+def _unfold(lines):
+    current = None
+    for raw in lines:
+        line = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else raw
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if current is not None:
+                current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def _parse_line(line):
+    """Split 'NAME;PARAM=a;PARAM="b:c":value' into (NAME, {PARAM: a, ...}, value)."""
+    colon = line.find(":")
+    quote = line.find('"')
+    if quote == -1 or quote > colon:
+        head, value = (line[:colon], line[colon + 1:]) if colon != -1 else (line, "")
+    else:
+        # a quoted parameter value may itself contain ':'
+        quoted = False
+        for index, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif char == ":" and not quoted:
+                head, value = line[:index], line[index + 1:]
+                break
+        else:
+            head, value = line, ""
+    name, *raw_params = head.split(";")
+    params = {}
+    for param in raw_params:
+        key, _, param_value = param.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def _unescape(text):
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), text)
+
+
+def _parse_datetime(params, value):
+    """Return (aware datetime, is_date) for a DTSTART/DTEND/EXDATE value."""
+    value = value.strip()
+    if params.get("VALUE", "").upper() == "DATE" or len(value) == 8:
+        day = datetime.strptime(value, "%Y%m%d").date()
+        return timezone.make_aware(datetime.combine(day, time.min)), True
+    if value.endswith("Z"):
+        return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=UTC), False
+    naive = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    tz = None
+    if "TZID" in params:
+        try:
+            tz = ZoneInfo(params["TZID"])
+        except (ZoneInfoNotFoundError, ValueError):
+            tz = None
+    return timezone.make_aware(naive, tz or timezone.get_current_timezone()), False
+
+
+def _parse_duration(value):
+    match = _DURATION_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Bad DURATION: {value}")
+    parts = {key: int(number) for key, number in match.groupdict().items() if number and key != "sign"}
+    duration = timedelta(**parts)
+    return -duration if match.group("sign") == "-" else duration
+
+
+def _build_row(component):
+    """
+    A _Row (or an _Override, for a RECURRENCE-ID) from VEVENT properties, or
+    None if the event can't be imported.
+    """
+    props = {}
+    exdates = []
+    for name, params, value in component:
+        if name == "EXDATE":
+            exdates.extend((params, part) for part in value.split(",") if part)
+        else:
+            props.setdefault(name, (params, value))
+
+    if "DTSTART" not in props:
+        return None
+    try:
+        start, is_date = _parse_datetime(*props["DTSTART"])
+        if "DTEND" in props:
+            end, _ = _parse_datetime(*props["DTEND"])
+        elif "DURATION" in props:
+            end = start + _parse_duration(props["DURATION"][1])
+        else:
+            end = start + (timedelta(days=1) if is_date else timedelta())
+        exdates = [_parse_datetime(*exdate)[0] for exdate in exdates]
+    except ValueError:
+        return None
+    if end < start:
+        return None
+
+    uid = _unescape(props["UID"][1]).strip()[:255] if "UID" in props else ""
+    if "RECURRENCE-ID" in props:
+        # without DTEND/DURATION the occurrence keeps the series' length
+        has_end = "DTEND" in props or "DURATION" in props
+        return _build_override(props, uid, start, end if has_end else None)
+
+    recurrence = recurrence_end = None
+    if "RRULE" in props:
+        try:
+            parse_rrule(props["RRULE"][1])
+            recurrence = props["RRULE"][1].strip()
+        except ValueError:
+            pass  # keep the first occurrence rather than dropping the event
+    if recurrence:
+        # what CalendarEvent.save() would store, since the insert skips it
+        recurrence_end = series_end(CalendarEvent(start_time=start, end_time=end, recurrence=recurrence))
+
+    return _Row(
+        uid=uid or None,
+        title=_unescape(props.get("SUMMARY", ({}, ""))[1])[:255] or "(no title)",
+        description=_unescape(props.get("DESCRIPTION", ({}, ""))[1]),
+        start_time=start,
+        end_time=end,
+        recurrence=recurrence or "",
+        recurrence_end=recurrence_end,
+        exdates=exdates if recurrence else [],
+    )
+
+
+def _build_override(props, uid, start, end):
+    if not uid:
+        return None  # nothing to say which series it belongs to
+    try:
+        original_start, _ = _parse_datetime(*props["RECURRENCE-ID"])
+    except ValueError:
+        return None
+    return _Override(
+        uid=uid,
+        original_start=original_start,
+        is_cancelled=props.get("STATUS", ({}, ""))[1].strip().upper() == "CANCELLED",
+        start_time=start,
+        end_time=end,
+        # left blank, these keep the series' values
+        title=_unescape(props.get("SUMMARY", ({}, ""))[1])[:255],
+        description=_unescape(props.get("DESCRIPTION", ({}, ""))[1]),
+    )
+
+
+def _insert_sql(model, columns):
+    """INSERT of `columns` that skips rows conflicting with a unique constraint."""
+    ops = connection.ops
+    return "INSERT INTO {table} ({columns}) VALUES ({values}) ON CONFLICT DO NOTHING".format(
+        table=ops.quote_name(model._meta.db_table),
+        columns=", ".join(ops.quote_name(column) for column in columns),
+        values=", ".join(["%s"] * len(columns)),
+    )
+
+
+def _insert_batch(user, rows):
+    """
+    Insert one batch with executemany(); returns (created, duplicates).
+
+    Model instances and bulk_create cost more than parsing the file, so rows
+    go straight to the table, adapted by the backend like in utils/habits.py.
+    """
+    seen = set()
+    unique = []
+    for row in rows:
+        if row.uid is not None:
+            if row.uid in seen:
+                continue
+            seen.add(row.uid)
+        unique.append(row)
+
+    ops = connection.ops
+    meta = CalendarEvent._meta
+    # "ON CONFLICT DO NOTHING": a concurrent import of the same file may still win a UID
+    sql = _insert_sql(CalendarEvent, [meta.get_field(name).column for name in _INSERT_FIELDS])
+    pk_field = meta.pk
+    user_id = meta.get_field("user").target_field.get_db_prep_value(user.pk, connection)
+    now = ops.adapt_datetimefield_value(timezone.now())
+
+    with transaction.atomic():
+        existing = set(
+            CalendarEvent.objects.filter(user=user, uid__in=seen).values_list("uid", flat=True)
+        )
+        new = [row for row in unique if row.uid is None or row.uid not in existing]
+        keys = [uuid.uuid4() for _ in new]
+        params = [
+            (
+                pk_field.get_db_prep_value(key, connection), user_id, row.uid, row.title,
+                row.description, ops.adapt_datetimefield_value(row.start_time),
+                ops.adapt_datetimefield_value(row.end_time), row.recurrence,
+                ops.adapt_datetimefield_value(row.recurrence_end), now,
+            )
+            for key, row in zip(keys, new)
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+            # rows dropped by ON CONFLICT aren't counted
+            created = cursor.rowcount
+
+        with_exdates = [(key, row) for key, row in zip(keys, new) if row.exdates]
+        if with_exdates:
+            inserted = set(
+                CalendarEvent.objects.filter(pk__in=[key for key, _ in with_exdates])
+                .values_list("pk", flat=True)
+            )
+            CalendarEventException.objects.bulk_create(
+                [
+                    CalendarEventException(event_id=key, original_start=exdate, is_cancelled=True)
+                    for key, row in with_exdates if key in inserted
+                    for exdate in row.exdates
+                ],
+                ignore_conflicts=True,
+            )
+    return created, len(rows) - created
+
+
+def _insert_overrides(user, overrides):
+    """
+    Insert overridden occurrences as exceptions of the user's series with the
+    same UID; returns (created, duplicates, skipped).
+    """
+    ops = connection.ops
+    meta = CalendarEventException._meta
+    sql = _insert_sql(CalendarEventException, [meta.get_field(name).column for name in _OVERRIDE_FIELDS])
+    event_field = meta.get_field("event").target_field
+
+    with transaction.atomic():
+        series = dict(
+            CalendarEvent.objects.filter(user=user, uid__in={override.uid for override in overrides})
+            .exclude(recurrence="")
+            .values_list("uid", "pk")
+        )
+        matched = [(series[override.uid], override) for override in overrides if override.uid in series]
+        params = [
+            (
+                event_field.get_db_prep_value(event_id, connection),
+                ops.adapt_datetimefield_value(override.original_start), override.is_cancelled,
+                ops.adapt_datetimefield_value(override.start_time),
+                ops.adapt_datetimefield_value(override.end_time), override.title, override.description,
+            )
+            for event_id, override in matched
+        ]
+        created = 0
+        if params:
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+                created = cursor.rowcount
+        if created:
+            # what CalendarEventException.save() does, so cached occurrences go stale
+            CalendarEvent.objects.filter(pk__in={event_id for event_id, _ in matched}).update(
+                updated_at=timezone.now()
+            )
+    return created, len(matched) - created, len(overrides) - len(matched)
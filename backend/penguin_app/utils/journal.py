@@ -1 +1,177 @@
-print("hello world")
\ No newline at end of file
+"""
+Journal search and bulk import utilities for Pocket Penguin.
+
+Full-text search over JournalEntry.title and content is backed by the SQLite
+FTS5 table `journal_entries_fts`, created by migration 0011 and kept in sync
+by database triggers on insert, update and delete (so bulk_create and
+queryset updates are covered too). Results are ranked with bm25, title
+matches weighing more than content matches, and come with a short snippet.
+
+On databases without FTS5 the search falls back to a case-insensitive
+substring match, unranked and without snippets.
+
+bulk_import_entries() stores a batch of entries queued by an offline client
+in one transaction, deduplicating on the client's own id.
+"""
+
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from ..models.journal_entry_model import JournalEntry
+
+FTS_TABLE = "journal_entries_fts"
+
+# bm25 column weights: title, content, user_id, entry_id
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+SNIPPET_TOKENS = 12
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_available():
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(user, query):
+    """
+    Turn free text into a safe FTS5 MATCH expression scoped to one user.
+
+    Every word is quoted, so FTS5 operators typed by the user are treated
+    as plain text, and the last word is a prefix match for search-as-you-type.
+    Returns None if the query has no searchable words.
+    """
+    words = _WORD_RE.findall(query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return f'user_id:"{user.pk.hex}" AND {{title content}}:({" ".join(terms)})'
+
+
+def search_entries(user, query, limit=20):
+    """
+    Search the user's journal entries.
+
+    Returns a list of (entry, snippet) tuples, best match first.
+    """
+    if not fts_available():
+        return _search_entries_like(user, query, limit)
+
+    match = build_match_query(user, query)
+    if match is None:
+        return []
+
+    sql = f"""
+        SELECT entry_id,
+               snippet({FTS_TABLE}, 1, '[', ']', '…', {SNIPPET_TOKENS})
+        FROM {FTS_TABLE}
+        WHERE {FTS_TABLE} MATCH %s
+        ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, {CONTENT_WEIGHT}, 0.0, 0.0)
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, limit])
+        hits = cursor.fetchall()
+
+    # Rows are stored with the same hex UUIDs the ORM writes on SQLite
+    entries = JournalEntry.objects.in_bulk([entry_id for entry_id, _ in hits])
+    results = []
+    for entry_id, snippet in hits:
+        entry = entries.get(JournalEntry._meta.pk.to_python(entry_id))
+        if entry is not None:
+            results.append((entry, snippet))
+    return results
+
+
+def _search_entries_like(user, query, limit):
+    words = _WORD_RE.findall(query)
+    if not words:
+        return []
+    condition = Q()
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(content__icontains=word)
+    entries = (
+        JournalEntry.objects.filter(condition, user=user)
+        .order_by("-date", "-created_at")[:limit]
+    )
+    return [(entry, "") for entry in entries]
+
+
+def rebuild_search_index():
+    """
+    Re-populate the FTS index from journal_entries and merge its segments.
+    Returns the number of indexed entries.
+    """
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(f"""
+            INSERT INTO {FTS_TABLE} (title, content, user_id, entry_id)
+            SELECT title, content, user_id, id FROM {JournalEntry._meta.db_table}
+        """)
+        indexed = cursor.rowcount
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return indexed
+
+
+def bulk_import_entries(user, items):
+    """
+    Insert validated entries for `user` with one bulk INSERT per table.
+
+    `items` is a list of validated_data dicts. Entries whose client_id the
+    user already has (or that repeat a client_id earlier in the batch) are
+    not inserted again; a blank client_id counts as none. Returns a list of
+    (entry_id, created) in input order.
+    """
+    items = [{**item, "client_id": item.get("client_id") or None} for item in items]
+    client_ids = {item["client_id"] for item in items if item["client_id"]}
+
+    with transaction.atomic():
+        existing = dict(
+            JournalEntry.objects.filter(user=user, client_id__in=client_ids)
+            .values_list("client_id", "id")
+        )
+
+        new_entries = []
+        slots = []  # per item: (existing id or the JournalEntry built, is_first_use)
+        claimed = {}
+        for item in items:
+            client_id = item["client_id"]
+            if client_id in existing:
+                slots.append((existing[client_id], False))
+            elif client_id in claimed:
+                slots.append((claimed[client_id], False))
+            else:
+                entry = JournalEntry(user=user, **item)
+                new_entries.append(entry)
+                if client_id:
+                    claimed[client_id] = entry
+                slots.append((entry, True))
+
+        # A concurrent upload of the same batch can still win the race for a
+        # client_id; ignore_conflicts lets this batch go through regardless
+        # (the manager indexes the tags of the rows actually inserted), and
+        # the entries it dropped are reported as duplicates of the winners.
+        JournalEntry.objects.bulk_create(new_entries, ignore_conflicts=bool(claimed))
+        lost = {entry.client_id for entry in new_entries if entry._state.adding}
+        stored = {}
+        if lost:
+            stored = dict(
+                JournalEntry.objects.filter(user=user, client_id__in=lost)
+                .values_list("client_id", "id")
+            )
+
+    results = []
+    for slot, first_use in slots:
+        if not isinstance(slot, JournalEntry):
+            results.append((slot, False))
+        elif slot._state.adding:
+            results.append((stored[slot.client_id], False))
+        else:
+            results.append((slot.pk, first_use))
+    return results
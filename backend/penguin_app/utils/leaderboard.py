@@ -0,0 +1,140 @@
+"""
+Leaderboards for Pocket Penguin.
+
+Ranking a user with ORDER BY over user_game_profiles costs a sort (or a
+long index walk) per request. Each worker keeps its own ranking of every
+profile per metric instead: a sorted list of (-score, profile_id) keys plus
+a dict of current scores. Top-N is a slice, "my rank" is a binary search,
+and moving one profile is a bisect delete and insert.
+
+At most once per REFRESH_INTERVAL a request reads the profiles updated
+since the previous read (an indexed range on updated_at, which the coin
+and streak updates in utils/habits.py set) and moves just those. Every
+REBUILD_INTERVAL the rankings are rebuilt from the table, which also drops
+deleted profiles. Ties share a rank (1, 2, 2, 4).
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..models.user_models import UserGameProfile
+
+METRICS = ("fish_coins", "streak_days", "level")
+REFRESH_INTERVAL = 1.0  # seconds
+REBUILD_INTERVAL = 60 * 60  # seconds
+# incremental reads overlap the previous one by this much, so a row whose
+# transaction committed slightly after its updated_at timestamp isn't missed
+OVERLAP = timedelta(seconds=5)
+
+
+class Ranking:
+    """Profiles ordered by one score, highest first."""
+
+    def __init__(self, scores=()):
+        self._scores = dict(scores)
+        self._keys = sorted((-score, profile_id) for profile_id, score in self._scores.items())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def score(self, profile_id):
+        return self._scores.get(profile_id)
+
+    def update(self, profile_id, score):
+        old = self._scores.get(profile_id)
+        if old == score:
+            return
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, profile_id))]
+        insort(self._keys, (-score, profile_id))
+        self._scores[profile_id] = score
+
+    def rank_of_score(self, score):
+        """The rank a profile with `score` has: 1 + profiles scoring higher."""
+        # (-score,) sorts before every (-score, profile_id)
+        return bisect_left(self._keys, (-score,)) + 1
+
+    def rank(self, profile_id):
+        score = self._scores.get(profile_id)
+        return None if score is None else self.rank_of_score(score)
+
+    def top(self, n):
+        """[(profile_id, score, rank)] for the first `n` profiles."""
+        entries = []
+        rank = 0
+        previous = None
+        for position, (negative, profile_id) in enumerate(self._keys[:n], 1):
+            if negative != previous:
+                rank, previous = position, negative
+            entries.append((profile_id, -negative, rank))
+        return entries
+
+
+class Leaderboards:
+    """This process's rankings of user_game_profiles; see the module docstring."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next read rebuilds from the table."""
+        self._rankings = None
+        self._read_until = None
+        self._next_refresh = 0.0
+        self._next_rebuild = 0.0
+
+    def top(self, metric, n):
+        """([(profile_id, score, rank)] for the first `n`, number of ranked profiles)."""
+        with self._lock:
+            self._refresh()
+            return self._rankings[metric].top(n), len(self._rankings[metric])
+
+    def rank(self, metric, profile_id):
+        """(rank, score) of the profile, or (None, None) if it isn't ranked yet."""
+        with self._lock:
+            self._refresh()
+            ranking = self._rankings[metric]
+            return ranking.rank(profile_id), ranking.score(profile_id)
+
+    def rank_of_score(self, metric, score):
+        with self._lock:
+            self._refresh()
+            return self._rankings[metric].rank_of_score(score)
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        if self._rankings is None or now >= self._next_rebuild:
+            self._rebuild(now)
+        else:
+            self._read_new()
+        self._next_refresh = now + REFRESH_INTERVAL
+
+    def _rebuild(self, now):
+        started = timezone.now()
+        rows = list(UserGameProfile.objects.values_list("id", *METRICS))
+        self._rankings = {
+            metric: Ranking((row[0], row[index]) for row in rows)
+            for index, metric in enumerate(METRICS, 1)
+        }
+        self._read_until = started
+        self._next_rebuild = now + REBUILD_INTERVAL
+
+    def _read_new(self):
+        started = timezone.now()
+        rows = UserGameProfile.objects.filter(
+            updated_at__gte=self._read_until - OVERLAP,
+        ).values_list("id", *METRICS)
+        for row in rows:
+            for index, metric in enumerate(METRICS, 1):
+                self._rankings[metric].update(row[0], row[index])
+        self._read_until = started
+
+
+leaderboards = Leaderboards()
@@ -0,0 +1,197 @@
+"""
+Monthly and all-time progress rollups for Pocket Penguin.
+
+Weekly Progress rows are the source of truth. Every change to one is
+applied as a delta, in the same transaction, to:
+
+    - the MonthlyProgress row of the month the week starts in (upsert), and
+    - the all_time_* columns of the user's UserGameProfile (F() increment),
+
+so the monthly and all-time endpoints read a single row whatever the age of
+the account, and any past month costs the same as the current one. Writers
+are Progress.save()/delete() and, for habit completions, complete_habit()
+in utils/habits.py (the all-time += in its profile UPDATE, the weekly and
+monthly += in the habit_completions triggers). QuerySet.update()/delete()
+on Progress bypass this; follow them with rebuild_rollups() (as
+`manage.py rebuild_progress` does).
+
+Also home to progress_series(), the bucketed time series behind
+/api/progress/series/. Every rollup change bumps the profile's response
+cache version (utils/response_cache.py) once its transaction commits.
+"""
+
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from ..models.habit_models import HabitCompletion
+from ..models.progress_models import MonthlyProgress, Progress
+from ..models.user_models import UserGameProfile
+from .response_cache import bump_data_version_on_commit, get_or_compute
+
+# Progress fields that are rolled up, in apply_progress_change() argument order
+ROLLUP_FIELDS = ("habits_completed", "todos_completed", "fish_coins_earned")
+
+GRANULARITIES = ("day", "week", "month")
+METRICS = ROLLUP_FIELDS
+# todos are only recorded per week
+DAILY_METRICS = ("habits_completed", "fish_coins_earned")
+MAX_BUCKETS = 731  # two years of days
+SERIES_CACHE_TIMEOUT = 5 * 60  # seconds
+
+
+def month_start_for(day):
+    """Return the first day of the month containing `day`."""
+    return day.replace(day=1)
+
+
+def apply_progress_change(profile_id, week_start, habits, todos, coins):
+    """
+    Add a change of one weekly Progress row to its month and to the
+    all-time totals. Must run in the transaction that changed the row.
+    """
+    if not (habits or todos or coins):
+        return
+
+    ops = connection.ops
+    month_table = ops.quote_name(MonthlyProgress._meta.db_table)
+    now = ops.adapt_datetimefield_value(timezone.now())
+    sql = f"""
+        INSERT INTO {month_table} (
+            profile_id, month, habits_completed, todos_completed, fish_coins_earned, updated_at
+        )
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (profile_id, month) DO UPDATE SET
+            habits_completed = {month_table}.habits_completed + excluded.habits_completed,
+            todos_completed = {month_table}.todos_completed + excluded.todos_completed,
+            fish_coins_earned = {month_table}.fish_coins_earned + excluded.fish_coins_earned,
+            updated_at = excluded.updated_at
+    """
+    month = ops.adapt_datefield_value(month_start_for(week_start))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [profile_id, month, habits, todos, coins, now])
+
+    UserGameProfile.objects.filter(pk=profile_id).update(
+        all_time_habits_completed=F("all_time_habits_completed") + habits,
+        all_time_todos_completed=F("all_time_todos_completed") + todos,
+        all_time_fish_coins_earned=F("all_time_fish_coins_earned") + coins,
+    )
+    bump_data_version_on_commit(profile_id)
+
+
+def rebuild_rollups(profile_ids):
+    """
+    Recompute the monthly rows and all-time columns of the given profiles
+    from their weekly Progress rows, for writes that bypass
+    apply_progress_change() (bulk_update, QuerySet.update()).
+    """
+    profile_ids = list(profile_ids)
+    sums = {field: Sum(field) for field in ROLLUP_FIELDS}
+    weeks = Progress.objects.filter(profile_id__in=profile_ids).order_by()
+
+    now = timezone.now()
+    months = [
+        MonthlyProgress(updated_at=now, **row)
+        for row in weeks.annotate(month=TruncMonth("week_start")).values("profile_id", "month").annotate(**sums)
+    ]
+    totals = {row.pop("profile_id"): row for row in weeks.values("profile_id").annotate(**sums)}
+    profiles = []
+    for profile_id in profile_ids:
+        row = totals.get(profile_id, {})
+        profiles.append(UserGameProfile(
+            pk=profile_id,
+            all_time_habits_completed=row.get("habits_completed") or 0,
+            all_time_todos_completed=row.get("todos_completed") or 0,
+            all_time_fish_coins_earned=row.get("fish_coins_earned") or 0,
+        ))
+
+    with transaction.atomic():
+        MonthlyProgress.objects.filter(profile_id__in=profile_ids).delete()
+        MonthlyProgress.objects.bulk_create(months, batch_size=1000)
+        UserGameProfile.objects.bulk_update(
+            profiles,
+            ["all_time_habits_completed", "all_time_todos_completed", "all_time_fish_coins_earned"],
+            batch_size=1000,
+        )
+        for profile_id in profile_ids:
+            bump_data_version_on_commit(profile_id)
+
+
+def bucket_start(day, granularity):
+    """The first day of the bucket containing `day`."""
+    if granularity == "month":
+        return month_start_for(day)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def bucket_starts(start, end, granularity):
+    """Every bucket start from the bucket containing `start` up to `end`."""
+    current = bucket_start(start, granularity)
+    while current <= end:
+        yield current
+        try:
+            if granularity == "month":
+                current = (current + timedelta(days=32)).replace(day=1)
+            elif granularity == "week":
+                current += timedelta(days=7)
+            else:
+                current += timedelta(days=1)
+        except OverflowError:  # the bucket ends at date.max
+            return
+
+
+def count_buckets(start, end, granularity):
+    """How many buckets bucket_starts(start, end, granularity) yields."""
+    if granularity == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    first = bucket_start(start, granularity)
+    step = 7 if granularity == "week" else 1
+    return (end - first).days // step + 1
+
+
+def progress_series(profile, start, end, granularity, metric):
+    """
+    Sum `metric` per day, week or month from `start` to `end` (inclusive),
+    with one GROUP BY query and zero for empty buckets.
+
+    Days come from the HabitCompletion log. Weeks and months come from the
+    weekly Progress rows, grouped by the week's start like the monthly
+    summary, so the series agrees with /progress/weekly/ and /monthly/.
+
+    Returns a list of (bucket_start, value) pairs, oldest first.
+    """
+    first = bucket_start(start, granularity)
+    if granularity == "day":
+        rows = (
+            HabitCompletion.objects
+            .filter(user_id=profile.user_id, completed=True, day__gte=first, day__lte=end)
+            .annotate(bucket=F("day"))
+            .values("bucket")
+            .annotate(value=Count("id") if metric == "habits_completed" else Sum("coins_earned"))
+        )
+    else:
+        trunc = TruncMonth if granularity == "month" else TruncWeek
+        rows = (
+            Progress.objects
+            .filter(profile=profile, week_start__gte=first, week_start__lte=end)
+            .annotate(bucket=trunc("week_start"))
+            .values("bucket")
+            .annotate(value=Sum(metric))
+        )
+    values = dict(rows.order_by().values_list("bucket", "value"))
+    return [(day, values.get(day) or 0) for day in bucket_starts(first, end, granularity)]
+
+
+def cached_progress_series(profile, start, end, granularity, metric):
+    """progress_series() through the per-user response cache (utils/response_cache.py)."""
+    return get_or_compute(
+        "progress-series", profile.pk,
+        f"{granularity}:{metric}:{start.isoformat()}:{end.isoformat()}",
+        lambda: progress_series(profile, start, end, granularity, metric),
+        SERIES_CACHE_TIMEOUT,
+    )
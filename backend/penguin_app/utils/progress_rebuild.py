@@ -0,0 +1,209 @@
+"""
+Rebuild weekly Progress rows from the HabitCompletion log.
+
+The completion pipeline adds each completed day to its week incrementally
+(the habit_completions triggers), so rows drift when days are backfilled
+or edited, or when a week was last written by older code. This recomputes
+habits_completed, fish_coins_earned and completion_rate for every week
+from the log, with the same rules as those triggers:
+
+    - habits_completed / fish_coins_earned: completed log rows in the week
+      and the coins they earned;
+    - completion_rate: habits_completed / habits in scope, capped at 1.0,
+      where a habit is in scope if it started by week_start and is either
+      not archived or was logged that week or later.
+
+Only weeks from the user's first logged day onwards are rebuilt: earlier
+rows predate the log and there is nothing to rebuild them from. For the
+same reason, weeks up to the last day seeded by the log's backfill
+(HabitCompletion.backfilled) are left as recorded.
+todos_completed is not derived from the log and is left alone.
+
+Users are diffed in chunks (4 read queries each), optionally across a
+process pool; the parent process writes each chunk's changes with
+bulk_update / bulk_create and then rebuilds that chunk's monthly and
+all-time rollups. Used by `manage.py rebuild_progress`.
+"""
+
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.db import connections, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from ..models.habit_models import Habit, HabitCompletion
+from ..models.progress_models import Progress
+from ..models.user_models import User, UserGameProfile
+from .habits import week_start_for
+from .progress import rebuild_rollups
+
+__all__ = ["WeekChange", "diff_progress", "apply_changes", "rebuild_all_progress"]
+
+# pk is None for a week that has history but no Progress row; old is then None.
+# old and new are (habits_completed, fish_coins_earned, completion_rate).
+WeekChange = namedtuple("WeekChange", "pk profile_id week_start old new")
+
+RATE_TOLERANCE = 1e-9
+
+
+def _in_scope(habit, week_start):
+    start_date, is_archived, last_day = habit
+    return start_date <= week_start and (not is_archived or (last_day is not None and last_day >= week_start))
+
+
+def diff_progress(user_ids):
+    """
+    Compare the stored weekly rows of the given users with their history.
+
+    Returns the list of WeekChange for rows that are wrong or missing.
+    Reads only, so it is safe to run in worker processes.
+    """
+    user_ids = list(user_ids)
+    profiles = dict(UserGameProfile.objects.filter(user_id__in=user_ids).values_list("user_id", "id"))
+
+    habits = defaultdict(list)
+    first_day, last_backfilled = {}, {}
+    rows = (
+        Habit.objects.filter(user_id__in=user_ids)
+        .annotate(
+            first_day=Min("completions__day"),
+            last_day=Max("completions__day"),
+            last_backfilled=Max("completions__day", filter=Q(completions__backfilled=True)),
+        )
+        .order_by()
+        .values_list("user_id", "start_date", "is_archived", "first_day", "last_day", "last_backfilled")
+    )
+    for user_id, start_date, is_archived, first, last, backfilled in rows:
+        habits[user_id].append((start_date, is_archived, last))
+        if first is not None and (user_id not in first_day or first < first_day[user_id]):
+            first_day[user_id] = first
+        if backfilled is not None and (user_id not in last_backfilled or backfilled > last_backfilled[user_id]):
+            last_backfilled[user_id] = backfilled
+
+    logged = defaultdict(dict)
+    rows = (
+        HabitCompletion.objects.filter(user_id__in=user_ids, completed=True)
+        .annotate(week=TruncWeek("day"))
+        .values("user_id", "week")
+        .annotate(done=Count("id"), coins=Sum("coins_earned"))
+        .order_by()
+        .values_list("user_id", "week", "done", "coins")
+    )
+    for user_id, week_start, done, coins in rows:
+        logged[user_id][week_start] = (done, coins)
+
+    stored = defaultdict(dict)
+    rows = Progress.objects.filter(profile_id__in=profiles.values()).order_by().values_list(
+        "pk", "profile_id", "week_start", "habits_completed", "fish_coins_earned", "completion_rate",
+    )
+    for pk, profile_id, week_start, done, coins, rate in rows:
+        stored[profile_id][week_start] = (pk, (done, coins, rate))
+
+    changes = []
+    for user_id, profile_id in profiles.items():
+        if user_id not in first_day:
+            continue
+        if user_id in last_backfilled:
+            # the log only covers every habit from the day after the backfill
+            first_week = week_start_for(last_backfilled[user_id]) + timedelta(days=7)
+        else:
+            first_week = week_start_for(first_day[user_id])
+        weeks = logged[user_id].keys() | stored[profile_id].keys()
+        for week_start in sorted(week for week in weeks if week >= first_week):
+            done, coins = logged[user_id].get(week_start, (0, 0))
+            total = sum(1 for habit in habits[user_id] if _in_scope(habit, week_start))
+            rate = 0.0 if total == 0 else min(1.0, done / total)
+
+            pk, old = stored[profile_id].get(week_start, (None, None))
+            if old is not None and old[:2] == (done, coins) and abs(old[2] - rate) <= RATE_TOLERANCE:
+                continue
+            changes.append(WeekChange(pk, profile_id, week_start, old, (done, coins, rate)))
+    return changes
+
+
+def apply_changes(changes):
+    """Write diff_progress() output and rebuild the affected rollups."""
+    if not changes:
+        return
+    now = timezone.now()
+    updated, created = [], []
+    for change in changes:
+        done, coins, rate = change.new
+        row = Progress(
+            pk=change.pk, profile_id=change.profile_id, week_start=change.week_start,
+            habits_completed=done, fish_coins_earned=coins, completion_rate=rate,
+            created_at=now, updated_at=now,
+        )
+        (created if change.pk is None else updated).append(row)
+
+    with transaction.atomic():
+        Progress.objects.bulk_update(
+            updated, ["habits_completed", "fish_coins_earned", "completion_rate", "updated_at"],
+            batch_size=1000,
+        )
+        Progress.objects.bulk_create(created, batch_size=1000, ignore_conflicts=True)
+        rebuild_rollups({change.profile_id for change in changes})
+
+
+def _diff_chunk(user_ids):
+    started = time.monotonic()
+    changes = diff_progress(user_ids)
+    return len(user_ids), changes, time.monotonic() - started
+
+
+def _user_chunks(chunk_size, user_ids=None):
+    """Lists of at most `chunk_size` user ids, walking the user table by primary key."""
+    if user_ids is not None:
+        user_ids = sorted(user_ids)
+        return [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+    chunks = []
+    lower = None
+    while True:
+        users = User.objects.order_by("pk").values_list("pk", flat=True)
+        if lower is not None:
+            users = users.filter(pk__gt=lower)
+        chunk = list(users[:chunk_size])
+        if not chunk:
+            return chunks
+        chunks.append(chunk)
+        lower = chunk[-1]
+
+
+def rebuild_all_progress(chunk_size=500, workers=1, dry_run=False, user_ids=None, report=None):
+    """
+    Rebuild Progress for all users (or `user_ids`), `chunk_size` at a time.
+
+    With workers > 1 chunks are diffed in a process pool; writes always
+    happen in this process, one transaction per chunk. Nothing is written
+    when dry_run is True.
+
+    `report(chunk, users, changes, seconds)` is called for every chunk, in
+    order. Returns the totals as (users, rows_updated, rows_created).
+    """
+    chunks = _user_chunks(chunk_size, user_ids)
+    totals = [0, 0, 0]
+
+    def consume(results):
+        for number, (users, changes, seconds) in enumerate(results, 1):
+            if not dry_run:
+                apply_changes(changes)
+            created = sum(1 for change in changes if change.pk is None)
+            totals[0] += users
+            totals[1] += len(changes) - created
+            totals[2] += created
+            if report is not None:
+                report(number, users, changes, seconds)
+
+    if workers > 1 and len(chunks) > 1:
+        # children must open their own database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            consume(pool.map(_diff_chunk, chunks))
+    else:
+        consume(map(_diff_chunk, chunks))
+    return tuple(totals)
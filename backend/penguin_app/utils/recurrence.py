@@ -0,0 +1,357 @@
+"""
+Recurring calendar events for Pocket Penguin.
+
+A recurring CalendarEvent stores its first occurrence in start_time/end_time
+and an RRULE (RFC 5545) in `recurrence`. Occurrences are never stored; they
+are generated on demand, and only inside the window being viewed:
+
+    FREQ=DAILY|WEEKLY|MONTHLY|YEARLY   required
+    INTERVAL=n                          every n days/weeks/months/years
+    BYDAY=MO,WE,FR                      weekdays, WEEKLY only (weeks start Monday)
+    COUNT=n | UNTIL=20261231[T235959Z]  optional end of the series
+
+INTERVAL and COUNT are capped (MAX_INTERVAL, MAX_COUNT), and generation
+stops at the end of the datetime range (year 9999).
+
+For DAILY and WEEKLY rules the generator jumps straight to the first period
+that can reach the window instead of walking from the first occurrence, so a
+series that started years ago costs the same as a new one. Occurrences are
+computed on local wall-clock time, so "09:00 every Monday" stays at 09:00
+across DST changes.
+
+Per-occurrence exceptions (CalendarEventException) cancel or move a single
+occurrence, identified by its original start (checked by is_occurrence()).
+
+expand_window() caches the expanded occurrences per (user, window). The key
+includes each series' id and updated_at, and saving an exception touches its
+series, so edits change the key and stale entries simply expire.
+"""
+
+import hashlib
+from collections import namedtuple
+from datetime import MAXYEAR, datetime, time, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models.calendar_models import CalendarEvent, CalendarEventException
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+CACHE_TIMEOUT = 60 * 60
+MAX_INTERVAL = 1000
+MAX_COUNT = 1000
+
+Rule = namedtuple("Rule", "freq interval byday count until")
+
+Occurrence = namedtuple(
+    "Occurrence", "event_id title description start_time end_time original_start exception_id"
+)
+
+
+def parse_rrule(text):
+    """
+    Parse the supported RRULE subset into a Rule.
+
+    Raises:
+        ValueError: If the rule is malformed or uses unsupported parts
+    """
+    text = text.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+
+    parts = {}
+    for part in filter(None, text.split(";")):
+        name, sep, value = part.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Malformed rule part: {part!r}")
+        parts[name.strip().upper()] = value.strip().upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}.")
+
+    interval = _positive_int(parts.pop("INTERVAL", "1"), "INTERVAL", MAX_INTERVAL)
+    count = parts.pop("COUNT", None)
+    count = _positive_int(count, "COUNT", MAX_COUNT) if count is not None else None
+    until = parts.pop("UNTIL", None)
+    until = _parse_until(until) if until is not None else None
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL cannot be combined.")
+
+    byday = parts.pop("BYDAY", None)
+    if byday is not None:
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY.")
+        days = byday.split(",")
+        if any(day not in WEEKDAYS for day in days):
+            raise ValueError("BYDAY takes weekday codes like MO,WE,FR.")
+        byday = tuple(sorted({WEEKDAYS.index(day) for day in days}))
+
+    if parts:
+        raise ValueError(f"Unsupported rule parts: {', '.join(sorted(parts))}")
+    return Rule(freq, interval, byday, count, until)
+
+
+def _positive_int(value, name, maximum):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise ValueError(f"{name} must be a positive integer.")
+    if number > maximum:
+        raise ValueError(f"{name} cannot be more than {maximum}.")
+    return number
+
+
+def _parse_until(value):
+    """UNTIL as an aware datetime; a bare date means the end of that day."""
+    try:
+        if "T" not in value:
+            day = datetime.strptime(value, "%Y%m%d").date()
+            return timezone.make_aware(datetime.combine(day, time.max))
+        if value.endswith("Z"):
+            return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=dt_timezone.utc)
+        return timezone.make_aware(datetime.strptime(value, "%Y%m%dT%H%M%S"))
+    except ValueError:
+        raise ValueError("UNTIL must look like 20261231 or 20261231T235959Z.")
+
+
+def iter_local_starts(rule, dtstart, after=None):
+    """
+    Yield (index, start) for each occurrence of `rule`, in order, as naive
+    local datetimes. `index` is the occurrence number from 0, used for COUNT.
+
+    With `after`, DAILY and WEEKLY rules skip whole periods ending before it;
+    the first yielded start may still be earlier than `after`. The series
+    stops at the last start that fits in a datetime.
+    """
+    if rule.freq in ("DAILY", "WEEKLY") and rule.byday is None:
+        step = timedelta(days=rule.interval * (7 if rule.freq == "WEEKLY" else 1))
+        k = max(0, (after - dtstart) // step) if after is not None else 0
+        while True:
+            try:
+                start = dtstart + k * step
+            except OverflowError:
+                return
+            yield k, start
+            k += 1
+
+    elif rule.freq == "WEEKLY":
+        step = timedelta(weeks=rule.interval)
+        week0 = _week0(dtstart)
+        first_week = _first_week(rule, dtstart)
+        k = max(0, (after - week0) // step) if after is not None else 0
+        index = 0 if k == 0 else len(first_week) + (k - 1) * len(rule.byday)
+        while True:
+            for day in (first_week if k == 0 else rule.byday):
+                try:
+                    start = week0 + k * step + timedelta(days=day)
+                except OverflowError:
+                    return
+                yield index, start
+                index += 1
+            k += 1
+
+    else:
+        months = rule.interval * (12 if rule.freq == "YEARLY" else 1)
+        k = 0
+        if after is not None and rule.count is None:
+            behind = (after.year - dtstart.year) * 12 + after.month - dtstart.month
+            k = max(0, behind // months - 1)
+        index = 0
+        while True:
+            total = dtstart.month - 1 + k * months
+            year, month = dtstart.year + total // 12, total % 12 + 1
+            if year > MAXYEAR:
+                return
+            k += 1
+            try:
+                start = dtstart.replace(year=year, month=month)
+            except ValueError:
+                continue  # e.g. the 31st in a 30-day month: no occurrence
+            yield index, start
+            index += 1
+
+
+def series_end(event, rule=None):
+    """
+    End of the last occurrence of a recurring event, or None if the series
+    never ends. Stored on the event as recurrence_end for range queries.
+    """
+    rule = rule or parse_rrule(event.recurrence)
+    duration = event.end_time - event.start_time
+    if rule.until is not None:
+        return max(rule.until, event.start_time) + duration
+    if rule.count is None:
+        return None
+    tz = timezone.get_current_timezone()
+    dtstart = timezone.localtime(event.start_time, tz).replace(tzinfo=None)
+    last = _last_local_start(rule, dtstart)
+    if last is None:
+        return None  # runs past the end of the datetime range
+    try:
+        return timezone.make_aware(last, tz) + duration
+    except OverflowError:
+        return None
+
+
+def _week0(dtstart):
+    """Monday of dtstart's week, at dtstart's time of day."""
+    return datetime.combine(dtstart.date() - timedelta(days=dtstart.weekday()), dtstart.time())
+
+
+def _first_week(rule, dtstart):
+    """BYDAY weekdays of the first week that fall on or after dtstart."""
+    return [day for day in rule.byday if _week0(dtstart) + timedelta(days=day) >= dtstart]
+
+
+def _last_local_start(rule, dtstart):
+    """
+    Local start of occurrence number rule.count - 1, or None if it doesn't
+    fit in a datetime.
+    """
+    n = rule.count - 1
+    try:
+        if rule.freq in ("DAILY", "WEEKLY") and rule.byday is None:
+            step = timedelta(days=rule.interval * (7 if rule.freq == "WEEKLY" else 1))
+            return dtstart + n * step
+        if rule.freq == "WEEKLY":
+            step = timedelta(weeks=rule.interval)
+            first_week = _first_week(rule, dtstart)
+            if n < len(first_week):
+                return _week0(dtstart) + timedelta(days=first_week[n])
+            k, position = divmod(n - len(first_week), len(rule.byday))
+            return _week0(dtstart) + (k + 1) * step + timedelta(days=rule.byday[position])
+        if dtstart.day <= 28:  # every month has the day: no skipped occurrences
+            total = dtstart.month - 1 + n * rule.interval * (12 if rule.freq == "YEARLY" else 1)
+            return dtstart.replace(year=dtstart.year + total // 12, month=total % 12 + 1)
+    except (OverflowError, ValueError):
+        return None
+    # later days are skipped in shorter months; COUNT is capped, so walk
+    for index, start in iter_local_starts(rule, dtstart):
+        if index == n:
+            return start
+    return None
+
+
+def is_occurrence(event, start):
+    """
+    True if the recurring `event` has an occurrence starting at `start`
+    (an aware datetime), i.e. one an exception's original_start can name.
+    """
+    rule = parse_rrule(event.recurrence)
+    tz = timezone.get_current_timezone()
+    dtstart = timezone.localtime(event.start_time, tz).replace(tzinfo=None)
+    local = timezone.localtime(start, tz).replace(tzinfo=None)
+    for index, local_start in iter_local_starts(rule, dtstart, local):
+        if (rule.count is not None and index >= rule.count) or local_start > local:
+            return False
+        aware = timezone.make_aware(local_start, tz)
+        if rule.until is not None and aware > rule.until:
+            return False
+        if aware == start:
+            return True
+    return False
+
+
+def occurrences(event, window_start, window_end, exceptions=()):
+    """
+    Occurrences of `event` overlapping [window_start, window_end), in order.
+
+    `exceptions` are the event's CalendarEventException rows; cancelled ones
+    remove an occurrence, the others replace it with their own times/title.
+    """
+    duration = event.end_time - event.start_time
+    if not event.recurrence:
+        if event.start_time < window_end and event.end_time > window_start:
+            return [_occurrence(event, event.start_time, event.end_time)]
+        return []
+
+    rule = parse_rrule(event.recurrence)
+    overridden = {exception.original_start: exception for exception in exceptions}
+    tz = timezone.get_current_timezone()
+    dtstart = timezone.localtime(event.start_time, tz).replace(tzinfo=None)
+    after = timezone.localtime(window_start - duration, tz).replace(tzinfo=None)
+
+    found = []
+    for index, local_start in iter_local_starts(rule, dtstart, after):
+        if rule.count is not None and index >= rule.count:
+            break
+        start = timezone.make_aware(local_start, tz)
+        if start >= window_end or (rule.until is not None and start > rule.until):
+            break
+        if start + duration <= window_start or start in overridden:
+            continue
+        found.append(_occurrence(event, start, start + duration))
+
+    for exception in exceptions:
+        if exception.is_cancelled:
+            continue
+        start = exception.start_time or exception.original_start
+        end = exception.end_time or start + duration
+        if start < window_end and end > window_start:
+            found.append(_occurrence(event, start, end, exception))
+
+    found.sort(key=lambda occurrence: occurrence.start_time)
+    return found
+
+
+def _occurrence(event, start, end, exception=None):
+    return Occurrence(
+        event_id=event.pk,
+        title=(exception and exception.title) or event.title,
+        description=(exception and exception.description) or event.description,
+        start_time=start,
+        end_time=end,
+        original_start=exception.original_start if exception else (start if event.recurrence else None),
+        exception_id=exception.pk if exception else None,
+    )
+
+
+def expand_window(user, window_start, window_end):
+    """
+    All of the user's occurrences overlapping [window_start, window_end),
+    one-off events included, ordered by start time.
+    """
+    # One-off events skip model instances: with thousands of events per
+    # month, building them costs more than the query itself
+    singles = (
+        CalendarEvent.overlapping(user, window_start, window_end)
+        .filter(recurrence="")
+        .order_by("start_time", "id")
+        .values_list("id", "title", "description", "start_time", "end_time")
+    )
+    series = list(
+        CalendarEvent.objects.filter(user=user, start_time__lt=window_end)
+        .exclude(recurrence="")
+        .filter(Q(recurrence_end__isnull=True) | Q(recurrence_end__gt=window_start))
+        .order_by("id")
+    )
+
+    expanded = []
+    if series:
+        digest = hashlib.sha1(
+            ";".join(f"{event.pk}@{event.updated_at.timestamp()}" for event in series).encode()
+        ).hexdigest()
+        key = f"calendar:occurrences:{user.pk}:{window_start.timestamp()}:{window_end.timestamp()}:{digest}"
+        expanded = cache.get(key)
+        if expanded is None:
+            exceptions = {}
+            for exception in CalendarEventException.objects.filter(event__in=series):
+                exceptions.setdefault(exception.event_id, []).append(exception)
+            expanded = [
+                occurrence
+                for event in series
+                for occurrence in occurrences(event, window_start, window_end, exceptions.get(event.pk, ()))
+            ]
+            cache.set(key, expanded, CACHE_TIMEOUT)
+
+    result = [Occurrence(*row, original_start=None, exception_id=None) for row in singles]
+    result.extend(expanded)
+    result.sort(key=lambda occurrence: (occurrence.start_time, str(occurrence.event_id)))
+    return result
+
@@ -0,0 +1,146 @@
+"""
+Per-user response cache for Pocket Penguin.
+
+The home and stats screens poll the progress endpoints, whose data only
+changes when the user completes a habit (or their progress is edited).
+Their responses are cached under keys that include a per-profile version
+token, and every write path bumps the version once its transaction
+commits:
+
+    - apply_progress_change() / rebuild_rollups()  (utils/progress.py)
+    - award_completion(), on every completion     (utils/habits.py)
+    - recompute_streaks()                          (utils/streaks.py)
+    - UserGameProfile post_save / post_delete      (apps.py)
+
+A hit is never older than the last committed change as long as every
+process (web workers, management commands) shares one cache: settings.CACHES
+uses a file-based cache for that, or CACHE_BACKEND / CACHE_LOCATION for a
+shared server such as Redis across hosts. With a per-process cache (e.g.
+LocMemCache) a bump only reaches its own process and other processes may
+serve data up to RESPONSE_CACHE_TIMEOUT old.
+
+A bump writes a new random token instead of incrementing a counter: on a
+file cache incr() is a read-modify-write, so two processes bumping at once
+could both write the same next value and a bump would be lost. Whichever
+of two concurrent bumps lands last, the token is new, so nothing cached
+before either bump is served again.
+
+Together with the cached request.user (authentication.py) a hit runs no
+queries at all. Hits and misses are counted per cache name in each process
+and served to staff at /api/monitoring/cache/.
+"""
+
+import threading
+import uuid
+from collections import Counter
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+RESPONSE_CACHE_TIMEOUT = 5 * 60  # seconds
+# version counters outlive the entries they guard
+VERSION_TIMEOUT = 24 * 60 * 60
+
+_stats_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+
+
+def _version_key(profile_id):
+    return f"user-data:version:{profile_id}"
+
+
+def _new_version():
+    # unique, so it can't line up with entries cached under an earlier one
+    return uuid.uuid4().hex
+
+
+def data_version(profile_id):
+    """The profile's current data version; see bump_data_version()."""
+    key = _version_key(profile_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(profile_id):
+    """Make every cached response for `profile_id` stale."""
+    cache.set(_version_key(profile_id), _new_version(), VERSION_TIMEOUT)
+
+
+def bump_data_version_on_commit(profile_id):
+    """bump_data_version() once the current transaction commits (now if there is none)."""
+    transaction.on_commit(lambda: bump_data_version(profile_id))
+
+
+def profile_changed(sender, instance, **kwargs):
+    """post_save/post_delete receiver for UserGameProfile."""
+    bump_data_version_on_commit(instance.pk)
+
+
+def get_or_compute(name, profile_id, variant, compute, timeout=RESPONSE_CACHE_TIMEOUT):
+    """
+    Return the cached value of `name` for this profile and `variant` (e.g.
+    the query string), calling compute() and caching the result on a miss.
+    """
+    key = f"user-data:{name}:{profile_id}:{data_version(profile_id)}:{variant}"
+    value = cache.get(key)
+    hit = value is not None
+    with _stats_lock:
+        (_hits if hit else _misses)[name] += 1
+    if not hit:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+def cache_stats():
+    """{name: {"hits", "misses", "hit_rate"}} for this process."""
+    with _stats_lock:
+        names = sorted(_hits.keys() | _misses.keys())
+        stats = {}
+        for name in names:
+            hits, misses = _hits[name], _misses[name]
+            stats[name] = {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 4)}
+        return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _hits.clear()
+        _misses.clear()
+
+
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def cache_per_user(name):
+    """
+    Decorator for a view's get() that caches successful responses per user
+    (see the module docstring). `name` labels the keys and the hit stats.
+    """
+    def decorator(get):
+        @wraps(get)
+        def cached_get(view, request, *args, **kwargs):
+            def render():
+                response = get(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    raise _Uncacheable(response)
+                return response.data
+
+            # "today" feeds into defaults such as the current month
+            variant = f"{timezone.localdate()}:{request.get_full_path()}"
+            try:
+                data = get_or_compute(name, request.user.profile.pk, variant, render)
+            except _Uncacheable as e:
+                return e.response
+            return Response(data)
+        return cached_get
+    return decorator
@@ -0,0 +1,189 @@
+"""
+JWT revocation for Pocket Penguin.
+
+Logout records the JTIs of the user's tokens in the revoked_tokens table
+(models/token_models.py). Refresh-token rotation does the same for the old
+refresh token, claiming it with a plain insert so that only one of two
+concurrent refreshes can use it (claim_token). Checking every request against that table would add a
+query per API call, so each worker keeps an in-memory copy instead:
+
+    - a Bloom filter of every revoked, unexpired JTI (~2 bytes per token),
+      which answers "not revoked" for normal tokens with no query at all;
+    - a small exact map of JTIs whose answer is already known. Revocations
+      the worker has read or made itself go in as True. Bloom hits
+      confirmed against the table (false positives, about 1 in 2,000)
+      go in as True or False.
+
+At most once per REFRESH_INTERVAL a request also reads the rows revoked
+since the previous read (an indexed range on revoked_at), so a logout on
+one worker reaches the others within about a second. Every
+REBUILD_INTERVAL, or when the filter fills up, it is rebuilt from the
+table. Rows for expired tokens are dropped then and pruned on the next
+revocation.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from ..models.token_models import RevokedToken
+
+REFRESH_INTERVAL = 1.0  # seconds
+REBUILD_INTERVAL = 60 * 60  # seconds
+MIN_CAPACITY = 10_000
+BITS_PER_TOKEN = 16
+HASHES = 11
+# incremental reads overlap the previous one by this much, so a row whose
+# transaction committed slightly after its revoked_at timestamp isn't missed
+OVERLAP = timedelta(seconds=5)
+MAX_KNOWN = 10_000
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter of strings."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.size = capacity * BITS_PER_TOKEN
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(HASHES)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """This process's view of revoked_tokens; see the module docstring."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next check reloads from the table."""
+        self._bloom = None
+        self._known = {}
+        self._read_until = None
+        self._next_refresh = 0.0
+        self._next_rebuild = 0.0
+
+    def is_revoked(self, jti):
+        self._maybe_refresh()
+        if jti not in self._bloom:
+            return False
+        revoked = self._known.get(jti)
+        if revoked is None:
+            revoked = RevokedToken.objects.filter(jti=jti).exists()
+            self._remember(jti, revoked)
+        return revoked
+
+    def add(self, jti):
+        """Record a revocation made by this process, effective immediately."""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+                self._remember(jti, True)
+
+    def _remember(self, jti, revoked):
+        if len(self._known) >= MAX_KNOWN:
+            self._known.clear()
+        self._known[jti] = revoked
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        with self._lock:
+            if now < self._next_refresh:
+                return
+            if self._bloom is None or now >= self._next_rebuild or self._bloom.count >= self._bloom.capacity:
+                self._rebuild(now)
+            else:
+                self._read_new()
+            self._next_refresh = now + REFRESH_INTERVAL
+
+    def _rebuild(self, now):
+        started = timezone.now()
+        jtis = list(RevokedToken.objects.filter(expires_at__gt=started).values_list("jti", flat=True))
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(jtis)))
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._known = {}
+        self._read_until = started
+        self._next_rebuild = now + REBUILD_INTERVAL
+
+    def _read_new(self):
+        started = timezone.now()
+        new = RevokedToken.objects.filter(
+            revoked_at__gte=self._read_until - OVERLAP, expires_at__gt=started,
+        ).values_list("jti", flat=True)
+        for jti in new:
+            self._bloom.add(jti)
+            self._remember(jti, True)
+        self._read_until = started
+
+
+revoked_tokens = RevocationList()
+
+
+def is_revoked(token):
+    """True if the validated simplejwt token has been revoked."""
+    jti = token.get(api_settings.JTI_CLAIM)
+    return jti is not None and revoked_tokens.is_revoked(jti)
+
+
+def _revoked_row(token):
+    return RevokedToken(
+        jti=token[api_settings.JTI_CLAIM],
+        user_id=token[api_settings.USER_ID_CLAIM],
+        expires_at=datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc),
+    )
+
+
+def claim_token(token):
+    """
+    Revoke a validated simplejwt token, returning False if it was already
+    revoked. The insert is the check, so of two concurrent claims of the
+    same token exactly one succeeds.
+    """
+    row = _revoked_row(token)
+    try:
+        with transaction.atomic():
+            row.save(force_insert=True)
+    except IntegrityError:
+        revoked_tokens.add(row.jti)
+        return False
+    revoked_tokens.add(row.jti)
+    return True
+
+
+def revoke_tokens(tokens):
+    """Revoke simplejwt tokens (access or refresh) until they expire."""
+    now = timezone.now()
+    rows = [_revoked_row(token) for token in tokens]
+    rows = [row for row in rows if row.expires_at > now]
+    if not rows:
+        return
+    RevokedToken.objects.bulk_create(rows, ignore_conflicts=True)
+    RevokedToken.objects.filter(expires_at__lte=now).delete()
+    for row in rows:
+        revoked_tokens.add(row.jti)
@@ -1 +1,146 @@
+"""
+Batch streak engine for Pocket Penguin.
 
+Recomputes current and best streaks from the HabitCompletion log for many
+habits at once, rather than trusting the counters that the completion
+pipeline advances one day at a time (those drift when a day is backfilled
+or edited). Also maintains UserGameProfile.streak_days: the number of
+consecutive days on which the user completed at least one habit.
+
+Run lengths are found without comparing neighbouring days one by one: in a
+sorted list of distinct days, consecutive days share the same
+(day ordinal - position) key, so a single groupby pass yields every run.
+
+Used by `manage.py recompute_streaks`.
+"""
+
+import time
+from collections import defaultdict
+from itertools import groupby
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models.habit_models import Habit, HabitCompletion
+from ..models.user_models import User, UserGameProfile
+from .response_cache import bump_data_version_on_commit
+
+__all__ = ["streak_lengths", "recompute_streaks", "recompute_all_streaks"]
+
+
+def streak_lengths(days, today):
+    """
+    Return (current, best) streak lengths for an ascending sequence of
+    distinct dates.
+
+    The current streak is the last run if it ends today or yesterday (the
+    user still has today to keep it alive), otherwise 0.
+    """
+    ordinals = [day.toordinal() for day in days]
+    current = best = 0
+    last_end = None
+
+    for _, run in groupby(enumerate(ordinals), key=lambda item: item[1] - item[0]):
+        run = list(run)
+        length = len(run)
+        best = max(best, length)
+        last_end = run[-1][1]
+        current = length
+
+    if last_end is None or last_end < today.toordinal() - 1:
+        current = 0
+    return current, best
+
+
+def recompute_streaks(user_ids, today=None):
+    """
+    Recompute streaks for every habit and game profile of the given users.
+
+    Reads the completed days of all their habits in one ordered query and
+    writes only the rows whose values changed with bulk_update.
+
+    Returns (habits_updated, profiles_updated).
+    """
+    if today is None:
+        today = timezone.now().date()
+    user_ids = list(user_ids)
+
+    habit_days = defaultdict(list)
+    user_days = defaultdict(set)
+    rows = (
+        HabitCompletion.objects.filter(user_id__in=user_ids, completed=True)
+        .order_by("habit_id", "day")
+        .values_list("user_id", "habit_id", "day")
+    )
+    for user_id, habit_id, day in rows.iterator(chunk_size=5000):
+        habit_days[habit_id].append(day)
+        user_days[user_id].add(day)
+
+    changed_habits = []
+    habits = Habit.objects.filter(user_id__in=user_ids).only("id", "streak", "best_streak", "updated_at")
+    for habit in habits:
+        current, best = streak_lengths(habit_days.get(habit.pk, ()), today)
+        # Never lower a best streak recorded before the log existed
+        best = max(best, habit.best_streak)
+        if (habit.streak, habit.best_streak) != (current, best):
+            habit.streak, habit.best_streak = current, best
+            changed_habits.append(habit)
+
+    changed_profiles = []
+    for profile in UserGameProfile.objects.filter(user_id__in=user_ids).only("id", "user_id", "streak_days"):
+        current, _ = streak_lengths(sorted(user_days.get(profile.user_id, ())), today)
+        if profile.streak_days != current:
+            profile.streak_days = current
+            changed_profiles.append(profile)
+
+    # bulk_update skips auto_now, but delta sync relies on updated_at
+    now = timezone.now()
+    for habit in changed_habits:
+        habit.updated_at = now
+    # ...and so do the leaderboards (utils/leaderboard.py)
+    for profile in changed_profiles:
+        profile.updated_at = now
+
+    with transaction.atomic():
+        Habit.objects.bulk_update(
+            changed_habits, ["streak", "best_streak", "updated_at"], batch_size=1000
+        )
+        UserGameProfile.objects.bulk_update(
+            changed_profiles, ["streak_days", "updated_at"], batch_size=1000
+        )
+        for profile in changed_profiles:
+            bump_data_version_on_commit(profile.pk)
+
+    return len(changed_habits), len(changed_profiles)
+
+
+def recompute_all_streaks(chunk_size=500, today=None, report=None):
+    """
+    Run recompute_streaks over all users, `chunk_size` users at a time,
+    walking the user table by primary key.
+
+    `report(chunk, users, habits_updated, profiles_updated, seconds)` is
+    called after every chunk. Returns the totals as
+    (users, habits_updated, profiles_updated).
+    """
+    totals = [0, 0, 0]
+    chunk = 0
+    lower = None
+
+    while True:
+        users = User.objects.order_by("pk").values_list("pk", flat=True)
+        if lower is not None:
+            users = users.filter(pk__gt=lower)
+        user_ids = list(users[:chunk_size])
+        if not user_ids:
+            return tuple(totals)
+
+        started = time.monotonic()
+        habits_updated, profiles_updated = recompute_streaks(user_ids, today)
+        chunk += 1
+        totals[0] += len(user_ids)
+        totals[1] += habits_updated
+        totals[2] += profiles_updated
+        if report is not None:
+            report(chunk, len(user_ids), habits_updated, profiles_updated, time.monotonic() - started)
+        lower = user_ids[-1]
@@ -25,29 +25,247 @@
 #         # Only allow operations on events belonging to the logged-in user
 #         return CalendarEvent.objects.filter(user=self.request.user)
 
-from rest_framework import generics, permissions
-from penguin_app.models.calendar_models import CalendarEvent
-from penguin_app.serializers.calendar_serializers import CalendarEventSerializer
+from datetime import datetime, time
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from penguin_app.models.calendar_models import CalendarEvent, CalendarEventException
+from penguin_app.serializers.calendar_serializers import (
+    CalendarEventExceptionSerializer,
+    CalendarEventSerializer,
+    CalendarOccurrenceSerializer,
+)
+from penguin_app.utils.freebusy import event_conflicts, freebusy
+from penguin_app.utils.ics import import_ics, iter_ics
+from penguin_app.utils.recurrence import expand_window
+
+
+class EventConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This event overlaps other events."
+    default_code = "conflict"
+
+
+# Shared by create and update: ?on_conflict=reject refuses an event that
+# overlaps others (409), ?on_conflict=flag saves it and lists the overlaps
+class ConflictCheckMixin:
+    conflict_modes = ("reject", "flag")
+
+    def check_conflicts(self, serializer, instance=None):
+        mode = self.request.query_params.get("on_conflict")
+        if mode is None:
+            return None
+        if mode not in self.conflict_modes:
+            raise ValidationError({"on_conflict": f"Use one of: {', '.join(self.conflict_modes)}."})
+
+        conflicts = CalendarOccurrenceSerializer(
+            event_conflicts(self.request.user, serializer.validated_data, instance), many=True
+        ).data
+        if conflicts and mode == "reject":
+            raise EventConflict({"detail": EventConflict.default_detail, "conflicts": conflicts})
+        return conflicts
+
+    def with_conflicts(self, response, conflicts):
+        if conflicts is not None:
+            response.data = {**response.data, "conflicts": conflicts}
+        return response
+
 
 # This class is for showing all the user's events AND making new ones
-class CalendarEventListCreate(generics.ListCreateAPIView):
+class CalendarEventListCreate(ConflictCheckMixin, generics.ListCreateAPIView):
     serializer_class = CalendarEventSerializer
     permission_classes = [permissions.IsAuthenticated]  # only logged-in people allowed
 
     def get_queryset(self):
-        # give back ONLY the events that belong to the person who is logged in
-        return CalendarEvent.objects.filter(user=self.request.user)
+        # give back ONLY the events that belong to the person who is logged in,
+        # oldest first so the cursor pagination can walk through them.
+        # ?start=&end= narrows it to events overlapping that window (month view)
+        start = self.request.query_params.get("start")
+        end = self.request.query_params.get("end")
+        if start is None and end is None:
+            events = CalendarEvent.objects.filter(user=self.request.user)
+        else:
+            start, end = parse_window_bound("start", start), parse_window_bound("end", end)
+            if end <= start:
+                raise ValidationError({"end": "end must be after start."})
+            events = CalendarEvent.overlapping(self.request.user, start, end)
+        return events.order_by("start_time", "id")
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        conflicts = self.check_conflicts(serializer)
+        self.perform_create(serializer)
+        response = Response(serializer.data, status=status.HTTP_201_CREATED)
+        return self.with_conflicts(response, conflicts)
 
     def perform_create(self, serializer):
         # when we make a new event, we stick the logged-in user onto it
         serializer.save(user=self.request.user)
 
 
+# This class is for "when am I free?": merged busy blocks and the gaps
+# between them (GET /calendar/freebusy/?start=&end=)
+class CalendarFreeBusy(APIView):
+    permission_classes = [permissions.IsAuthenticated]  # only logged-in people allowed
+    max_window_days = 366
+
+    def get(self, request):
+        start = parse_window_bound("start", request.query_params.get("start"))
+        end = parse_window_bound("end", request.query_params.get("end"))
+        if end <= start:
+            raise ValidationError({"end": "end must be after start."})
+        if (end - start).days > self.max_window_days:
+            raise ValidationError({"end": f"Windows can be at most {self.max_window_days} days."})
+
+        busy, free = freebusy(request.user, start, end)
+        return Response({
+            "start": start,
+            "end": end,
+            "busy": [{"start": block_start, "end": block_end} for block_start, block_end in busy],
+            "free": [{"start": gap_start, "end": gap_end} for gap_start, gap_end in free],
+        })
+
+
+# This class is for the month/week view: every occurrence in a window,
+# with repeating events expanded (GET /calendar/occurrences/?start=&end=)
+class CalendarOccurrenceList(APIView):
+    permission_classes = [permissions.IsAuthenticated]  # only logged-in people allowed
+    max_window_days = 366
+
+    def get(self, request):
+        start = parse_window_bound("start", request.query_params.get("start"))
+        end = parse_window_bound("end", request.query_params.get("end"))
+        if end <= start:
+            raise ValidationError({"end": "end must be after start."})
+        if (end - start).days > self.max_window_days:
+            raise ValidationError({"end": f"Windows can be at most {self.max_window_days} days."})
+
+        occurrences = expand_window(request.user, start, end)
+        return Response({"results": CalendarOccurrenceSerializer(occurrences, many=True).data})
+
+
+def parse_window_bound(name, value):
+    """Parse an ISO date or datetime query param; dates mean midnight."""
+    if not value:
+        raise ValidationError({name: "start and end are both required."})
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Use an ISO 8601 date or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 # This class is for looking at ONE event, changing it, or deleting it
-class CalendarEventRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
+class CalendarEventRetrieveUpdateDestroy(ConflictCheckMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CalendarEventSerializer
     permission_classes = [permissions.IsAuthenticated]  # only logged-in people allowed
 
     def get_queryset(self):
         # same thing here — only let the user touch their own events
         return CalendarEvent.objects.filter(user=self.request.user)
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop("partial", False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        conflicts = self.check_conflicts(serializer, instance)
+        self.perform_update(serializer)
+        return self.with_conflicts(Response(serializer.data), conflicts)
+
+
+# This class is for skipping or moving ONE occurrence of a repeating event
+class CalendarEventExceptionListCreate(generics.ListCreateAPIView):
+    serializer_class = CalendarEventExceptionSerializer
+    permission_classes = [permissions.IsAuthenticated]  # only logged-in people allowed
+    pagination_class = None  # a series only has a handful of these
+
+    def get_event(self):
+        # the repeating event has to be one of the user's own
+        if not hasattr(self, "_event"):
+            self._event = get_object_or_404(CalendarEvent, pk=self.kwargs["pk"], user=self.request.user)
+        return self._event
+
+    def get_serializer_context(self):
+        # original_start is checked against the series' occurrences
+        return {**super().get_serializer_context(), "event": self.get_event()}
+
+    def get_queryset(self):
+        return CalendarEventException.objects.filter(event=self.get_event()).order_by("original_start")
+
+    def perform_create(self, serializer):
+        event = self.get_event()
+        if not event.recurrence:
+            raise ValidationError({"event": "Only repeating events have occurrences to change."})
+        original_start = serializer.validated_data["original_start"]
+        if event.exceptions.filter(original_start=original_start).exists():
+            raise ValidationError({"original_start": "This occurrence already has a change."})
+        serializer.save(event=event)
+
+
+# This class is for looking at, changing or undoing ONE of those changes
+class CalendarEventExceptionRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = CalendarEventExceptionSerializer
+    permission_classes = [permissions.IsAuthenticated]  # only logged-in people allowed
+    lookup_url_kwarg = "exception_pk"
+
+    def get_queryset(self):
+        # only changes to the user's own events
+        return CalendarEventException.objects.filter(
+            event_id=self.kwargs["pk"], event__user=self.request.user,
+        ).select_related("event")
+
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        original_start = serializer.validated_data.get("original_start", instance.original_start)
+        taken = CalendarEventException.objects.filter(event_id=instance.event_id, original_start=original_start)
+        if taken.exclude(pk=instance.pk).exists():
+            raise ValidationError({"original_start": "This occurrence already has a change."})
+        serializer.save()
+
+
+# This class is for downloading the whole calendar as an .ics file
+# (GET /calendar/export.ics), streamed so big calendars don't fill memory
+class CalendarExportIcs(APIView):
+    permission_classes = [permissions.IsAuthenticated]  # only logged-in people allowed
+
+    def get(self, request):
+        response = StreamingHttpResponse(iter_ics(request.user), content_type="text/calendar; charset=utf-8")
+        response["Content-Disposition"] = 'attachment; filename="pocket-penguin.ics"'
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+# This class is for uploading an .ics file (POST /calendar/import/ with a
+# "file" form field). Events already imported before (same UID) are skipped
+class CalendarImportIcs(APIView):
+    permission_classes = [permissions.IsAuthenticated]  # only logged-in people allowed
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "Upload an .ics file in the 'file' field."})
+
+        # iterating an uploaded file reads it line by line, from disk for big files
+        result = import_ics(request.user, upload)
+        return Response({
+            "created": result.created,
+            "duplicates": result.duplicates,
+            "skipped": result.skipped,
+        }, status=status.HTTP_201_CREATED if result.created else status.HTTP_200_OK)
@@ -0,0 +1,39 @@
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from penguin_app.utils.export import CONTENT_TYPES, EXPORTS, iter_export
+
+
+class ExportView(APIView):
+    """
+    GET /api/export/ -> stream the authenticated user's data
+
+    Query params:
+        type: comma-separated kinds (journal, habits, events, progress);
+              defaults to all of them
+        as:   "ndjson" (default) or "csv"; csv takes exactly one type
+
+    ("format" is reserved by DRF for renderer selection, hence "as".)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        types = request.query_params.get("type")
+        kinds = [kind.strip() for kind in types.split(",") if kind.strip()] if types else list(EXPORTS)
+        fmt = request.query_params.get("as", "ndjson")
+
+        try:
+            chunks = iter_export(request.user, kinds, fmt)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        name = kinds[0] if len(kinds) == 1 else "export"
+        filename = f"pocket-penguin-{name}-{timezone.now():%Y%m%d}.{fmt}"
+        response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[fmt])
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        # Stop proxies from buffering the whole body before sending it on
+        response["X-Accel-Buffering"] = "no"
+        return response
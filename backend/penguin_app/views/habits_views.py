@@ -1,15 +1,19 @@
+import binascii
 import logging
-from datetime import timedelta
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
 
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from penguin_app.models.habit_models import Habit
-from penguin_app.models.progress_models import Progress
-from penguin_app.models.user_models import UserGameProfile
+from penguin_app.models.habit_models import Habit, HabitCompletion, HabitTombstone
 from penguin_app.serializers.habit_serializers import HabitSerializer
+from penguin_app.utils.habits import complete_habit, display_week_start_for
+from penguin_app.utils.scheduler import plan_week
 
 logger = logging.getLogger(__name__)
 
@@ -27,11 +31,33 @@ class HabitListCreateView(generics.ListCreateAPIView):
         return Habit.objects.filter(
             user=self.request.user,
             is_archived=False
-        ).order_by("created_at")
+        ).order_by("created_at", "id")
+
+    def list(self, request, *args, **kwargs):
+        """Attach this week's completions from the log in one range scan."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        habits = page if page is not None else list(queryset)
+
+        week_completions = HabitCompletion.week_view(
+            request.user,
+            [habit.pk for habit in habits],
+            display_week_start_for(timezone.now().date()),
+        )
+        serializer = self.get_serializer(
+            habits,
+            many=True,
+            context={**self.get_serializer_context(), "week_completions": week_completions},
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
 
     def perform_create(self, serializer):
         """Ensure the habit is always created for the authenticated user."""
-        serializer.save(user=self.request.user)
+        habit = serializer.save(user=self.request.user)
+        if habit.today_count:
+            HabitCompletion.record(habit, timezone.now().date())
 
 
 class HabitDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -48,12 +74,155 @@ class HabitDetailView(generics.RetrieveUpdateDestroyAPIView):
         """Restrict to authenticated user's habits."""
         return Habit.objects.filter(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        """Delete the habit and leave a tombstone for delta sync clients."""
+        with transaction.atomic():
+            HabitTombstone.objects.create(habit_id=instance.pk, user=instance.user)
+            instance.delete()
+
+    def perform_update(self, serializer):
+        """Log today's count whenever progress (currentValue) changes."""
+        previous_count = serializer.instance.today_count
+        habit = serializer.save()
+        if habit.today_count != previous_count:
+            HabitCompletion.record(habit, timezone.now().date())
+
+
+class HabitChangesView(APIView):
+    """
+    GET /api/habits/changes/?since=<cursor>
+
+    Delta sync for the habit list. Returns habits created or updated since
+    the cursor (archived ones included, so clients can hide them), the ids
+    of habits deleted since then, and a new cursor to send next time.
+    Without `since` every non-archived habit is returned.
+
+    The cursor is the server time the snapshot was taken. Changes are read
+    with a small overlap so a write committing right at the boundary is
+    never missed; clients may therefore see a habit twice and should upsert.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    overlap = timedelta(seconds=5)
+
+    def get(self, request):
+        snapshot = timezone.now()
+        since = request.query_params.get("since")
+
+        habits = Habit.objects.filter(user=request.user).order_by("updated_at")
+        deleted = []
+        if since:
+            try:
+                since = self._decode_cursor(since) - self.overlap
+            except ValueError:
+                return Response(
+                    {"error": "Invalid sync cursor."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            habits = habits.filter(updated_at__gte=since)
+            deleted = HabitTombstone.objects.filter(
+                user=request.user,
+                deleted_at__gte=since,
+            ).values_list("habit_id", flat=True)
+        else:
+            habits = habits.filter(is_archived=False)
+
+        habits = list(habits)
+        week_completions = HabitCompletion.week_view(
+            request.user,
+            [habit.pk for habit in habits],
+            display_week_start_for(snapshot.date()),
+        )
+        serializer = HabitSerializer(
+            habits,
+            many=True,
+            context={"request": request, "week_completions": week_completions},
+        )
+        return Response({
+            "changed": serializer.data,
+            "deleted": [str(habit_id) for habit_id in deleted],
+            "cursor": self._encode_cursor(snapshot),
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _encode_cursor(moment):
+        return urlsafe_b64encode(moment.isoformat().encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        try:
+            moment = datetime.fromisoformat(urlsafe_b64decode(cursor.encode()).decode())
+        except (binascii.Error, UnicodeDecodeError) as e:
+            raise ValueError(str(e))
+        if timezone.is_naive(moment):
+            raise ValueError("Cursor must be timezone-aware.")
+        return moment
+
+
+class HabitPlanView(APIView):
+    """
+    GET /api/habits/plan/ -> propose time blocks for the user's habits
+
+    Fits every active habit into the free time between calendar events on
+    the days it is due. Nothing is saved.
+
+    Query params:
+        start: first day, YYYY-MM-DD (default: today)
+        days: number of days to plan, 1-14 (default: 7)
+        day_start, day_end: waking hours, HH:MM (default: 07:00 and 22:00)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_days = 14
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            first_day = parse_date(params["start"]) if "start" in params else timezone.localdate()
+            day_start = parse_time(params.get("day_start", "07:00"))
+            day_end = parse_time(params.get("day_end", "22:00"))
+        except ValueError:  # well-formed but impossible, e.g. 2026-02-30
+            first_day = day_start = day_end = None
+        try:
+            days = int(params.get("days", 7))
+        except ValueError:
+            days = 0
+
+        if first_day is None or day_start is None or day_end is None:
+            return Response(
+                {"error": "Use YYYY-MM-DD for start and HH:MM for day_start/day_end."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= days <= self.max_days or day_end <= day_start:
+            return Response(
+                {"error": f"days must be 1-{self.max_days} and day_end after day_start."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        blocks, unscheduled = plan_week(request.user, first_day, days, day_start, day_end)
+        return Response({
+            "start": first_day,
+            "days": days,
+            "blocks": [
+                {
+                    "habit_id": str(block.habit.pk),
+                    "habit_name": block.habit.name,
+                    "start_time": block.start_time,
+                    "end_time": block.end_time,
+                }
+                for block in blocks
+            ],
+            "unscheduled": [
+                {"habit_id": str(habit.pk), "habit_name": habit.name, "date": day}
+                for habit, day in unscheduled
+            ],
+        }, status=status.HTTP_200_OK)
+
 
 class HabitCompleteView(APIView):
     """
     POST /api/habits/<uuid:pk>/complete/
     
-    Mark a habit as completed for today.
+    Mark a habit as completed for today in a single transaction
+    (see penguin_app.utils.habits for the query budget).
     - Updates today_count to daily_goal
     - Updates last_completed date
     - Calculates and updates streak
@@ -64,31 +233,13 @@ class HabitCompleteView(APIView):
 
     def post(self, request, pk=None):
         try:
-            habit = Habit.objects.get(pk=pk, user=request.user)
+            habit, is_new_completion = complete_habit(request.user, pk)
         except Habit.DoesNotExist:
             logger.warning(f"Habit {pk} not found for user {request.user.id}")
             return Response(
                 {"error": "Habit not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
-
-        try:
-            is_new_completion = habit.complete_for_today()
-
-            if is_new_completion:
-                self._award_coins_and_update_progress(request.user, habit)
-                message = f"Completed! Earned {habit.reward} coins. Streak: {habit.streak} days."
-            else:
-                message = "Already completed today."
-
-            serializer = HabitSerializer(habit, context={'request': request})
-            return Response({
-                "message": message,
-                "habit": serializer.data,
-                "coins_earned": habit.reward if is_new_completion else 0,
-                "new_completion": is_new_completion
-            }, status=status.HTTP_200_OK)
-
         except Exception as e:
             logger.error(f"Error completing habit {pk}: {str(e)}")
             return Response(
@@ -96,65 +247,15 @@ class HabitCompleteView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    @staticmethod
-    def _calculate_completion_rate(user, week_start):
-        """
-        Calculate weekly completion rate.
-        
-        completion_rate = habits_completed / total_active_habits
-        Returns float between 0.0 and 1.0 (decimal format for Progress model).
-        """
-        # Count total active habits user had before or during this week
-        total_habits = Habit.objects.filter(
-            user=user,
-            start_date__lte=week_start,
-            is_archived=False
-        ).count()
-        
-        if total_habits == 0:
-            return 0.0
-        
-        # Get habits completed this week from Progress
-        from penguin_app.models.progress_models import Progress as ProgressModel
-        try:
-            progress = ProgressModel.objects.get(
-                profile=user.profile,
-                week_start=week_start
-            )
-            completion_rate = progress.habits_completed / total_habits
-            return min(1.0, completion_rate)  # Cap at 1.0 (100%)
-        except ProgressModel.DoesNotExist:
-            # If Progress not found yet, return 0
-            return 0.0
+        if is_new_completion:
+            message = f"Completed! Earned {habit.reward} coins. Streak: {habit.streak} days."
+        else:
+            message = "Already completed today."
 
-    @staticmethod
-    def _award_coins_and_update_progress(user, habit):
-        """Award coins and update weekly progress."""
-        profile, _ = UserGameProfile.objects.get_or_create(user=user)
-        profile.fish_coins += habit.reward
-        profile.save()
-
-        today = timezone.now().date()
-        week_start = today - timedelta(days=today.weekday())
-        
-        progress, _ = Progress.objects.get_or_create(
-            profile=profile,
-            week_start=week_start,
-            defaults={
-                'habits_completed': 0,
-                'todos_completed': 0,
-                'fish_coins_earned': 0,
-                'completion_rate': 0.0
-            }
-        )
-        
-        progress.habits_completed += 1
-        progress.fish_coins_earned += habit.reward
-        
-        # Calculate and set completion rate
-        progress.completion_rate = HabitCompleteView._calculate_completion_rate(
-            user,
-            week_start
-        )
-        
-        progress.save()
+        serializer = HabitSerializer(habit, context={'request': request})
+        return Response({
+            "message": message,
+            "habit": serializer.data,
+            "coins_earned": habit.reward if is_new_completion else 0,
+            "new_completion": is_new_completion
+        }, status=status.HTTP_200_OK)
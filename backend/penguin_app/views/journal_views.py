@@ -1,21 +1,50 @@
 # backend/penguin_app/views.py
-from rest_framework import generics, permissions
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.exceptions import PermissionDenied
-from penguin_app.models.journal_entry_model import JournalEntry
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from penguin_app.models.journal_entry_model import JournalEntry, JournalTag
 from penguin_app.serializers.journal_serializers import JournalEntrySerializer
+from penguin_app.pagination import KeysetPagination
+from penguin_app.utils.journal import bulk_import_entries, search_entries
 
 
 
-class JournalEntryPagination(PageNumberPagination):
+class JournalEntryPagination(KeysetPagination):
+    # Matches journal_user_date_idx (user, -date, -created_at) plus a tie-break
+    ordering = ("-date", "-created_at", "id")
     page_size = 20
-    page_size_query_param = "page_size"
     max_page_size = 100
 
 
+def save_entry(serializer, **kwargs):
+    """serializer.save(), reporting a client_id taken by a concurrent request as a 400."""
+    try:
+        with transaction.atomic():
+            serializer.save(**kwargs)
+    except IntegrityError:
+        raise ValidationError({"client_id": ["An entry with this client_id already exists."]})
+
+
+class LimitMixin:
+    """?limit= for APIViews: default_limit when missing or invalid, clamped to 1..max_limit."""
+    default_limit = 20
+    max_limit = 100
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+
 class JournalEntryListCreateView(generics.ListCreateAPIView):
     """
     GET: list all journal entries belonging to the authenticated user
+         optional filters: ?tag= (repeatable, entries must have every tag), ?mood=
     POST: create a new journal entry, automatically setting user=request.user
     """
     serializer_class = JournalEntrySerializer
@@ -24,15 +53,25 @@ class JournalEntryListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         # Only return entries that belong to the current user
-        return (
-            JournalEntry.objects.filter(user=self.request.user)
-            .select_related("user")
-            .order_by('-date', '-created_at')
-        )
+        queryset = JournalEntry.objects.filter(user=self.request.user)
+
+        mood = self.request.query_params.get("mood")
+        if mood:
+            queryset = queryset.filter(mood=mood)
+
+        # Each tag is a lookup on journal_tag_user_name_idx, not a JSON scan
+        for tag in self.request.query_params.getlist("tag"):
+            name = JournalTag.normalize(tag)
+            if name:
+                queryset = queryset.filter(id__in=JournalTag.objects.filter(
+                    user=self.request.user, name=name
+                ).values("entry_id"))
+
+        return queryset.select_related("user").order_by('-date', '-created_at', 'id')
 
     def perform_create(self, serializer):
         # Save the current user as the owner of the entry
-        serializer.save(user=self.request.user)
+        save_entry(serializer, user=self.request.user)
 
 
 class JournalEntryDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -53,10 +92,115 @@ class JournalEntryDetailView(generics.RetrieveUpdateDestroyAPIView):
         # Only allow update if the entry belongs to user
         if serializer.instance.user != self.request.user:
             raise PermissionDenied("Cannot modify an entry you don't own.")
-        serializer.save()
+        save_entry(serializer)
 
     def perform_destroy(self, instance):
         # Only allow deletion if entry belongs to user
         if instance.user != self.request.user:
             raise PermissionDenied("Cannot delete an entry you don't own.")
         instance.delete()
+
+
+class JournalEntryBulkCreateView(APIView):
+    """
+    POST /api/journal/bulk/ -> create many entries in one request and transaction
+
+    Body: a list of entries (as for POST /api/journal/), each optionally with
+    a client_id. Entries whose client_id was already uploaded are reported as
+    "duplicate" instead of being created twice, so a client can safely retry.
+
+    Response: one result per input item, in order:
+        {"index": 0, "client_id": "...", "status": "created" | "duplicate" | "invalid",
+         "id": "<uuid>" or "errors": {...}}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_items = 500
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({"error": "Expected a list of entries."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response(
+                {"error": f"At most {self.max_items} entries per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Validate item by item with the list serializer's child, so one bad
+        # entry is reported on its own instead of rejecting the whole batch
+        child = JournalEntrySerializer(many=True).child
+        valid, results = [], []
+        for index, item in enumerate(items):
+            client_id = item.get("client_id") if isinstance(item, dict) else None
+            result = {"index": index, "client_id": client_id}
+            try:
+                valid.append(child.run_validation(item))
+            except ValidationError as exc:
+                result.update(status="invalid", errors=exc.detail)
+            results.append(result)
+
+        imported = iter(bulk_import_entries(request.user, valid))
+        for result in results:
+            if "errors" not in result:
+                entry_id, created = next(imported)
+                result.update(status="created" if created else "duplicate", id=str(entry_id))
+
+        return Response({
+            "created": sum(result["status"] == "created" for result in results),
+            "results": results,
+        }, status=status.HTTP_200_OK)
+
+
+class JournalTagListView(LimitMixin, APIView):
+    """
+    GET: the authenticated user's tags with entry counts, most used first
+
+    Query params:
+        q: optional prefix to autocomplete
+        limit: maximum number of tags (default 20, max 100)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        limit = self.get_limit(request)
+
+        tags = JournalTag.objects.filter(user=request.user)
+        prefix = JournalTag.normalize(request.query_params.get("q", ""))
+        if prefix:
+            # A range instead of startswith: SQLite's LIKE ... ESCAPE can't use the index
+            tags = tags.filter(name__gte=prefix, name__lt=prefix + "\U0010ffff")
+
+        counts = (
+            tags.values("name")
+            .annotate(count=Count("id"))
+            .order_by("-count", "name")[:limit]
+        )
+        return Response({"results": list(counts)})
+
+
+class JournalSearchView(LimitMixin, APIView):
+    """
+    GET: full-text search over the authenticated user's journal entries
+
+    Query params:
+        q: search text; the last word matches as a prefix
+        limit: maximum number of results (default 20, max 100)
+
+    Results are ordered best match first, each with a highlighted snippet.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = self.get_limit(request)
+
+        hits = search_entries(request.user, query, limit=limit)
+        entries = JournalEntrySerializer([entry for entry, _ in hits], many=True).data
+        results = [
+            {**entry, "snippet": snippet}
+            for entry, (_, snippet) in zip(entries, hits)
+        ]
+        return Response({"query": query, "results": results})
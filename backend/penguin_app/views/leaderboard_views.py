@@ -0,0 +1,92 @@
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from penguin_app.models.social_models import Friendship
+from penguin_app.models.user_models import UserGameProfile
+from penguin_app.utils.leaderboard import METRICS, leaderboards
+
+
+def _metric(request):
+    metric = request.query_params.get('metric', 'fish_coins')
+    if metric not in METRICS:
+        raise ValidationError({"metric": f"Use one of: {', '.join(METRICS)}."})
+    return metric
+
+
+class LeaderboardView(APIView):
+    """
+    GET /api/leaderboard/?metric=fish_coins|streak_days|level&limit=10
+
+    The top `limit` users (at most 100) by one metric, plus the caller's
+    own rank. Served from the per-process rankings in utils/leaderboard.py,
+    so only the usernames of the listed users are read from the database.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 100
+
+    def get(self, request):
+        metric = _metric(request)
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.max_limit:
+            raise ValidationError({"limit": f"limit must be 1-{self.max_limit}."})
+
+        profile_id = request.user.profile.pk
+        top, total = leaderboards.top(metric, limit)
+        rank, value = leaderboards.rank(metric, profile_id)
+        if rank is None:
+            # registered since this worker's last refresh
+            value = UserGameProfile.objects.values_list(metric, flat=True).get(pk=profile_id)
+            rank = leaderboards.rank_of_score(metric, value)
+
+        usernames = dict(
+            UserGameProfile.objects.filter(pk__in=[entry[0] for entry in top])
+            .values_list('pk', 'user__username')
+        )
+        return Response({
+            "metric": metric,
+            "total": total,
+            "top": [
+                {"rank": entry_rank, "username": usernames[entry_id], "value": entry_value}
+                for entry_id, entry_value, entry_rank in top
+                if entry_id in usernames  # deleted since the last rebuild
+            ],
+            "me": {"rank": rank, "value": value},
+        })
+
+
+class FriendsLeaderboardView(APIView):
+    """
+    GET /api/leaderboard/friends/?metric=fish_coins|streak_days|level
+
+    The caller and their friends ranked by one metric. Friend lists are
+    small, so this is one indexed query on friendships, sorted here.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        metric = _metric(request)
+        rows = list(
+            Friendship.objects.filter(user_id=request.user.pk, friend__profile__isnull=False)
+            .values_list('friend__username', f'friend__profile__{metric}')
+        )
+        rows.append((
+            request.user.username,
+            UserGameProfile.objects.values_list(metric, flat=True).get(pk=request.user.profile.pk),
+        ))
+        rows.sort(key=lambda row: (-row[1], row[0]))
+
+        entries = []
+        for position, (username, value) in enumerate(rows, 1):
+            rank = entries[-1]["rank"] if entries and entries[-1]["value"] == value else position
+            entries.append({
+                "rank": rank,
+                "username": username,
+                "value": value,
+                "is_me": username == request.user.username,
+            })
+        return Response({"metric": metric, "entries": entries})
@@ -0,0 +1,18 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from penguin_app.utils.response_cache import cache_stats
+
+
+class CacheStatsView(APIView):
+    """
+    GET /api/monitoring/cache/
+
+    Per-user response cache hits, misses and hit rate by endpoint, counted
+    since this worker process started. Staff only.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
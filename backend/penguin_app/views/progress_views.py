@@ -1,8 +1,17 @@
+import calendar
+from datetime import date, datetime, timedelta
+
 from rest_framework import generics, permissions
-from penguin_app.models.progress_models import Progress
+from rest_framework.exceptions import ValidationError
+from penguin_app.models.progress_models import Progress, MonthlyProgress
+from penguin_app.models.user_models import UserGameProfile
 from penguin_app.serializers.progress_serializers import ProgressSerializer
-from django.db.models import Sum
+from penguin_app.utils.response_cache import cache_per_user
+from penguin_app.utils.progress import (
+    DAILY_METRICS, GRANULARITIES, MAX_BUCKETS, METRICS, cached_progress_series, count_buckets,
+)
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
@@ -17,6 +26,10 @@ class WeeklyProgressView(generics.ListAPIView):
     serializer_class = ProgressSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @cache_per_user("weekly-progress")
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
         # each user has a profile via the OneToOne field user.profile
         profile = self.request.user.profile
@@ -26,63 +39,120 @@ class WeeklyProgressView(generics.ListAPIView):
     
 class MonthlyProgressView(APIView):
     """
-    Return a summary of this month's progress for the authenticated user.
+    Return a summary of one month's progress for the authenticated user.
+
+    Defaults to the current month; pass ?month=YYYY-MM for another one.
+    Totals cover the weeks starting in that month and come from the
+    user_progress_monthly rollup, so any month is a single-row read.
     """
 
     permission_classes = [permissions.IsAuthenticated]
 
+    @cache_per_user("monthly-progress")
     def get(self, request):
-        user = request.user
-        profile = user.profile  # UserGameProfile
-
         today = timezone.localdate()
-        month_start = today.replace(day=1)
-
-        # all weekly rows whose week_start is in the current month
-        qs = Progress.objects.filter(
-            profile=profile,
-            week_start__gte=month_start,
-            week_start__lte=today,
-        )
-
-        totals = qs.aggregate(
-            total_habits=Sum('habits_completed'),
-            total_todos=Sum('todos_completed'),
-            total_fish_coins=Sum('fish_coins_earned'),
-        )
-
-        # handle None when there is no data yet
+        month_start = self._month_start(request.query_params.get('month'), today)
+        last_day = month_start.replace(day=calendar.monthrange(month_start.year, month_start.month)[1])
+
+        totals = (
+            MonthlyProgress.objects
+            .filter(profile_id=request.user.profile.pk, month=month_start)
+            .values('habits_completed', 'todos_completed', 'fish_coins_earned')
+            .first()
+        ) or {}
+
         data = {
             "month_start": month_start,
-            "month_end": today,
-            "total_habits": totals["total_habits"] or 0,
-            "total_todos": totals["total_todos"] or 0,
-            "total_fish_coins": totals["total_fish_coins"] or 0,
+            "month_end": today if month_start <= today <= last_day else last_day,
+            "total_habits": totals.get('habits_completed', 0),
+            "total_todos": totals.get('todos_completed', 0),
+            "total_fish_coins": totals.get('fish_coins_earned', 0),
         }
 
         return Response(data)
 
+    @staticmethod
+    def _month_start(value, today):
+        if not value:
+            return today.replace(day=1)
+        try:
+            return datetime.strptime(value, '%Y-%m').date()
+        except ValueError:
+            raise ValidationError({"month": "Use the format YYYY-MM."})
+
 class AllTimeProgressView(APIView):
     """
-    Return an all-time summary of progress for the authenticated user.
+    Return an all-time summary of progress for the authenticated user,
+    read from the rollup columns on the user's game profile.
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    @cache_per_user("all-time-progress")
     def get(self, request):
-        profile = request.user.profile  # UserGameProfile
-
-        qs = Progress.objects.filter(profile=profile)
-
-        totals = qs.aggregate(
-            total_habits=Sum('habits_completed'),
-            total_todos=Sum('todos_completed'),
-            total_fish_coins=Sum('fish_coins_earned'),
-        )
+        totals = UserGameProfile.objects.filter(pk=request.user.profile.pk).values(
+            'all_time_habits_completed', 'all_time_todos_completed', 'all_time_fish_coins_earned',
+        ).get()
 
         data = {
-            "total_habits": totals["total_habits"] or 0,
-            "total_todos": totals["total_todos"] or 0,
-            "total_fish_coins": totals["total_fish_coins"] or 0,
+            "total_habits": totals['all_time_habits_completed'],
+            "total_todos": totals['all_time_todos_completed'],
+            "total_fish_coins": totals['all_time_fish_coins_earned'],
         }
 
         return Response(data)
+
+
+class ProgressSeriesView(APIView):
+    """
+    GET /api/progress/series/?from=&to=&granularity=&metric=
+
+    One metric bucketed by day, week or month, zero-filled, so a chart can
+    draw a year from one small response.
+
+    Query params:
+        from, to: YYYY-MM-DD, inclusive (default: the year up to today)
+        granularity: day | week | month (default: week)
+        metric: habits_completed | todos_completed | fish_coins_earned
+                (default: habits_completed; todos have no daily figures)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        end = self._date(params, 'to', timezone.localdate())
+        start = self._date(params, 'from', end - timedelta(days=min(364, (end - date.min).days)))
+        granularity = params.get('granularity', 'week')
+        metric = params.get('metric', 'habits_completed')
+
+        if granularity not in GRANULARITIES:
+            raise ValidationError({"granularity": f"Use one of: {', '.join(GRANULARITIES)}."})
+        if metric not in METRICS:
+            raise ValidationError({"metric": f"Use one of: {', '.join(METRICS)}."})
+        if granularity == 'day' and metric not in DAILY_METRICS:
+            raise ValidationError({"metric": f"{metric} is only available by week or month."})
+        if start > end:
+            raise ValidationError({"from": "from must not be after to."})
+        if count_buckets(start, end, granularity) > MAX_BUCKETS:
+            raise ValidationError({"from": f"The range covers more than {MAX_BUCKETS} buckets."})
+
+        series = cached_progress_series(request.user.profile, start, end, granularity, metric)
+        return Response({
+            "from": start,
+            "to": end,
+            "granularity": granularity,
+            "metric": metric,
+            "total": sum(value for _, value in series),
+            "points": [{"start": day, "value": value} for day, value in series],
+        })
+
+    @staticmethod
+    def _date(params, name, default):
+        if name not in params:
+            return default
+        try:
+            value = parse_date(params[name])
+        except ValueError:  # well-formed but impossible, e.g. 2026-02-30
+            value = None
+        if value is None:
+            raise ValidationError({name: "Use the format YYYY-MM-DD."})
+        return value
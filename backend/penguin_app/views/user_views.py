@@ -16,16 +16,22 @@ Author: Astra
 """
 
 from rest_framework import status, generics, permissions
+from rest_framework.generics import get_object_or_404
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenRefreshView, TokenObtainPairView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView 
 from django.contrib.auth import get_user_model
 from django.contrib.auth import authenticate
+from django.db import transaction
 from django.utils import timezone
-from django.contrib.auth.tokens import default_token_generator
 
+from ..models.user_models import UserGameProfile
+from ..utils.email import queue_verification_email
+from ..utils.revocation import revoke_tokens
 from ..serializers.user_serializers import UserRegistrationSerializer, UserProfileSerializer, CustomTokenObtainPairSerializer, UserGameProfileSerializer
 
 User = get_user_model()
@@ -47,12 +53,15 @@ class RegisterView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
         
-        # Generate JWT tokens for the new user
-        token = default_token_generator.make_token(user)
-        user.verification_token_expires = timezone.now() + timezone.timedelta(hours=24)
-        user.save()
+        # The user, profile and verification email commit together: no user
+        # without an email, and no email for a registration that rolled back.
+        # The email itself is sent later by `manage.py run_email_worker`.
+        with transaction.atomic():
+            user = serializer.save(
+                verification_token_expires=timezone.now() + timezone.timedelta(hours=24)
+            )
+            queue_verification_email(user)
 
         # Return user data (excluding password)
         response_data = {
@@ -78,25 +87,13 @@ class LoginView(TokenObtainPairView):
     def post(self, request, *args, **kwargs):
         """
         Returns tokens plus user information including is_verified status.
-        """
-        
-        # Get the default response from parent (TokenObtainPairView)
-        response = super().post(request, *args, **kwargs)
         
-        # Add user's profile 
-        if response.status_code == 200:
-            # Get serializer to access authenticated user
-            serializer = self.get_serializer(data=request.data)
-            serializer.is_valid()
-            
-            user = serializer.user 
-            response.data['user'] = {
-                "id": str(user.id),
-                "email": user.email,
-                "username": user.username,
-                "is_verified": user.is_verified
-            }
-        return response 
+        The serializer checks the password once and builds the whole response,
+        so the (deliberately slow) password hash runs only once per login.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
     
 class CurrentUserView(generics.RetrieveUpdateAPIView):
     """
@@ -115,14 +112,18 @@ class CurrentUserView(generics.RetrieveUpdateAPIView):
     
     def get_object(self):
         """Return the current authenticated user."""
-        return self.request.user
+        # request.user only has the auth columns loaded (see authentication.py)
+        return User.objects.get(pk=self.request.user.pk)
 
 class CurrentUserGameProfile(generics.RetrieveAPIView):
     """
     Get current authenticated user's game profile.
     
     Returns game statistics (fish_coins, level, streak_days, etc.)
-    for the authenticated user making the request.
+    for the authenticated user making the request. Read fresh on every
+    request rather than through cache_per_user: counters also change
+    through UPDATEs that skip save() and bump no data version (admin
+    fixes, QuerySet.update()), and a stale coin balance is visible.
     
     Requires JWT authentication.
     See API.md for complete request/response documentation.
@@ -133,15 +134,16 @@ class CurrentUserGameProfile(generics.RetrieveAPIView):
     
     def get_object(self):
         """Return the current authenticated user's game profile."""
-        # Access game profile via the OneToOne relationship
-        return self.request.user.profile 
+        # read fresh: coins and streaks change without going through request.user
+        return get_object_or_404(UserGameProfile, user=self.request.user)
     
 class LogOutView(APIView):
     """
     User logout endpoint.
     
-    Invalidates the refresh token and logs out the user.
-    Client should delete access token from storage.
+    Revokes the refresh token and the access token of the request, so
+    neither works again (see utils/revocation.py).
+    Client should still delete both tokens from storage.
     
     Requires JWT authentication.
     See API.md for complete request/response documentation.
@@ -149,8 +151,21 @@ class LogOutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        """Logout user. Return successful messages."""
+        """Logout user: revoke the access token used and the given refresh token."""
+        tokens = [request.auth] if request.auth is not None else []
+        
+        raw_refresh = request.data.get('refresh')
+        if raw_refresh:
+            try:
+                refresh = RefreshToken(raw_refresh)
+            except TokenError:
+                refresh = None  # already invalid, nothing to revoke
+            # only the caller's own tokens
+            if refresh is not None and str(refresh.get(jwt_settings.USER_ID_CLAIM)) == str(request.user.pk):
+                tokens.append(refresh)
+        
+        revoke_tokens(tokens)
         return Response(
             {'message': 'Successfully logged out.'},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
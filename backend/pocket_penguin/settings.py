@@ -93,8 +93,32 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # File-backed test database so threaded tests get real SQLite
+        # locking (busy waits) instead of shared-cache "table is locked".
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+
+
+# Cache
+# File-based so every process on the host (gunicorn workers, management
+# commands) shares it and sees the others' invalidations. Point
+# CACHE_BACKEND / CACHE_LOCATION at a shared server (e.g. Redis) when
+# running on more than one host.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        # tests use a temporary directory instead (pocket_penguin/test_runner.py)
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache' / 'default')),
     }
 }
+if CACHE_BACKEND.endswith('.FileBasedCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 5000}
+
+TEST_RUNNER = 'pocket_penguin.test_runner.PenguinTestRunner'
 
 
 # Password validation
@@ -143,19 +167,37 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'penguin_app.authentication.CachedJWTAuthentication',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'penguin_app.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
 }
 
+# Email
+# Emails go through the outbox (penguin_app/models/email_models.py) and are
+# sent by `manage.py run_email_worker`. Development prints them to the
+# worker's console; use the file backend to keep them, or SMTP in production.
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', str(BASE_DIR / 'sent_emails'))
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_TIMEOUT = 30
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@pocketpenguin.com')
+
+# Frontend URL for verification links in emails
+FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+
 # JWT Settings
 from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),  # Access token valid for 24 hours
     'REFRESH_TOKEN_LIFETIME': timedelta(days=24),   # Refresh token valid for 24 days
     'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': False,
+    'BLACKLIST_AFTER_ROTATION': False,  # rotated tokens are revoked by our own serializer instead
+    'TOKEN_REFRESH_SERIALIZER': 'penguin_app.serializers.user_serializers.RevocableTokenRefreshSerializer',
 }
 
 # CORS Configuration
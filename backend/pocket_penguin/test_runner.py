@@ -0,0 +1,41 @@
+"""
+Test setup shared by `manage.py test` and pytest (conftest.py).
+
+Tests get their own cache directory, as they get their own database, so a
+test run never reads or clears the cache of a running development server.
+"""
+
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class IsolatedCache:
+    """Points the default cache at a fresh temporary directory while enabled."""
+
+    def enable(self):
+        self.location = tempfile.mkdtemp(prefix='pocket-penguin-cache-')
+        self.override = override_settings(CACHES={
+            'default': {**settings.CACHES['default'], 'LOCATION': self.location},
+        })
+        self.override.enable()
+
+    def disable(self):
+        self.override.disable()
+        shutil.rmtree(self.location, ignore_errors=True)
+
+
+class PenguinTestRunner(DiscoverRunner):
+    """DiscoverRunner with an IsolatedCache for the whole run."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.isolated_cache = IsolatedCache()
+        self.isolated_cache.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolated_cache.disable()
+        super().teardown_test_environment(**kwargs)